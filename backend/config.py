@@ -1,14 +1,25 @@
-from pydantic_settings import BaseSettings
 from typing import List, Union
 import json
 
-class Settings(BaseSettings):
+from forecasting.config import ForecastingSettings
+
+class Settings(ForecastingSettings):
+    # DATA_DIR, ARTIFACTS_DIR, MODEL_VERSION: see forecasting.config
     DATABASE_URL: str
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     GOOGLE_API_KEY: str
     CORS_ORIGINS: Union[List[str], str] = []
+    BVMT_BASE_URL: str = "https://www.ilboursa.com" # market data source (IlBoursa)
+    ANOMALY_STREAM_INTERVAL: int = 60 # seconds between streaming anomaly ticks
+    ANOMALY_STREAM_CHECKPOINT: str = "data/anomaly_stream_state.npz"
+    RUNTIME_DIR: str = "data" # lock files shared by the API workers
+    IO_THREADS: int = 40 # thread pool for blocking I/O (sync endpoints, DB, scrapes)
+    CPU_WORKERS: int = 0 # process pool for CPU-heavy work (hashing, pandas backtests); 0 = one per core
+    MODEL_CHECK_INTERVAL: int = 60 # seconds between each worker's checks for a new CURRENT model (hot-swap)
+    EVENT_FANOUT: str = "local" # SSE events: "local" (one worker) or "db" (stream_events table, shared by workers)
+    STARTUP_WARMUP: bool = False # load the model and start the process pool at startup rather than on first use
 
     @property
     def cors_origins_list(self) -> List[str]:
@@ -19,9 +30,4 @@ class Settings(BaseSettings):
                 return [self.CORS_ORIGINS]
         return self.CORS_ORIGINS
 
-    class Config:
-        env_file = [".env", "backend/.env"]
-        env_file_encoding = "utf-8"
-        extra = "ignore"
-
 settings = Settings()
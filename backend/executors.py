@@ -0,0 +1,72 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config import settings
+
+# Blocking I/O (DB queries, sync scrapes): threads, the GIL is released while waiting.
+# Created on first use and again after shutdown(), so a later app lifespan in the
+# same process (tests, reload) gets a working pool.
+_io_pool = None
+_io_pool_lock = threading.Lock()
+
+# CPU-bound Python (argon2 hashing, pandas backtests): separate processes, so the
+# event loop and the request threads keep their share of the interpreter.
+# Started lazily; "spawn" so workers don't inherit torch / scheduler threads of the API process.
+_cpu_pool = None
+_cpu_pool_lock = threading.Lock()
+
+def cpu_workers():
+    return settings.CPU_WORKERS or os.cpu_count() or 1
+
+def get_io_pool():
+    global _io_pool
+    if _io_pool is None:
+        with _io_pool_lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=settings.IO_THREADS, thread_name_prefix="io")
+    return _io_pool
+
+def get_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is None:
+        with _cpu_pool_lock:
+            if _cpu_pool is None:
+                _cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers(), mp_context=multiprocessing.get_context("spawn"))
+    return _cpu_pool
+
+async def run_io(fn, *args, **kwargs):
+    """Runs a blocking call on the I/O thread pool and awaits it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_pool(), functools.partial(fn, *args, **kwargs))
+
+async def run_cpu(fn, *args, **kwargs):
+    """Runs a CPU-bound call in the process pool. fn and its arguments must be picklable (module-level)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_pool(), functools.partial(fn, *args, **kwargs))
+
+def configure():
+    """
+    Sizes the thread pool FastAPI uses for plain `def` endpoints and dependencies
+    to IO_THREADS as well, so both paths follow the same setting. Call from startup.
+    """
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.IO_THREADS
+
+def warm_up():
+    """Starts the worker processes now rather than on the first hashed password."""
+    pool = get_cpu_pool()
+    for f in [pool.submit(os.getpid) for _ in range(cpu_workers())]:
+        f.result()
+
+def shutdown():
+    global _io_pool, _cpu_pool
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
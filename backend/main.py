@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .database import engine, Base, SessionLocal
 from .config import settings
-from .routers import auth, market, portfolio, stocks, alerts
+from .routers import auth, market, portfolio, stocks, alerts, stream
 
 # New Modular Routers
 from .modules.sentiment import router as sentiment_router
@@ -18,7 +18,11 @@ import backend.modules.sentiment.models
 # Anomaly models are in backend.models now, so no separate import needed
 # Chatbot has no models for MVP
 
-from backend.scheduler import start_scheduler
+from backend.scheduler import start_scheduler, stop_scheduler
+from forecasting.data.filelock import FileLock
+from contextlib import asynccontextmanager
+import asyncio
+import os
 
 # Database dependency
 def get_db():
@@ -28,26 +32,71 @@ def get_db():
     finally:
         db.close()
 
-# Initialize DB tables
-Base.metadata.create_all(bind=engine)
+# Initialize DB tables and seed initial user
+def init_db():
+    # Workers start together: one creates the tables / admin user, the others wait and find them
+    with FileLock(os.path.join(settings.RUNTIME_DIR, "init.lock")):
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        user = db.query(models.User).filter(models.User.username == "admin").first()
+        if not user:
+            from .auth import get_password_hash
+            hashed_password = get_password_hash("samatou")
+            user = models.User(username="admin", hashed_password=hashed_password, risk_profile="moderate", initial_capital=50000)
+            db.add(user)
+            db.commit()
+        db.close()
+
+def _warm_up_model():
+    # The import too: torch takes seconds to import and must not run on the loop
+    from forecasting.inference.service import get_inference_service
+    get_inference_service().warm_up()
 
-# Scheduler
-start_scheduler()
+async def warm_up():
+    """
+    STARTUP_WARMUP: loads the model, opens the store and starts the process pool
+    in the background. /health answers meanwhile; a request that needs the model
+    before it is ready waits for this load instead of starting a second one.
+    """
+    from . import executors
+    try:
+        await executors.run_io(_warm_up_model)
+        await executors.run_io(executors.warm_up)
+        print("Warm-up done.")
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
 
-app = FastAPI(title="Intelligent Trading Assistant API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing heavy is imported above: torch, pandas and the LLM SDK load on first
+    # use (or in warm_up), so importing the app and answering /health stay fast.
+    from .services.event_bus import event_broker
+    from .services.bvmt_scraper import market_client
+    from . import executors
+    # Thread / process pools for blocking and CPU-bound work (see executors.py)
+    executors.configure()
+    await executors.run_io(init_db)
+    # Scheduler jobs publish from worker threads; events hop onto this loop
+    event_broker.bind()
+    follower = None
+    if settings.EVENT_FANOUT == "db":
+        # Several workers: events go through the stream_events table so every worker's SSE clients get them
+        from .services.event_bus import EventLog
+        event_broker.use_log(EventLog(SessionLocal))
+        follower = asyncio.get_running_loop().create_task(event_broker.follow())
+    # Per-worker jobs now, leader-only jobs once this worker wins the scheduler lock
+    start_scheduler()
+    warmup = asyncio.get_running_loop().create_task(warm_up()) if settings.STARTUP_WARMUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    if follower is not None:
+        follower.cancel()
+    stop_scheduler()
+    await market_client.aclose()
+    executors.shutdown()
 
-# Seed initial user
-@app.on_event("startup")
-def startup_event():
-    db = SessionLocal()
-    user = db.query(models.User).filter(models.User.username == "admin").first()
-    if not user:
-        from .auth import get_password_hash
-        hashed_password = get_password_hash("samatou")
-        user = models.User(username="admin", hashed_password=hashed_password, risk_profile="moderate", initial_capital=50000)
-        db.add(user)
-        db.commit()
-    db.close()
+app = FastAPI(title="Intelligent Trading Assistant API", version="0.1.0", lifespan=lifespan)
 
 # CORS Configuration
 origins = [
@@ -78,6 +127,7 @@ app.include_router(market.router)
 app.include_router(stocks.router)
 app.include_router(portfolio.router)
 app.include_router(alerts.router)
+app.include_router(stream.router)
 
 # Module Routers(Decision Support)
 app.include_router(sentiment_router.router)
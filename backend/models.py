@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime
@@ -81,3 +81,31 @@ class Transaction(Base):
     quantity = Column(Integer)
     price = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+class ForecastResult(Base):
+    __tablename__ = "forecast_results"
+    __table_args__ = (
+        # One row per symbol, data session and model; this is the lookup key
+        Index("ix_forecast_results_lookup", "stock_symbol", "session_date", "model_version", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stock_symbol = Column(String, nullable=False)
+    session_date = Column(Date, nullable=False) # latest market session in the dataset when computed
+    as_of = Column(Date) # last session of this stock used as input
+    model_version = Column(String, nullable=False)
+    current_price = Column(Float)
+    prediction_t1 = Column(Float) # price target T+1
+    log_return_t1 = Column(Float)
+    log_return_t5 = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class StreamEvent(Base):
+    """SSE events shared by the API workers when EVENT_FANOUT=db (see services.event_bus.EventLog)."""
+    __tablename__ = "stream_events"
+    __table_args__ = {"sqlite_autoincrement": True} # ids are the SSE event ids: never reused
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    payload = Column(String, nullable=False) # JSON, encoded once by the publisher
+    created_at = Column(DateTime, default=datetime.utcnow)
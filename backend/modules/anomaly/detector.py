@@ -0,0 +1,160 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Detection rules shared by AnomalyService.check_anomalies and the vectorized path
+VOLUME_WINDOW = 30 # last N traded volumes
+MIN_VOLUME_HISTORY = 5 # need more than this many volumes
+VOLUME_Z_THRESHOLD = 3.0
+PRICE_SHOCK_THRESHOLD = 0.05 # abs close-to-close return
+
+def rolling_volume_stats(volumes):
+    """
+    For every row i: mean and population std of the last VOLUME_WINDOW non-NaN
+    volumes strictly before i (what check_anomalies sees as history), and
+    whether there were more than MIN_VOLUME_HISTORY of them.
+    Returns (mean, std, valid) arrays of len(volumes).
+    """
+    volumes = np.asarray(volumes, dtype=np.float64)
+    n = len(volumes)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+
+    present = ~np.isnan(volumes)
+    compact = volumes[present]
+    # counts[i] = number of non-NaN volumes in rows < i
+    counts = np.concatenate(([0], np.cumsum(present)[:-1])) if n else np.zeros(0, dtype=np.int64)
+    valid = counts > MIN_VOLUME_HISTORY
+
+    # Full windows: stats of compact[c - W:c], one row per possible end c
+    if len(compact) >= VOLUME_WINDOW:
+        windows = sliding_window_view(compact, VOLUME_WINDOW) # windows[k] = compact[k:k + W]
+        full_mean = windows.mean(axis=1)
+        full_std = windows.std(axis=1)
+        rows = np.flatnonzero(counts >= VOLUME_WINDOW)
+        k = counts[rows] - VOLUME_WINDOW
+        mean[rows] = full_mean[k]
+        std[rows] = full_std[k]
+
+    # Warm-up windows (fewer than W volumes so far): few rows, computed directly
+    for i in np.flatnonzero(valid & (counts < VOLUME_WINDOW)):
+        w = compact[:counts[i]]
+        mean[i] = np.mean(w)
+        std[i] = np.std(w)
+
+    return mean, std, valid
+
+def detect_series(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Runs check_anomalies' rules on every row of df at once, each row judged
+    against the rows before it (row 0 has no history and is never flagged).
+
+    Returns a frame aligned with df with columns:
+    volume_z, mean_vol, volume_spike, pct_change, price_shock.
+    """
+    import pandas as pd
+    volumes = df["QUANTITE_NEGOCIEE"].to_numpy(dtype=np.float64)
+    closes = df["CLOTURE"].to_numpy(dtype=np.float64)
+    n = len(df)
+
+    mean, std, valid = rolling_volume_stats(volumes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (volumes - mean) / std
+    volume_spike = valid & (std > 0) & (volumes > 0) & (z > VOLUME_Z_THRESHOLD)
+
+    prev_close = np.concatenate(([np.nan], closes[:-1])) if n else closes
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = (closes - prev_close) / prev_close
+    price_shock = (closes > 0) & (prev_close > 0) & (np.abs(pct) > PRICE_SHOCK_THRESHOLD)
+
+    return pd.DataFrame({
+        "volume_z": z,
+        "mean_vol": mean,
+        "volume_spike": volume_spike,
+        "pct_change": pct,
+        "price_shock": price_shock,
+    }, index=df.index)
+
+def anomalies_at(detected: "pd.DataFrame", volumes, i):
+    """check_anomalies-style dicts for row i of a detect_series result."""
+    row = detected.iloc[i]
+    anomalies = []
+    if row["volume_spike"]:
+        current_vol = volumes[i]
+        z_score = row["volume_z"]
+        anomalies.append({
+            "type": "VOLUME_SPIKE",
+            "description": f"Volume {current_vol} is {z_score:.1f}x std dev above mean ({row['mean_vol']:.1f})",
+            "value": float(current_vol),
+            "confidence": min(z_score / 5.0, 1.0) # scaled confidence
+        })
+    if row["price_shock"]:
+        pct_change = row["pct_change"]
+        anomalies.append({
+            "type": "PRICE_SHOCK",
+            "description": f"Price changed by {pct_change*100:.1f}% (limit 5%)",
+            "value": float(pct_change),
+            "confidence": 1.0
+        })
+    return anomalies
+
+def inject_anomalies(test_df: "pd.DataFrame", rng, start=31):
+    """
+    Injects synthetic anomalies into ~5% of the rows (in place), after `start`
+    rows of history. rng is a random.Random, so a seed makes runs reproducible.
+    Returns {row index: injected type}.
+    """
+    injected_anomalies = {} # index -> type
+    num_injections = max(5, int(len(test_df) * 0.05))
+    indices = rng.sample(range(start, len(test_df)), num_injections)
+
+    volume_col = test_df.columns.get_loc('QUANTITE_NEGOCIEE')
+    close_col = test_df.columns.get_loc('CLOTURE')
+    for idx in indices:
+        anomaly_type = rng.choice(["VOLUME_SPIKE", "PRICE_SHOCK"])
+
+        if anomaly_type == "VOLUME_SPIKE":
+            # Make volume massive (10x mean)
+            # We need mean of previous... just multiply current by 10 to be safe
+            test_df.iat[idx, volume_col] = (test_df.iat[idx, volume_col] + 1000) * 10
+        else:
+            # Price Shock (+- 10%)
+            prev_close = test_df.iat[idx - 1, close_col]
+            shock = rng.choice([1.10, 0.90])
+            test_df.iat[idx, close_col] = prev_close * shock
+        injected_anomalies[idx] = anomaly_type
+    return injected_anomalies
+
+def score_detection(detected: "pd.DataFrame", injected_anomalies, start=31):
+    """
+    (tp, fp, fn) of a detect_series result against the injected rows, over rows >= start:
+    an injected row is a hit if its own type was flagged, any flag elsewhere is a false positive.
+    """
+    flags = {
+        "VOLUME_SPIKE": detected["volume_spike"].to_numpy(),
+        "PRICE_SHOCK": detected["price_shock"].to_numpy(),
+    }
+    any_flag = flags["VOLUME_SPIKE"] | flags["PRICE_SHOCK"]
+
+    is_injected = np.zeros(len(detected), dtype=bool)
+    tp = 0
+    for idx, anomaly_type in injected_anomalies.items():
+        is_injected[idx] = True
+        tp += bool(flags[anomaly_type][idx])
+    fn = len(injected_anomalies) - tp
+    fp = int(np.count_nonzero(any_flag[start:] & ~is_injected[start:]))
+    return tp, fp, fn
+
+def metrics(tp, fp, fn):
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+    return {
+        "precision": round(precision, 2),
+        "recall": round(recall, 2),
+        "f1_score": round(f1, 2)
+    }
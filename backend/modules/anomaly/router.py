@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 from sqlalchemy.orm import Session
 from backend.database import get_db
-from .service import AnomalyService
+from backend.executors import run_cpu
+from .service import AnomalyService, run_backtest
 from backend.models import Anomaly
 
 router = APIRouter(
@@ -19,6 +21,15 @@ def detect_anomalies(symbol: str, db: Session = Depends(get_db)):
     anomalies = service.check_anomalies(symbol)
     return anomalies
 
+@router.post("/scan")
+def scan_market(db: Session = Depends(get_db)):
+    """
+    Run the whole-market scan now (it also runs every 5 minutes during the session).
+    Returns the number of new anomalies stored.
+    """
+    from .scanner import scan_market as run_scan
+    return {"new_anomalies": run_scan(db)}
+
 @router.get("/latest")
 def get_latest_anomalies(limit: int = 10, db: Session = Depends(get_db)):
     """
@@ -27,13 +38,23 @@ def get_latest_anomalies(limit: int = 10, db: Session = Depends(get_db)):
     return db.query(Anomaly).order_by(Anomaly.detected_at.desc()).limit(limit).all()
 
 @router.get("/validate/{symbol}")
-def validate_model(symbol: str, db: Session = Depends(get_db)):
+def validate_model(symbol: str, seed: Optional[int] = None, history: Optional[int] = 200, db: Session = Depends(get_db)):
     """
     Run synthetic validation for anomaly detection model.
+    Pass `seed` for reproducible injections, `history=0` to use the full history.
     Returns Precision, Recall, F1-Score.
     """
     service = AnomalyService(db)
-    metrics = service.validate_model(symbol)
+    metrics = service.validate_model(symbol, seed=seed, history=history or None)
     if "error" in metrics:
         raise HTTPException(status_code=400, detail=metrics["error"])
     return metrics
+
+@router.get("/backtest")
+async def backtest_all(seed: int = 0, history: Optional[int] = None):
+    """
+    Seeded synthetic validation on every ticker (full history unless `history` is given).
+    Returns pooled Precision, Recall, F1-Score and per-symbol results.
+    Runs in the CPU process pool: pandas work over every ticker.
+    """
+    return await run_cpu(run_backtest, seed, history or None)
@@ -0,0 +1,192 @@
+import hashlib
+import threading
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from backend.models import Anomaly
+from backend.services.event_bus import event_broker
+from backend.services.market_snapshot import market_snapshot, QUOTE_FIELDS
+from forecasting.symbol_mapping import get_isin_from_symbol
+from . import detector
+
+class BaselineTable:
+    """
+    Per-ticker detection baselines from the stored history, one row per CODE:
+    mean / population std / count of the last VOLUME_WINDOW non-NaN volumes and
+    the last close; the same statistics check_anomalies computes per call.
+    """
+
+    def __init__(self, store):
+        codes = store.codes()
+        self.codes = codes
+        self.index = {c: i for i, c in enumerate(codes)}
+        self.vol_mean = np.full(len(codes), np.nan)
+        self.vol_std = np.full(len(codes), np.nan)
+        self.vol_count = np.zeros(len(codes), dtype=np.int64)
+        self.last_close = np.full(len(codes), np.nan)
+        self.key = (store.manifest.get("built_at"), store.latest_session)
+
+        for i, code in enumerate(codes):
+            df = store.get_ticker(code)
+            if df.empty:
+                continue
+            volumes = df["QUANTITE_NEGOCIEE"].to_numpy(dtype=np.float64)
+            volumes = volumes[~np.isnan(volumes)][-detector.VOLUME_WINDOW:]
+            self.vol_count[i] = len(volumes)
+            if len(volumes):
+                self.vol_mean[i] = np.mean(volumes)
+                self.vol_std[i] = np.std(volumes)
+            self.last_close[i] = df["CLOTURE"].iat[-1]
+
+_baselines = None
+_baselines_lock = threading.Lock()
+
+def get_baselines():
+    """BaselineTable of the current store, rebuilt only when the store is re-ingested."""
+    global _baselines
+    from forecasting.inference.service import get_inference_service
+    inference_service = get_inference_service()
+    inference_service.refresh_data()
+    store = inference_service.store
+    key = (store.manifest.get("built_at"), store.latest_session)
+    with _baselines_lock:
+        if _baselines is None or _baselines.key != key:
+            _baselines = BaselineTable(store)
+        return _baselines
+
+def score_market(quotes, baselines: BaselineTable):
+    """
+    Scores every quote of a QuoteTable against the baselines in one pass.
+    Returns check_anomalies-style dicts with a 'symbol' key.
+    """
+    if len(quotes) == 0:
+        return []
+    rows = np.array([baselines.index.get(get_isin_from_symbol(s), -1) for s in quotes.symbols], dtype=np.int64)
+    known = rows >= 0
+    r = np.where(known, rows, 0)
+
+    price = quotes.values[:, QUOTE_FIELDS.index("last")]
+    volume = quotes.values[:, QUOTE_FIELDS.index("volume")]
+    mean = np.where(known, baselines.vol_mean[r], np.nan)
+    std = np.where(known, baselines.vol_std[r], np.nan)
+    count = np.where(known, baselines.vol_count[r], 0)
+    last_close = np.where(known, baselines.last_close[r], np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (volume - mean) / std
+        pct = (price - last_close) / last_close
+    volume_spike = (count > detector.MIN_VOLUME_HISTORY) & (std > 0) & (volume > 0) & (z > detector.VOLUME_Z_THRESHOLD)
+    price_shock = (price > 0) & (last_close > 0) & (np.abs(pct) > detector.PRICE_SHOCK_THRESHOLD)
+
+    hits = []
+    for i in np.flatnonzero(volume_spike):
+        current_vol = int(volume[i])
+        hits.append({
+            "symbol": quotes.symbols[i],
+            "type": "VOLUME_SPIKE",
+            "description": f"Volume {current_vol} is {z[i]:.1f}x std dev above mean ({mean[i]:.1f})",
+            "value": float(current_vol),
+            "confidence": min(z[i] / 5.0, 1.0) # scaled confidence
+        })
+    for i in np.flatnonzero(price_shock):
+        hits.append({
+            "symbol": quotes.symbols[i],
+            "type": "PRICE_SHOCK",
+            "description": f"Price changed by {pct[i]*100:.1f}% (limit 5%)",
+            "value": float(pct[i]),
+            "confidence": 1.0
+        })
+    return hits
+
+def scan_market(db: Session):
+    """
+    Whole-market anomaly scan: one quote snapshot, one baseline table, one
+    vectorized scoring pass, one bulk insert. Anomalies already recorded today
+    for the same (symbol, type) are not inserted again. Fallback quotes (failed
+    scrape) are not scanned.
+    Returns the number of new anomalies.
+    """
+    if market_snapshot.is_empty:
+        market_snapshot.refresh_sync()
+    table = market_snapshot.table
+    if table.is_fallback:
+        return 0
+    hits = score_market(table, get_baselines())
+    if not hits:
+        return 0
+
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    seen = set(db.query(Anomaly.stock_symbol, Anomaly.anomaly_type).filter(
+        Anomaly.detected_at >= today,
+        Anomaly.stock_symbol.in_(list({h["symbol"] for h in hits}))
+    ).all())
+
+    return insert_anomalies(db, [h for h in hits if (h["symbol"], h["type"]) not in seen], now)
+
+def insert_anomalies(db: Session, hits, detected_at=None):
+    """Bulk-inserts hits (dicts with symbol/type/description/value/confidence) into anomalies."""
+    detected_at = detected_at or datetime.utcnow()
+    rows = [{
+        "stock_symbol": h["symbol"],
+        "anomaly_type": h["type"],
+        "description": h["description"],
+        "metric_value": h["value"],
+        "confidence": float(h["confidence"]),
+        "detected_at": detected_at
+    } for h in hits]
+
+    if rows:
+        db.execute(insert(Anomaly), rows)
+        db.commit()
+        event_broker.publish("anomaly", {"anomalies": rows})
+    return len(rows)
+
+_stream_detector = None
+_last_tick_key = None
+
+def get_stream_detector():
+    global _stream_detector
+    if _stream_detector is None:
+        from backend.config import settings
+        from .streaming import StreamingDetector
+        _stream_detector = StreamingDetector(settings.ANOMALY_STREAM_CHECKPOINT)
+    return _stream_detector
+
+def tick_key(table):
+    """
+    Content of a quote table as the streaming detector sees it (symbols, last
+    price, cumulative volume). Every refresh builds a new QuoteTable, even from
+    the scraper's cached page, so identity can't tell a repeated snapshot apart.
+    """
+    columns = [QUOTE_FIELDS.index("last"), QUOTE_FIELDS.index("volume")]
+    h = hashlib.sha1("\n".join(table.symbols).encode())
+    h.update(np.ascontiguousarray(table.values[:, columns]).tobytes())
+    return h.hexdigest()
+
+def stream_tick(db: Session):
+    """
+    Feeds the current quote table to the streaming detector, stores its events
+    and checkpoints the state. Skips snapshots whose content was already
+    consumed: feeding one twice would record zero volume increments and zero
+    returns and drag the thresholds down. Fallback quotes (failed scrape) are
+    skipped too and leave the detector state untouched.
+    Returns the number of events.
+    """
+    global _last_tick_key
+    table = market_snapshot.table
+    if len(table) == 0 or table.is_fallback:
+        return 0
+    key = tick_key(table)
+    if key == _last_tick_key:
+        return 0
+    _last_tick_key = key
+
+    stream = get_stream_detector()
+    events = stream.update_from_table(table)
+    count = insert_anomalies(db, events)
+    stream.checkpoint()
+    return count
@@ -1,18 +1,21 @@
 import numpy as np
-import pandas as pd
+from typing import TYPE_CHECKING
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from backend.models import Anomaly, Stock
-from backend.services.bvmt_scraper import get_daily_cotations
-from forecasting.inference.service import inference_service
-from forecasting.symbol_mapping import get_isin_from_symbol
+from backend.services.market_snapshot import market_snapshot
+from forecasting.symbol_mapping import get_isin_from_symbol, SYMBOL_TO_ISIN
+from . import detector
 import random
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 class AnomalyService:
     def __init__(self, db: Session):
         self.db = db
 
-    def check_anomalies(self, symbol: str, data: pd.DataFrame = None):
+    def check_anomalies(self, symbol: str, data: "pd.DataFrame" = None):
         """
         Check for volume spikes and price shocks for a given stock.
         If `data` is provided, it runs detection on the *last row* of that data (for validation/testing).
@@ -26,7 +29,8 @@ class AnomalyService:
             isin = get_isin_from_symbol(symbol)
             if not isin:
                 return []
-            hist_df = inference_service.get_latest_data(isin)
+            from forecasting.inference.service import get_inference_service
+            hist_df = get_inference_service().get_latest_data(isin)
             if hist_df.empty:
                 return []
             
@@ -54,15 +58,15 @@ class AnomalyService:
         if "QUANTITE_NEGOCIEE" in hist_df.columns:
             volumes = hist_df["QUANTITE_NEGOCIEE"].dropna().values
             # Use a rolling window if available, else full history
-            window_vol = volumes[-30:] if len(volumes) > 30 else volumes
+            window_vol = volumes[-detector.VOLUME_WINDOW:] if len(volumes) > detector.VOLUME_WINDOW else volumes
             
-            if len(window_vol) > 5:
+            if len(window_vol) > detector.MIN_VOLUME_HISTORY:
                 mean_vol = np.mean(window_vol)
                 std_vol = np.std(window_vol)
                 
                 if std_vol > 0 and current_vol > 0:
                     z_score = (current_vol - mean_vol) / std_vol
-                    if z_score > 3:
+                    if z_score > detector.VOLUME_Z_THRESHOLD:
                         anomalies.append({
                             "type": "VOLUME_SPIKE",
                             "description": f"Volume {current_vol} is {z_score:.1f}x std dev above mean ({mean_vol:.1f})",
@@ -77,7 +81,7 @@ class AnomalyService:
             if last_close > 0:
                 pct_change = (current_price - last_close) / last_close
                 
-                if abs(pct_change) > 0.05:
+                if abs(pct_change) > detector.PRICE_SHOCK_THRESHOLD:
                     anomalies.append({
                         "type": "PRICE_SHOCK",
                         "description": f"Price changed by {pct_change*100:.1f}% (limit 5%)",
@@ -91,82 +95,36 @@ class AnomalyService:
             
         return anomalies
 
-    def validate_model(self, symbol: str):
+    def validate_model(self, symbol: str, seed: int = None, history: int = 200):
         """
         Runs a synthetic validation to calculate Precision, Recall, and F1.
-        1. Loads historical data.
-        2. Injects synthetic anomalies (spikes/shocks).
-        3. Runs detection.
+        1. Loads historical data (last `history` sessions, all of it if None).
+        2. Injects synthetic anomalies (spikes/shocks), seeded if `seed` is given.
+        3. Runs detection over the whole series at once (detector.detect_series,
+           same labels as calling check_anomalies row by row).
         4. Compares results.
         """
         isin = get_isin_from_symbol(symbol)
         if not isin:
             return {"error": f"Symbol {symbol} not found"}
             
-        df = inference_service.get_latest_data(isin)
+        from forecasting.inference.service import get_inference_service
+        df = get_inference_service().get_latest_data(isin)
         if df.empty or len(df) < 100:
             return {"error": "Not enough data for validation"}
             
         # Work on a copy for last 200 days max
-        test_df = df.tail(200).copy().reset_index(drop=True)
-        
-        injected_anomalies = {} # index -> type
-        
+        test_df = (df.tail(history) if history else df).copy().reset_index(drop=True)
+
         # 1. Inject Anomalies
-        # We'll modify ~5% of rows to be anomalies
-        num_injections = max(5, int(len(test_df) * 0.05))
-        indices = random.sample(range(31, len(test_df)), num_injections) # start after 30 for history
-        
-        for idx in indices:
-            row = test_df.iloc[idx]
-            anomaly_type = random.choice(["VOLUME_SPIKE", "PRICE_SHOCK"])
-            
-            if anomaly_type == "VOLUME_SPIKE":
-                # Make volume massive (10x mean)
-                # We need mean of previous... just multiply current by 10 to be safe
-                test_df.at[idx, 'QUANTITE_NEGOCIEE'] = (row['QUANTITE_NEGOCIEE'] + 1000) * 10
-                injected_anomalies[idx] = "VOLUME_SPIKE"
-            else:
-                # Price Shock (+- 10%)
-                prev_close = test_df.at[idx-1, 'CLOTURE']
-                shock = random.choice([1.10, 0.90])
-                test_df.at[idx, 'CLOTURE'] = prev_close * shock
-                injected_anomalies[idx] = "PRICE_SHOCK"
+        # We'll modify ~5% of rows to be anomalies, after 30 rows of history
+        injected_anomalies = detector.inject_anomalies(test_df, random.Random(seed))
 
         # 2. Run Detection
-        tp = 0 # True Positive
-        fp = 0 # False Positive
-        fn = 0 # False Negative
-        
-        detected_indices = {}
-        
-        # Iterate and check
-        # We simulate "real-time" by passing sliced data up to `i`
-        for i in range(31, len(test_df)):
-            # slice data 0..i (inclusive of i as "current")
-            current_slice = test_df.iloc[:i+1]
-            
-            # Check
-            results = self.check_anomalies(symbol, data=current_slice)
-            
-            # Did we detect?
-            detected_types = [a['type'] for a in results]
-            
-            if i in injected_anomalies:
-                expected = injected_anomalies[i]
-                if expected in detected_types:
-                    tp += 1
-                else:
-                    fn += 1 # We missed it
-            else:
-                if detected_types:
-                    fp += 1 # We detected something but nothing was injected
-                    
+        detected = detector.detect_series(test_df)
+        tp, fp, fn = detector.score_detection(detected, injected_anomalies)
+
         # 3. Calculate Metrics
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-        
         return {
             "symbol": symbol,
             "total_samples": len(test_df),
@@ -174,25 +132,49 @@ class AnomalyService:
             "detected_true_positives": tp,
             "false_positives": fp,
             "false_negatives": fn,
-            "metrics": {
-                "precision": round(precision, 2),
-                "recall": round(recall, 2),
-                "f1_score": round(f1, 2)
-            }
+            "metrics": detector.metrics(tp, fp, fn)
+        }
+
+    def backtest_all(self, seed: int = 0, history: int = None):
+        """
+        validate_model on every known ticker (full history by default).
+        Each ticker gets its own seed derived from `seed`, so a run is reproducible.
+        Returns pooled metrics plus the per-symbol results.
+        """
+        results = []
+        tp = fp = fn = 0
+        skipped = []
+        for k, symbol in enumerate(SYMBOL_TO_ISIN):
+            res = self.validate_model(symbol, seed=seed * 100003 + k, history=history)
+            if "error" in res:
+                skipped.append(symbol)
+                continue
+            results.append(res)
+            tp += res["detected_true_positives"]
+            fp += res["false_positives"]
+            fn += res["false_negatives"]
+
+        return {
+            "seed": seed,
+            "symbols": len(results),
+            "skipped": skipped,
+            "total_samples": sum(r["total_samples"] for r in results),
+            "injected_anomalies": sum(r["injected_anomalies"] for r in results),
+            "detected_true_positives": tp,
+            "false_positives": fp,
+            "false_negatives": fn,
+            "metrics": detector.metrics(tp, fp, fn),
+            "per_symbol": results
         }
 
     def get_realtime_data(self, symbol):
-        # ... (Keep existing simple scraping/mock logic)
-        try:
-            quotes = get_daily_cotations()
-            target = next((q for q in quotes if q['symbol'] == symbol), None)
-            if target:
-                return {
-                    'price': float(target.get('last', 0)),
-                    'volume': int(target.get('vol', 0).replace(',', '').replace(' ', '') if isinstance(target.get('vol'), str) else target.get('vol', 0))
-                }
-        except Exception:
-            pass
+        # Latest quote from the shared market snapshot (refreshed by the scheduler)
+        target = market_snapshot.get_quote(symbol)
+        if target:
+            return {
+                'price': target['last'],
+                'volume': target['volume']
+            }
             
         # Fallback Mock
         return {'price': 12.5, 'volume': 5000}
@@ -209,3 +191,12 @@ class AnomalyService:
             )
             self.db.add(db_anomaly)
         self.db.commit()
+
+def run_backtest(seed: int = 0, history: int = None):
+    """AnomalyService.backtest_all for a worker process (see backend.executors.run_cpu), with its own session."""
+    from backend.database import SessionLocal
+    db = SessionLocal()
+    try:
+        return AnomalyService(db).backtest_all(seed=seed, history=history)
+    finally:
+        db.close()
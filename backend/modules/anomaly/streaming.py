@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.services.market_snapshot import QUOTE_FIELDS
+from . import detector
+
+RETURN_WINDOW = 64 # tick returns kept per symbol for the quantile band
+MIN_RETURNS = 20 # returns needed before the quantile band is used
+RETURN_QUANTILES = (0.01, 0.99)
+MIN_QUANTILE_MOVE = 0.01 # ignore band breaks smaller than 1% (quiet symbols have tiny bands)
+EWMA_ALPHA = 0.1 # smoothing of volume increments
+EVENT_COOLDOWN = 15 * 60 # seconds before the same (symbol, type) can fire again
+
+EVENT_TYPES = ["VOLUME_SPIKE", "PRICE_SHOCK"]
+_STATE_ARRAYS = ["last_volume", "last_price", "n", "mean", "m2", "ewma", "returns", "ret_pos", "ret_count", "last_event"]
+
+class StreamingDetector:
+    """
+    Intraday anomaly detection over successive quote snapshots.
+
+    Per symbol (one row of each array): Welford mean / variance and an EWMA of
+    the volume traded between two ticks, a ring buffer of the last RETURN_WINDOW
+    tick returns, the last price / cumulative volume and the last event times.
+    update() is vectorized over the symbols of a tick: O(symbols) work, no
+    history reload. Rules follow check_anomalies:
+    - VOLUME_SPIKE: volume increment z-score > VOLUME_Z_THRESHOLD against the
+      increments seen so far (more than MIN_VOLUME_HISTORY of them).
+    - PRICE_SHOCK: tick return beyond PRICE_SHOCK_THRESHOLD, or outside the
+      symbol's rolling 1%-99% return quantiles once enough returns are known.
+    The state checkpoints to an .npz file so baselines survive a restart.
+    """
+
+    def __init__(self, checkpoint_path=None, capacity=128):
+        self.checkpoint_path = checkpoint_path
+        self._lock = threading.Lock()
+        self.symbols = []
+        self.slots = {}
+        self._allocate(capacity)
+        self.ticks = 0
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.load(checkpoint_path)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.last_volume = np.full(capacity, np.nan)
+        self.last_price = np.full(capacity, np.nan)
+        self.n = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.zeros(capacity)
+        self.m2 = np.zeros(capacity)
+        self.ewma = np.full(capacity, np.nan)
+        self.returns = np.full((capacity, RETURN_WINDOW), np.nan)
+        self.ret_pos = np.zeros(capacity, dtype=np.int64)
+        self.ret_count = np.zeros(capacity, dtype=np.int64)
+        self.last_event = np.full((capacity, len(EVENT_TYPES)), -np.inf)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = {name: getattr(self, name) for name in _STATE_ARRAYS}
+        size = self.capacity
+        self._allocate(capacity)
+        for name, values in old.items():
+            getattr(self, name)[:size] = values
+
+    def _slots_for(self, symbols):
+        new = [s for s in symbols if s not in self.slots]
+        if new:
+            if len(self.symbols) + len(new) > self.capacity:
+                self._grow(len(self.symbols) + len(new))
+            for s in new:
+                self.slots[s] = len(self.symbols)
+                self.symbols.append(s)
+        return np.array([self.slots[s] for s in symbols], dtype=np.int64)
+
+    def update(self, symbols, prices, volumes, now=None):
+        """
+        Consumes one tick: symbols with their last price and cumulative session volume.
+        Returns the events (check_anomalies-style dicts with a 'symbol' key).
+        """
+        now = time.time() if now is None else now
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+
+        with self._lock:
+            slots = self._slots_for(list(symbols))
+            self.ticks += 1
+
+            # --- volume: traded since the previous tick ---
+            prev_volume = self.last_volume[slots]
+            inc = volumes - prev_volume
+            has_inc = ~np.isnan(prev_volume) & ~np.isnan(volumes) & (inc >= 0) # a drop = new session, no increment
+
+            n = self.n[slots]
+            mean = self.mean[slots]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                std = np.sqrt(self.m2[slots] / n) # population std, like np.std in check_anomalies
+                z = (inc - mean) / std
+            volume_spike = has_inc & (n > detector.MIN_VOLUME_HISTORY) & (std > 0) & (inc > 0) & (z > detector.VOLUME_Z_THRESHOLD)
+
+            # --- price: return since the previous tick ---
+            prev_price = self.last_price[slots]
+            has_ret = (prices > 0) & (prev_price > 0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ret = np.where(has_ret, prices / prev_price - 1.0, np.nan)
+
+            banded = has_ret & (self.ret_count[slots] >= MIN_RETURNS)
+            lo = np.full(len(slots), np.nan)
+            hi = np.full(len(slots), np.nan)
+            if banded.any():
+                q = np.nanquantile(self.returns[slots[banded]], RETURN_QUANTILES, axis=1)
+                lo[banded], hi[banded] = q[0], q[1]
+            with np.errstate(invalid="ignore"):
+                outside_band = banded & (np.abs(ret) >= MIN_QUANTILE_MOVE) & ((ret < lo) | (ret > hi))
+                over_limit = has_ret & (np.abs(ret) > detector.PRICE_SHOCK_THRESHOLD)
+            price_shock = over_limit | outside_band
+
+            # --- cooldown per (symbol, type) ---
+            ready = (now - self.last_event[slots]) >= EVENT_COOLDOWN
+            volume_spike &= ready[:, 0]
+            price_shock &= ready[:, 1]
+            self.last_event[slots[volume_spike], 0] = now
+            self.last_event[slots[price_shock], 1] = now
+
+            events = []
+            ewma = self.ewma[slots]
+            for i in np.flatnonzero(volume_spike):
+                events.append({
+                    "symbol": symbols[i],
+                    "type": "VOLUME_SPIKE",
+                    "description": f"Volume +{inc[i]:.0f} since last tick is {z[i]:.1f}x std dev above mean increment "
+                                   f"({mean[i]:.1f}, EWMA {ewma[i]:.1f})",
+                    "value": float(inc[i]),
+                    "confidence": min(z[i] / 5.0, 1.0) # scaled confidence
+                })
+            for i in np.flatnonzero(price_shock):
+                band = f", normal range {lo[i]*100:.1f}%..{hi[i]*100:.1f}%" if banded[i] else ""
+                events.append({
+                    "symbol": symbols[i],
+                    "type": "PRICE_SHOCK",
+                    "description": f"Price changed by {ret[i]*100:.1f}% since last tick (limit 5%{band})",
+                    "value": float(ret[i]),
+                    "confidence": 1.0 if over_limit[i] else 0.7
+                })
+
+            # --- fold the tick into the state (after scoring: baselines exclude the current tick) ---
+            upd = slots[has_inc]
+            x = inc[has_inc]
+            self.n[upd] += 1
+            delta = x - self.mean[upd]
+            self.mean[upd] += delta / self.n[upd]
+            self.m2[upd] += delta * (x - self.mean[upd])
+            prev_ewma = self.ewma[upd]
+            self.ewma[upd] = np.where(np.isnan(prev_ewma), x, (1 - EWMA_ALPHA) * prev_ewma + EWMA_ALPHA * x)
+
+            upd = slots[has_ret]
+            pos = self.ret_pos[upd]
+            self.returns[upd, pos] = ret[has_ret]
+            self.ret_pos[upd] = (pos + 1) % RETURN_WINDOW
+            self.ret_count[upd] = np.minimum(self.ret_count[upd] + 1, RETURN_WINDOW)
+
+            seen = ~np.isnan(volumes)
+            self.last_volume[slots[seen]] = volumes[seen]
+            priced = prices > 0
+            self.last_price[slots[priced]] = prices[priced]
+
+        return events
+
+    def update_from_table(self, table, now=None):
+        """One tick from a market_snapshot QuoteTable."""
+        rows = list(table.index.values()) # one row per symbol
+        symbols = [table.symbols[i] for i in rows]
+        values = table.values[rows]
+        return self.update(symbols, values[:, QUOTE_FIELDS.index("last")], values[:, QUOTE_FIELDS.index("volume")], now=now)
+
+    def stats(self, symbol):
+        i = self.slots.get(symbol)
+        if i is None:
+            return None
+        n = int(self.n[i])
+        return {
+            "increments": n,
+            "mean_increment": float(self.mean[i]),
+            "std_increment": float(np.sqrt(self.m2[i] / n)) if n else None,
+            "ewma_increment": None if np.isnan(self.ewma[i]) else float(self.ewma[i]),
+            "returns": int(self.ret_count[i]),
+        }
+
+    # --- checkpoint ------------------------------------------------------
+
+    def checkpoint(self, path=None):
+        """Atomically writes the state to an .npz file (only the used rows)."""
+        path = path or self.checkpoint_path
+        if not path:
+            return
+        with self._lock:
+            size = len(self.symbols)
+            arrays = {name: getattr(self, name)[:size] for name in _STATE_ARRAYS}
+            arrays["symbols"] = np.array(self.symbols, dtype=str)
+            arrays["ticks"] = np.array(self.ticks)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        try:
+            with np.load(path) as data:
+                symbols = [str(s) for s in data["symbols"]]
+                with self._lock:
+                    self.symbols = []
+                    self.slots = {}
+                    self._allocate(max(self.capacity, len(symbols)))
+                    for name in _STATE_ARRAYS:
+                        getattr(self, name)[:len(symbols)] = data[name]
+                    self.symbols = symbols
+                    self.slots = {s: i for i, s in enumerate(symbols)}
+                    self.ticks = int(data["ticks"])
+            print(f"Streaming anomaly state restored: {len(symbols)} symbols, {self.ticks} ticks")
+        except Exception as e:
+            print(f"Could not restore streaming anomaly state from {path}: {e}")
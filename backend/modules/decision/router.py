@@ -27,11 +27,6 @@ def get_all_recommendations(current_user: User = Depends(get_current_user), db:
     # MVP Watchlist
     symbols = ["SFBT", "BIAT", "PGH", "SAH", "TELNET", "ARTES", "SOTUVER", "TPR", "Lilac", "Carthage Cement"]
     # Actually need to make sure symbols exist in our mapping/DB
-    
-    results = []
-    for sym in symbols:
-        # We might want to optimize this (batch request)
-        rec = service.get_recommendation(sym, current_user.id)
-        results.append(rec)
-        
-    return results
+
+    # Same answer for every user of a risk profile: batched and cached per profile / session
+    return service.get_recommendations(symbols, current_user.risk_profile or "moderate")
@@ -1,95 +1,152 @@
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
 from backend.models import User, Stock, Portfolio, PortfolioHolding, Transaction, Anomaly
 from backend.services.bvmt_scraper import get_daily_cotations
-from forecasting.inference.service import inference_service
-from backend.modules.sentiment.router import get_stock_sentiment as get_sentiment_data # Reuse existing function? Or service?
-# Using existing function as simple service access for MVP
+from backend.services import forecast_cache
+from backend.modules.sentiment.models import SentimentSignal
+
+# (min forecast return, min sentiment) for a BUY, per risk profile
+RISK_THRESHOLDS = {
+    "aggressive": (0.005, -0.2), # 0.5%, can buy even with slightly negative sentiment if return is high
+    "moderate": (0.01, 0.2), # 1%
+    "conservative": (0.02, 0.5), # 2%, strong positive sentiment required
+}
+SELL_RETURN = -0.01
+DECISION_CACHE_TTL = 300 # seconds; anomalies and sentiment can change within a session
+
+# (risk_profile, session_date, model_version, symbols) -> (computed_at, recommendations)
+_decision_cache = {}
+_decision_cache_lock = threading.Lock()
 
 class DecisionService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_recommendation(self, symbol: str, user_id: int):
+    def get_recommendation(self, symbol: str, user_id: int, forecast: dict = None):
         """
         Generate a trade recommendation based on user profile and aggregated data.
+        `forecast` can be passed in when it was already fetched in a batch (see forecast_cache.get_forecasts).
         """
         user = self.db.query(User).filter(User.id == user_id).first()
         risk_profile = user.risk_profile if user else "moderate" # default
-        
-        # 1. Get Inputs
-        # Forecast
-        forecast_res = inference_service.predict(symbol)
-        if "error" in forecast_res:
-            return {"action": "HOLD", "confidence": 0, "reason": "No forecast available"}
-            
-        pred_return = forecast_res.get("log_return_t1", 0) # Log return ~ pct change for small values
-        
-        # Sentiment
-        # We need a way to get sentiment score without HTTP request
-        # Let's query DB directly for latest signal
-        from backend.modules.sentiment.models import SentimentSignal
-        sentiment_signal = self.db.query(SentimentSignal).filter(SentimentSignal.stock_symbol == symbol).order_by(SentimentSignal.date.desc()).first()
-        sentiment_score = sentiment_signal.sentiment_score if sentiment_signal else 0.0 # Neutral fallback
-        
-        # Anomalies
-        recent_anomalies = self.db.query(Anomaly).filter(
-            Anomaly.stock_symbol == symbol,
-            Anomaly.detected_at > datetime.utcnow().replace(hour=0, minute=0, second=0) # Today
-        ).all()
-        has_anomaly = len(recent_anomalies) > 0
-
-        # 2. Logic based on Profile
-        action = "HOLD"
-        confidence = 0.5
-        reasons = []
-
-        # Thresholds
-        if risk_profile == "aggressive":
-            buy_return = 0.005 # 0.5%
-            buy_sentiment = -0.2 # Can buy even with slightly negative sentiment if return is high
-        elif risk_profile == "conservative":
-            buy_return = 0.02 # 2%
-            buy_sentiment = 0.5 # Strong positive sentiment required
-        else: # moderate
-            buy_return = 0.01 # 1%
-            buy_sentiment = 0.2
-            
-        # Decision Logic
-        if pred_return > buy_return:
-            if sentiment_score > buy_sentiment:
-                if not (risk_profile == "conservative" and has_anomaly):
-                    action = "BUY"
-                    confidence = 0.8 + (0.1 if sentiment_score > 0.5 else 0)
-                    reasons.append(f"Forecast predicts {pred_return*100:.2f}% return > threshold {buy_return*100}%")
-                    reasons.append(f"Sentiment {sentiment_score:.2f} is sufficient")
+
+        forecasts = {symbol: forecast if forecast is not None else forecast_cache.get_forecast(self.db, symbol)}
+        return self.decide([symbol], risk_profile, forecasts)[0]
+
+    def get_recommendations(self, symbols, risk_profile: str):
+        """
+        Recommendations for a watchlist. They only depend on the risk profile, so
+        they are cached per (profile, forecast session, model version) for
+        DECISION_CACHE_TTL seconds and shared by every user with that profile.
+        """
+        symbols = list(symbols)
+        session_date, model_version = forecast_cache._current_key()
+        key = (risk_profile, session_date, model_version, tuple(symbols))
+        with _decision_cache_lock:
+            hit = _decision_cache.get(key)
+        if hit and time.time() - hit[0] < DECISION_CACHE_TTL:
+            return hit[1]
+
+        # One batched forecast for the whole watchlist
+        forecasts = forecast_cache.get_forecasts(self.db, symbols)
+        recommendations = self.decide(symbols, risk_profile, forecasts)
+        with _decision_cache_lock:
+            # Entries of older sessions are never served again
+            for k in [k for k in _decision_cache if k[1] != session_date or k[2] != model_version]:
+                del _decision_cache[k]
+            _decision_cache[key] = (time.time(), recommendations)
+        return recommendations
+
+    def latest_sentiments(self, symbols):
+        """{symbol: latest sentiment_score}, one windowed query for all symbols."""
+        ranked = self.db.query(
+            SentimentSignal.stock_symbol,
+            SentimentSignal.sentiment_score,
+            func.row_number().over(
+                partition_by=SentimentSignal.stock_symbol,
+                order_by=(SentimentSignal.date.desc(), SentimentSignal.id.desc())
+            ).label("rank")
+        ).filter(SentimentSignal.stock_symbol.in_(symbols)).subquery()
+        rows = self.db.query(ranked.c.stock_symbol, ranked.c.sentiment_score).filter(ranked.c.rank == 1).all()
+        return {symbol: score for symbol, score in rows}
+
+    def anomaly_counts(self, symbols):
+        """{symbol: anomalies detected today}, one GROUP BY."""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0)
+        rows = self.db.query(Anomaly.stock_symbol, func.count(Anomaly.id)).filter(
+            Anomaly.stock_symbol.in_(symbols),
+            Anomaly.detected_at > today
+        ).group_by(Anomaly.stock_symbol).all()
+        return dict(rows)
+
+    def decide(self, symbols, risk_profile: str, forecasts: dict):
+        """
+        Applies the profile rules to every symbol at once.
+        forecasts is {symbol: forecast} as returned by forecast_cache.get_forecasts.
+        """
+        recommendations = [None] * len(symbols)
+        rows = []
+        for i, symbol in enumerate(symbols):
+            forecast_res = forecasts.get(symbol) or {"error": "missing"}
+            if "error" in forecast_res:
+                recommendations[i] = {"action": "HOLD", "confidence": 0, "reason": "No forecast available"}
+            else:
+                rows.append(i)
+        if not rows:
+            return recommendations
+
+        batch = [symbols[i] for i in rows]
+        sentiments = self.latest_sentiments(batch)
+        counts = self.anomaly_counts(batch)
+
+        # Log return ~ pct change for small values
+        pred = np.array([forecasts[s].get("log_return_t1", 0) for s in batch], dtype=np.float64)
+        sentiment = np.array([sentiments.get(s) or 0.0 for s in batch], dtype=np.float64) # Neutral fallback
+        anomalies = np.array([counts.get(s, 0) for s in batch], dtype=np.int64)
+
+        buy_return, buy_sentiment = RISK_THRESHOLDS.get(risk_profile, RISK_THRESHOLDS["moderate"])
+        has_anomaly = anomalies > 0
+        good_forecast = pred > buy_return
+        good_sentiment = sentiment > buy_sentiment
+        # Conservative profile avoids stocks with anomalies
+        buy = good_forecast & good_sentiment & ~(has_anomaly & (risk_profile == "conservative"))
+        sell = ~good_forecast & (pred < SELL_RETURN)
+        confidence = np.where(buy, 0.8 + np.where(sentiment > 0.5, 0.1, 0), np.where(sell, 0.7, 0.5))
+
+        for j, i in enumerate(rows):
+            reasons = []
+            if buy[j]:
+                action = "BUY"
+                reasons.append(f"Forecast predicts {pred[j]*100:.2f}% return > threshold {buy_return*100}%")
+                reasons.append(f"Sentiment {sentiment[j]:.2f} is sufficient")
+            elif sell[j]:
+                action = "SELL"
+                reasons.append(f"Negative forecast {pred[j]*100:.2f}%")
             else:
-                 reasons.append(f"Sentiment {sentiment_score:.2f} is too low for BUY despite good forecast")
-        elif pred_return < -0.01:
-            action = "SELL"
-            confidence = 0.7
-            reasons.append(f"Negative forecast {pred_return*100:.2f}%")
-        
-        if has_anomaly:
-            reasons.append(f"Safe guard: {len(recent_anomalies)} anomalies detected today")
-            if risk_profile == "conservative" and action == "BUY":
                 action = "HOLD"
-                reasons.append("Conservative profile avoids stocks with anomalies")
-
-        if not reasons:
-            reasons.append("No strong signals detected")
-
-        return {
-            "symbol": symbol,
-            "action": action,
-            "confidence": confidence,
-            "reason": "; ".join(reasons),
-            "metrics": {
-                "forecast_return": pred_return,
-                "sentiment_score": sentiment_score,
-                "anomalies": len(recent_anomalies)
+                if good_forecast[j] and not good_sentiment[j]:
+                    reasons.append(f"Sentiment {sentiment[j]:.2f} is too low for BUY despite good forecast")
+            if has_anomaly[j]:
+                reasons.append(f"Safe guard: {anomalies[j]} anomalies detected today")
+            if not reasons:
+                reasons.append("No strong signals detected")
+
+            recommendations[i] = {
+                "symbol": symbols[i],
+                "action": action,
+                "confidence": float(confidence[j]),
+                "reason": "; ".join(reasons),
+                "metrics": {
+                    "forecast_return": float(pred[j]),
+                    "sentiment_score": float(sentiment[j]),
+                    "anomalies": int(anomalies[j])
+                }
             }
-        }
+        return recommendations
 
     def execute_trade(self, user_id: int, symbol: str, action: str, quantity: int, price: float):
         """
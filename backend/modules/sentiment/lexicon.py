@@ -0,0 +1,141 @@
+import re
+
+import numpy as np
+
+# Stems (prefix match on word start). Weight 1 unless stated.
+POSITIVE_FR = {
+    "hauss": 1.0, "croissan": 1.0, "bénéfic": 1.0, "positif": 1.0, "positiv": 1.0, "bond": 1.0, "gain": 1.0, "performant": 0.5,
+    "progress": 1.0, "rebond": 1.0, "amélior": 1.0, "record": 0.5, "dividende": 0.5, "solide": 0.5,
+    "envol": 1.0, "grimp": 1.0, "augment": 0.5, "excédent": 1.0, "optimis": 1.0, "reprise": 0.5,
+    "redress": 1.0, "surperform": 1.0, "favorable": 1.0, "succès": 1.0, "accélér": 0.5, "renforc": 0.5,
+}
+NEGATIVE_FR = {
+    "baiss": 1.0, "chut": 1.0, "perte": 1.0, "négatif": 1.0, "négativ": 1.0, "déficit": 1.0, "repli": 1.0, "faillite": 1.0,
+    "recul": 1.0, "effondr": 1.0, "dégrad": 1.0, "ralenti": 0.5, "plong": 1.0, "déviss": 1.0, "crise": 1.0,
+    "inquiét": 1.0, "endett": 0.5, "défaut": 1.0, "sanction": 0.5, "difficult": 0.5, "pessimis": 1.0,
+    "contre-performan": 1.0, "sous-perform": 1.0, "érosion": 1.0, "dépréci": 1.0, "suspen": 0.5,
+}
+POSITIVE_AR = {
+    "ارتفاع": 1.0, "نمو": 1.0, "ربح": 1.0, "أرباح": 1.0, "إيجابي": 1.0, "صعود": 1.0, "مكسب": 1.0, "مكاسب": 1.0,
+    "أداء": 0.5, "تحسن": 1.0, "انتعاش": 1.0, "زيادة": 0.5, "قياسي": 0.5, "توزيع": 0.5, "فائض": 1.0, "تعاف": 1.0,
+}
+NEGATIVE_AR = {
+    "انخفاض": 1.0, "هبوط": 1.0, "خسارة": 1.0, "خسائر": 1.0, "سلبي": 1.0, "تراجع": 1.0, "عجز": 1.0, "إفلاس": 1.0,
+    "انهيار": 1.0, "أزمة": 1.0, "تدهور": 1.0, "ركود": 1.0, "ديون": 0.5, "تباطؤ": 0.5, "عقوبات": 0.5,
+}
+
+NEGATIONS_FR = ["ne", "n'", "n’", "pas", "aucun", "aucune", "sans", "jamais", "guère", "non"]
+NEGATIONS_AR = ["لا", "لم", "لن", "ليس", "ليست", "غير", "عدم", "دون"]
+
+# Arabic clitics glued to the word: wa-, fa-, bi-, li-, al- and combinations
+AR_PREFIX = r"(?:و|ف|ب|ل|ك)?(?:ال)?"
+NEGATION_WINDOW = 3 # a negation flips the next few words ("ne ... pas", "لم يشهد")
+CONFIDENCE_HITS = 2 # hits needed for full confidence
+
+def _compile(positive, negative, negations, prefix=""):
+    """
+    One alternation for the whole lexicon, so the regex engine scans each text once in C.
+    Longest stems first so the most specific stem wins.
+    Group 'negation' matches negation words, 'pos' / 'neg' the lexicon stems.
+    """
+    def alt(words):
+        return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+    # Elided negations ("n'a") are glued to the next word, the others stand alone
+    elided = [w for w in negations if w[-1] in "'’"]
+    words = [w for w in negations if w[-1] not in "'’"]
+    negation = rf"(?:{alt(elided)})|(?:{alt(words)})(?!\w)" if elided else rf"(?:{alt(words)})(?!\w)"
+    pattern = (rf"(?<!\w)(?:(?P<negation>{negation})"
+               rf"|{prefix}(?P<pos>{alt(positive)})\w*"
+               rf"|{prefix}(?P<neg>{alt(negative)})\w*)")
+    return re.compile(pattern, re.IGNORECASE)
+
+_PATTERNS = {
+    "fr": _compile(POSITIVE_FR, NEGATIVE_FR, NEGATIONS_FR),
+    "ar": _compile(POSITIVE_AR, NEGATIVE_AR, NEGATIONS_AR, AR_PREFIX),
+}
+_WEIGHTS = {
+    "fr": ({k.lower(): v for k, v in POSITIVE_FR.items()}, {k.lower(): v for k, v in NEGATIVE_FR.items()}),
+    "ar": (POSITIVE_AR, NEGATIVE_AR),
+}
+_WORD = re.compile(r"\w+(?:'\w+)?")
+
+def _scan(texts, lang):
+    """
+    Lexicon hits of a whole batch in one regex pass over the joined texts.
+    Returns (doc index, signed weight, start offset) arrays for the hits and
+    (doc index, end offset) for the negations.
+    """
+    joined = "\n".join(texts)
+    starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]])
+    positive, negative = _WEIGHTS[lang]
+
+    hit_pos, hit_w, neg_pos = [], [], []
+    for m in _PATTERNS[lang].finditer(joined):
+        kind = m.lastgroup
+        if kind == "negation":
+            neg_pos.append(m.end())
+        elif kind == "pos":
+            hit_pos.append(m.start())
+            hit_w.append(positive[m.group(kind).lower()])
+        else:
+            hit_pos.append(m.start())
+            hit_w.append(-negative[m.group(kind).lower()])
+
+    hit_pos = np.asarray(hit_pos, dtype=np.int64)
+    neg_pos = np.asarray(neg_pos, dtype=np.int64)
+    hit_doc = np.searchsorted(starts, hit_pos, side="right") - 1
+    neg_doc = np.searchsorted(starts, neg_pos, side="right") - 1
+    return joined, hit_doc, np.asarray(hit_w, dtype=np.float64), hit_pos, neg_doc, neg_pos
+
+def score_batch(texts, langs=None):
+    """
+    Lexicon sentiment of many texts at once.
+    Returns (scores, confidences): float arrays in [-1, 1] and [0, 1].
+
+    score = (positive - negative) / (positive + negative) weights, with a hit's
+    polarity flipped when a negation precedes it within NEGATION_WINDOW words of
+    the same text. confidence grows with the number of hits and how one-sided they are;
+    texts without hits score 0.0 with confidence 0.
+    """
+    n = len(texts)
+    scores = np.zeros(n)
+    confidences = np.zeros(n)
+    if n == 0:
+        return scores, confidences
+    langs = langs or ["fr"] * n
+    langs = np.asarray(langs)
+
+    for lang in ("fr", "ar"):
+        idx = np.flatnonzero(langs == lang) if lang == "ar" else np.flatnonzero(langs != "ar")
+        if len(idx) == 0:
+            continue
+        texts_l = [texts[i] or "" for i in idx]
+        joined, hit_doc, hit_w, hit_pos, neg_doc, neg_pos = _scan(texts_l, lang)
+        if len(hit_w) == 0:
+            continue
+
+        if len(neg_pos):
+            # Nearest negation ending before each hit, in the same text, at most NEGATION_WINDOW words back
+            k = np.searchsorted(neg_pos, hit_pos, side="right") - 1
+            candidate = (k >= 0)
+            k = np.clip(k, 0, None)
+            candidate &= neg_doc[k] == hit_doc
+            for j in np.flatnonzero(candidate):
+                gap = joined[neg_pos[k[j]]:hit_pos[j]]
+                if len(_WORD.findall(gap)) < NEGATION_WINDOW:
+                    hit_w[j] = -hit_w[j]
+
+        pos = np.bincount(hit_doc, weights=np.clip(hit_w, 0, None), minlength=len(idx))
+        neg = np.bincount(hit_doc, weights=np.clip(-hit_w, 0, None), minlength=len(idx))
+        hits = np.bincount(hit_doc, minlength=len(idx))
+        total = pos + neg
+        with np.errstate(invalid="ignore", divide="ignore"):
+            s = np.where(total > 0, (pos - neg) / total, 0.0)
+        scores[idx] = s
+        confidences[idx] = np.abs(s) * np.minimum(1.0, hits / CONFIDENCE_HITS)
+
+    return scores, confidences
+
+def score(text, lang="fr"):
+    s, c = score_batch([text], [lang])
+    return float(s[0]), float(c[0])
@@ -25,3 +25,12 @@ class NewsArticle(Base):
     published_date = Column(DateTime)
     sentiment_score = Column(Float)
     language = Column(String) # ar, fr
+
+class SentimentScoreCache(Base):
+    """LLM sentiment scores keyed by normalized-text hash and model, so identical texts are scored once."""
+    __tablename__ = "sentiment_score_cache"
+
+    text_hash = Column(String(64), primary_key=True) # sha256 of the normalized text
+    model = Column(String, primary_key=True)
+    score = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
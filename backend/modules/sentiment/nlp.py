@@ -3,90 +3,271 @@ import os
 import warnings
 import time
 import re
-from google import genai
-from google.genai import types
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from . import lexicon
+
+GEMINI_MODEL = 'gemini-2.0-flash'
+MAX_TEXT_CHARS = 1000 # Truncate text to save tokens/cost; the lead paragraph is usually enough for news
+BATCH_SIZE = 25 # texts per prompt
+MEMORY_CACHE_MAX_ENTRIES = 10000
+LOCAL_CONFIDENCE_THRESHOLD = 0.5 # lexicon scores at least this confident skip the LLM
+
+def normalize_text(text: str) -> str:
+    """Text as sent to the model, normalized so cosmetic differences share a cache entry."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().lower()[:MAX_TEXT_CHARS]
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Takes `tokens`, sleeping until they are available. Returns the time waited."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            # Negative balance = reservation; wait until it is paid back
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+# Shared across analyzers: Gemini quotas are per key, not per request handler (15 RPM free tier)
+gemini_bucket = TokenBucket(rate=15 / 60, capacity=5)
+
+# In-process front of the persistent cache: (text_hash, model) -> score
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, db=None, client=None, model: str = GEMINI_MODEL, batch_size: int = BATCH_SIZE, bucket: TokenBucket = None,
+                 local_threshold: float = LOCAL_CONFIDENCE_THRESHOLD):
+        """
+        db: optional SQLAlchemy session for the persistent score cache (sentiment_score_cache).
+        client: anything with client.models.generate_content(model=..., contents=..., config=...);
+        defaults to a Gemini client when GOOGLE_API_KEY is set.
+        local_threshold: lexicon confidence from which the local score is used as is;
+        None sends everything to the LLM.
+        """
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.bucket = bucket or gemini_bucket
+        self.local_threshold = local_threshold
+        # Counters (per analyzer)
+        self.local_scored = 0
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         # Allow API key to be passed or env
         self.api_key = os.getenv("GOOGLE_API_KEY")
-        if self.api_key:
+        if client is not None:
+            self.client = client
+        elif self.api_key:
+            from google import genai # heavy SDK, loaded with the first analyzer
             self.client = genai.Client(api_key=self.api_key)
         else:
             print("Warning: GOOGLE_API_KEY not found. Using local fallback.")
             self.client = None
 
-        # Simple lexicons for fallback
-        self.positive_keywords_fr = ['hausse', 'croissance', 'bénéfice', 'positif', 'bond', 'gain', 'performant']
-        self.negative_keywords_fr = ['baisse', 'chute', 'perte', 'négatif', 'déficit', 'repli', 'faillite']
-        self.positive_keywords_ar = ['ارتفاع', 'نمو', 'ربح', 'إيجابي', 'صعود', 'مكسب', 'أداء']
-        self.negative_keywords_ar = ['انخفاض', 'هبوط', 'خسارة', 'سلبي', 'تراجع', 'عجز', 'إفلاس']
-
     def analyze(self, text: str, lang: str = 'fr') -> float:
         """
         Analyze sentiment score (-1.0 to 1.0).
-        Tries Gemini API first, falls back to keyword counting.
+        Confident lexicon scores are used directly, the rest go to Gemini (through
+        the score cache); the lexicon score is the fallback.
+        """
+        return self.analyze_batch([text], [lang])[0]
+
+    def analyze_batch(self, texts, langs=None):
         """
-        if self.client:
+        Scores many texts, in order.
+        1. Lexicon tier (lexicon.score_batch, one vectorized pass): texts with
+           confidence >= local_threshold keep the local score.
+        2. The rest: cached scores (memory, then DB) are reused, the remaining
+           unique texts go to the model BATCH_SIZE per prompt, each prompt paced
+           by the token bucket. Texts the model couldn't score get the local
+           score, which is not cached.
+        """
+        langs = langs or ['fr'] * len(texts)
+        local_scores, confidences = lexicon.score_batch(texts, langs)
+        local_scores = local_scores.tolist()
+        if not self.client:
+            self.local_scored += len(texts)
+            return local_scores
+
+        scores = [None] * len(texts)
+        if self.local_threshold is not None:
+            for i, conf in enumerate(confidences):
+                if conf >= self.local_threshold:
+                    scores[i] = local_scores[i]
+                    self.local_scored += 1
+
+        keys = [text_hash(t) for t in texts]
+        cached = self._cache_get({k for k, sc in zip(keys, scores) if sc is None})
+        pending = {} # text_hash -> text, first occurrence
+        for i, key in enumerate(keys):
+            if scores[i] is not None:
+                continue
+            if key in cached:
+                scores[i] = cached[key]
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+                pending.setdefault(key, texts[i])
+
+        fresh = {}
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            fresh.update(self._score_chunk(chunk))
+        self._cache_put(fresh)
+
+        for i, key in enumerate(keys):
+            if scores[i] is None:
+                scores[i] = fresh[key] if key in fresh else local_scores[i]
+        return scores
+
+    def _score_chunk(self, chunk):
+        """[(key, text)] -> {key: score} for the texts the model scored."""
+        # Retry logic for rate limits
+        for attempt in range(3):
             try:
-                # Retry logic for rate limits
-                for attempt in range(2):
-                    try:
-                        score = self._analyze_with_gemini(text)
-                        return score
-                    except Exception as e:
-                        if "429" in str(e): # Rate limit
-                            time.sleep(2)
-                            continue
-                        print(f"Gemini API Error: {e}")
-                        break
+                self.bucket.acquire()
+                self.llm_calls += 1
+                values = self._analyze_with_gemini([text for _, text in chunk])
+                return {key: v for (key, _), v in zip(chunk, values) if v is not None}
             except Exception as e:
-                print(f"Gemini Analysis Failed: {e}")
-
-        # Fallback
-        return self._analyze_local(text, lang)
+                if "429" in str(e): # Rate limit
+                    time.sleep(2 ** attempt)
+                    continue
+                print(f"Gemini API Error: {e}")
+                break
+        return {}
 
-    def _analyze_with_gemini(self, text: str) -> float:
+    def _analyze_with_gemini(self, texts):
+        """One request for all texts; returns a score (or None) per text."""
+        payload = [{"id": i, "text": normalize_text(t)} for i, t in enumerate(texts)]
         prompt = f"""
-        Analyze the financial sentiment of the following news text regarding the stock market or specific companies.
-        Provide a single sentiment score between -1.0 (very negative) and 1.0 (very positive).
+        Analyze the financial sentiment of each of the following news texts regarding the stock market or specific companies.
+        Give each one a sentiment score between -1.0 (very negative) and 1.0 (very positive).
         0.0 is neutral.
-        
-        Return ONLY the number. No text.
-        
-        Text: "{text[:1000]}"
-        """ 
-        # Truncate text to save tokens/cost and purely focusing on lead paragraph usually enough for news
-        
+
+        Return ONLY a JSON array with one object per text: [{{"id": <id>, "score": <number>}}, ...]
+
+        Texts: {json.dumps(payload, ensure_ascii=False)}
+        """
+
+        from google.genai import types
         response = self.client.models.generate_content(
-            model='gemini-2.0-flash', 
-            contents=prompt
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(response_mime_type="application/json")
         )
-        
-        # Extract number
-        match = re.search(r"[-+]?\d*\.\d+|[-+]?\d+", response.text)
-        if match:
-            val = float(match.group())
-            return max(-1.0, min(1.0, val)) # Clamp
-        return 0.0
 
-    def _analyze_local(self, text: str, lang: str) -> float:
-        text = text.lower()
-        if lang == 'fr':
-            pos_keywords = self.positive_keywords_fr
-            neg_keywords = self.negative_keywords_fr
+        scores = [None] * len(texts)
+        for item in self._parse_array(response.text):
+            try:
+                i = int(item["id"])
+                if 0 <= i < len(texts):
+                    scores[i] = max(-1.0, min(1.0, float(item["score"]))) # Clamp
+            except (KeyError, TypeError, ValueError):
+                continue
+        return scores
+
+    @staticmethod
+    def _parse_array(text):
+        text = (text or "").strip()
+        # Tolerate ```json fences or prose around the array
+        match = re.search(r"\[.*\]", text, re.DOTALL)
+        if not match:
+            return []
+        try:
+            data = json.loads(match.group())
+        except json.JSONDecodeError:
+            return []
+        return [x for x in data if isinstance(x, dict)] if isinstance(data, list) else []
+
+    # --- score cache -----------------------------------------------------
+
+    def _cache_get(self, keys):
+        found = {}
+        with _memory_lock:
+            for key in keys:
+                score = _memory_cache.get((key, self.model))
+                if score is not None:
+                    _memory_cache.move_to_end((key, self.model))
+                    found[key] = score
+
+        missing = [k for k in keys if k not in found]
+        if missing and self.db is not None:
+            from .models import SentimentScoreCache
+            rows = self.db.query(SentimentScoreCache.text_hash, SentimentScoreCache.score).filter(
+                SentimentScoreCache.model == self.model,
+                SentimentScoreCache.text_hash.in_(missing)
+            ).all()
+            db_found = {key: score for key, score in rows}
+            self._remember(db_found)
+            found.update(db_found)
+        return found
+
+    def _remember(self, scores):
+        with _memory_lock:
+            for key, score in scores.items():
+                _memory_cache[(key, self.model)] = score
+                _memory_cache.move_to_end((key, self.model))
+            while len(_memory_cache) > MEMORY_CACHE_MAX_ENTRIES:
+                _memory_cache.popitem(last=False)
+
+    def _cache_put(self, scores):
+        if not scores:
+            return
+        self._remember(scores)
+        if self.db is None:
+            return
+        from .models import SentimentScoreCache
+        rows = [{"text_hash": k, "model": self.model, "score": v} for k, v in scores.items()]
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(SentimentScoreCache).on_conflict_do_nothing()
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(SentimentScoreCache).on_conflict_do_nothing()
         else:
-            pos_keywords = self.positive_keywords_ar
-            neg_keywords = self.negative_keywords_ar
-
-        pos_count = sum(text.count(w) for w in pos_keywords)
-        neg_count = sum(text.count(w) for w in neg_keywords)
-        
-        total = pos_count + neg_count
-        if total == 0:
-            return 0.0
-        
-        return (pos_count - neg_count) / total
+            from sqlalchemy import insert
+            stmt = insert(SentimentScoreCache)
+        self.db.execute(stmt, rows)
+        # Part of the caller's transaction (SentimentService.ingest commits or flushes): never commit here
+        self.db.flush()
+
+    def stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "local_scored": self.local_scored,
+            "llm_calls": self.llm_calls,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _analyze_local(self, text: str, lang: str) -> float:
+        return lexicon.score(text, lang)[0]
 
     def detect_language(self, text: str) -> str:
         # Simple heuristic: presence of Arabic characters
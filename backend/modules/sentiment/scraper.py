@@ -1,24 +1,86 @@
 
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import logging
+import threading
 import time
 import random
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+class DomainRateLimiter:
+    """
+    Politeness per domain: consecutive requests to the same host are spaced by a
+    random min_delay..max_delay gap, requests to different hosts don't wait on
+    each other. wait() reserves the next slot under a lock and sleeps outside it;
+    it only spaces request starts. slot() also holds the domain until the
+    response is done, so a slow response never overlaps the next request and
+    the gap counts from its completion.
+    """
+
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 3.0):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._next_slot = {}
+        self._domain_locks = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> float:
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            # First request to a domain also gets a delay, as before
+            slot = max(now, self._next_slot.get(domain, now)) + random.uniform(self.min_delay, self.max_delay)
+            self._next_slot[domain] = slot
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    @contextmanager
+    def slot(self, url: str):
+        """One request at a time per domain: wait for the gap, hold until the caller is done."""
+        domain = urlparse(url).netloc
+        with self._lock:
+            domain_lock = self._domain_locks.setdefault(domain, threading.Lock())
+        with domain_lock:
+            self.wait(url)
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._next_slot[domain] = time.monotonic()
+
+# Shared by every scraper instance so limits hold across services and jobs
+rate_limiter = DomainRateLimiter()
+
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
 class BaseScraper(ABC):
-    def __init__(self):
+    def __init__(self, limiter: DomainRateLimiter = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.limiter = limiter or rate_limiter
 
-    def _get_soup(self, url: str) -> Optional[BeautifulSoup]:
+    def _get_soup(self, url: str) -> Optional["BeautifulSoup"]:
         try:
-            time.sleep(random.uniform(1, 3)) # Polite delay
-            response = requests.get(url, headers=self.headers, timeout=10)
+            with self.limiter.slot(url): # Polite delay, one request at a time per domain
+                response = _session.get(url, headers=self.headers, timeout=10)
             if response.status_code == 200:
+                from bs4 import BeautifulSoup
                 return BeautifulSoup(response.content, 'html.parser')
             print(f"Failed to fetch {url}: Status {response.status_code}")
         except Exception as e:
@@ -166,6 +228,43 @@ class AfricanManagerScraper(BaseScraper):
             except: continue
         return articles
 
+class ScrapeEngine:
+    """
+    Runs every (scraper, symbol) pair on a bounded thread pool. Politeness is
+    enforced per domain by the scrapers' DomainRateLimiter, so total wall time
+    is roughly that of the busiest domain instead of the sum of all requests.
+    """
+
+    def __init__(self, scrapers: List[BaseScraper], max_workers: int = 16):
+        self.scrapers = scrapers
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _run(scraper: BaseScraper, symbol: str) -> List[Dict]:
+        try:
+            return scraper.scrape(symbol)
+        except Exception as e:
+            logger.error(f"{type(scraper).__name__} failed for {symbol}: {e}")
+            return []
+
+    def scrape_many(self, symbols: List[str]) -> Dict[str, List[Dict]]:
+        """{symbol: articles}, articles in scraper order (same as scraping serially)."""
+        # Symbol-major order spreads the first requests over all domains
+        pairs: List[Tuple[BaseScraper, str]] = [(sc, sym) for sym in symbols for sc in self.scrapers]
+        results = {sym: [] for sym in symbols}
+        if not pairs:
+            return results
+
+        workers = max(1, min(self.max_workers, len(pairs)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape") as pool:
+            futures = [pool.submit(self._run, sc, sym) for sc, sym in pairs]
+            for (sc, sym), fut in zip(pairs, futures):
+                results[sym].extend(fut.result())
+        return results
+
+    def scrape(self, symbol: str) -> List[Dict]:
+        return self.scrape_many([symbol])[symbol]
+
 class ScraperFactory:
     @staticmethod
     def get_scrapers() -> List[BaseScraper]:
@@ -2,95 +2,142 @@ import logging
 from sqlalchemy.orm import Session
 from datetime import datetime
 from .models import SentimentSignal, NewsArticle
-from .scraper import ScraperFactory
+from .scraper import ScraperFactory, ScrapeEngine
 from .nlp import SentimentAnalyzer
+from backend.services.event_bus import event_broker
 
 logger = logging.getLogger(__name__)
 
 class SentimentService:
     def __init__(self, db: Session):
         self.db = db
-        self.analyzer = SentimentAnalyzer()
+        self.analyzer = SentimentAnalyzer(db=db)
         self.scrapers = ScraperFactory.get_scrapers()
+        self.engine = ScrapeEngine(self.scrapers)
 
-    def update_stock_sentiment(self, stock_symbol: str):
+    def update_stock_sentiment(self, stock_symbol: str, all_articles: list = None):
         """
         Scrapes all sources for a stock, analyzes sentiment, and updates DB.
+        `all_articles` can be passed in when the scraping was already done (see update_all_sentiments).
         """
         logger.info(f"Updating sentiment for {stock_symbol}...")
-        all_articles = []
-
-        # 1. Scrape from all sources
-        for scraper in self.scrapers:
-            try:
-                articles = scraper.scrape(stock_symbol)
-                all_articles.extend(articles)
-            except Exception as e:
-                logger.error(f"Scraper failed for {stock_symbol}: {e}")
-
-        if not all_articles:
-            logger.warning(f"No news found for {stock_symbol}")
-            return None
-
-        total_score = 0
-        count = 0
-        
-        # 2. Process and Store
-        for art in all_articles:
-            # Deduplication
-            exists = self.db.query(NewsArticle).filter(NewsArticle.url == art['url']).first()
-            if not exists:
-                # Detect Language
-                lang = self.analyzer.detect_language(art['content'])
-                
-                # Analyze Sentiment
-                score = self.analyzer.analyze(art['content'], lang)
-                
-                db_art = NewsArticle(
-                    stock_symbol=stock_symbol,
-                    title=art['title'],
-                    url=art['url'],
-                    source=art['source'],
-                    content=art['content'],
-                    published_date=art['published_date'],
-                    sentiment_score=score,
-                    language=lang
-                )
-                self.db.add(db_art)
-                total_score += score
-                count += 1
-            else:
-                 # Even if exists, we might want to include it in today's calculation?
-                 # ideally we only count 'fresh' news or news within a window (e.g. 24h)
-                 # For simplicity, let's assume valid scraping only returns recent news (scraper logic needed)
-                 # But valid approach: check if 'published_date' is recent.
-                 # Let's count it if it was published today.
-                 if (datetime.utcnow() - exists.published_date).days < 1:
-                     total_score += exists.sentiment_score
-                     count += 1
-        
-        self.db.commit()
-        
-        if count > 0:
-            avg_score = total_score / count
-            
+
+        # 1. Scrape from all sources (concurrently, rate limited per domain)
+        if all_articles is None:
+            all_articles = self.engine.scrape(stock_symbol)
+
+        return self.ingest({stock_symbol: all_articles}).get(stock_symbol)
+
+    def _insert_articles(self, rows):
+        """One multi-row INSERT; rows whose url already exists are skipped (ON CONFLICT DO NOTHING)."""
+        if not rows:
+            return
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(NewsArticle).on_conflict_do_nothing(index_elements=["url"])
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(NewsArticle).on_conflict_do_nothing(index_elements=["url"])
+        else:
+            # URLs were already filtered against the table, so a plain bulk insert is enough
+            from sqlalchemy import insert
+            stmt = insert(NewsArticle)
+        self.db.execute(stmt, rows)
+
+    def ingest(self, articles_by_symbol: dict, commit: bool = True):
+        """
+        Stores scraped articles and writes one SentimentSignal per symbol.
+        {symbol: [article dicts]} -> {symbol: SentimentSignal or None}
+
+        DB round-trips don't grow with the number of articles: one IN query for the
+        known urls, one bulk insert for the new articles, one INSERT per signal, one commit.
+        """
+        now = datetime.utcnow()
+
+        # Deduplicate within the batch before touching the DB: one mention per (symbol, url).
+        # The first symbol to mention a url owns its stored row; the other symbols count it
+        # like an already stored article (NewsArticle.url is unique).
+        batch = {} # url -> (first symbol, article)
+        mentions = {} # (symbol, url), insertion ordered
+        for symbol, articles in articles_by_symbol.items():
+            if not articles:
+                logger.warning(f"No news found for {symbol}")
+            for art in articles or []:
+                url = art.get('url')
+                if not url:
+                    continue # nothing to deduplicate or store it on (e.g. Tustex rows without a link)
+                batch.setdefault(url, (symbol, art))
+                mentions.setdefault((symbol, url), None)
+
+        # 1. Resolve already stored urls with one IN query
+        existing = {}
+        if batch:
+            rows = self.db.query(NewsArticle.url, NewsArticle.published_date, NewsArticle.sentiment_score) \
+                          .filter(NewsArticle.url.in_(list(batch))).all()
+            existing = {url: (published, score) for url, published, score in rows}
+
+        # 2. Analyze new articles (one batched, cached scoring pass) and score them per symbol
+        new_articles = [(url, symbol, art) for url, (symbol, art) in batch.items() if url not in existing]
+        # Detect Language
+        langs = [self.analyzer.detect_language(art['content']) for _, _, art in new_articles]
+        # Analyze Sentiment
+        new_scores = self.analyzer.analyze_batch([art['content'] for _, _, art in new_articles], langs)
+
+        new_rows = []
+        stored = dict(existing)
+        scores = {symbol: [] for symbol in articles_by_symbol}
+        for (url, symbol, art), lang, score in zip(new_articles, langs, new_scores):
+            new_rows.append({
+                "stock_symbol": symbol,
+                "title": art['title'],
+                "url": url,
+                "source": art['source'],
+                "content": art['content'],
+                "published_date": art['published_date'],
+                "sentiment_score": score,
+                "language": lang
+            })
+            stored[url] = (art['published_date'], score)
+            scores[symbol].append(score)
+
+        for symbol, url in mentions:
+            if url not in existing and batch[url][0] == symbol:
+                continue # new article, already counted for the symbol that owns it
+            # Already stored: only count it in today's signal if it was published today
+            published, score = stored[url]
+            if published is not None and (now - published).days < 1:
+                scores[symbol].append(score)
+
+        self._insert_articles(new_rows)
+
+        # 3. One signal per symbol with fresh news
+        signals = {}
+        for symbol, values in scores.items():
+            if not values:
+                signals[symbol] = None
+                continue
+            avg_score = sum(values) / len(values)
+
             label = "neutral"
             if avg_score > 0.05: label = "positive"
             if avg_score < -0.05: label = "negative"
-            
-            signal = SentimentSignal(
-                stock_symbol=stock_symbol,
+
+            signals[symbol] = SentimentSignal(
+                stock_symbol=symbol,
                 sentiment_score=avg_score,
                 sentiment_label=label,
                 confidence=0.5 + (abs(avg_score) / 2),
-                article_count=count,
-                date=datetime.utcnow()
+                article_count=len(values),
+                date=now
             )
-            self.db.add(signal)
+
+        self.db.add_all([sig for sig in signals.values() if sig is not None])
+        if commit:
             self.db.commit()
-            return signal
-            
-        return None
+        else:
+            self.db.flush()
+        return signals
 
     def update_all_sentiments(self):
         """
@@ -105,10 +152,20 @@ class SentimentService:
         # For prototype, use a fixed list or fetch distinct symbols from somewhere
         symbols = ["SFBT", "BIAT", "SAH", "TELNET", "SOTUVER"] # Top liquid stocks
         
-        results = {}
-        for symbol in symbols:
-            signal = self.update_stock_sentiment(symbol)
-            if signal:
-                results[symbol] = signal.sentiment_label
-                
+        # Scrape every (source, symbol) pair at once; DB work stays on this thread
+        logger.info(f"Updating sentiment for {symbols}...")
+        scraped = self.engine.scrape_many(symbols)
+
+        signals = self.ingest(scraped, commit=False)
+        # Read labels before the commit expires the objects (would cost one SELECT each)
+        results = {symbol: signal.sentiment_label for symbol, signal in signals.items() if signal}
+        updates = [{
+            "symbol": symbol,
+            "score": signal.sentiment_score,
+            "label": signal.sentiment_label,
+            "article_count": signal.article_count,
+        } for symbol, signal in signals.items() if signal]
+        self.db.commit()
+        if updates:
+            event_broker.publish("sentiment", {"signals": updates})
         return results
@@ -6,6 +6,7 @@ from jose import JWTError, jwt
 
 from .. import models, schemas, auth
 from ..database import get_db
+from ..executors import run_io, run_cpu
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -29,10 +30,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     return user
 
+def _find_user(db: Session, username: str):
+    user = db.query(models.User).filter(models.User.username == username).first()
+    # Hand the connection back to the pool before the slow hash check (loaded attributes stay readable)
+    db.close()
+    return user
+
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    user = await run_io(_find_user, db, form_data.username)
+    # argon2 verification is CPU-bound: process pool, off the event loop
+    if not user or not await run_cpu(auth.verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -47,7 +55,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 @router.post("/register", response_model=schemas.Token)
 async def register_user(user_data: schemas.UserRegister, db: Session = Depends(get_db)):
     # Check if username already exists
-    existing_user = db.query(models.User).filter(models.User.username == user_data.username).first()
+    existing_user = await run_io(lambda: db.query(models.User).filter(models.User.username == user_data.username).first())
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -56,7 +64,7 @@ async def register_user(user_data: schemas.UserRegister, db: Session = Depends(g
     
     # Check if email already exists (if provided)
     if user_data.email:
-        existing_email = db.query(models.User).filter(models.User.email == user_data.email).first()
+        existing_email = await run_io(lambda: db.query(models.User).filter(models.User.email == user_data.email).first())
         if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -64,7 +72,7 @@ async def register_user(user_data: schemas.UserRegister, db: Session = Depends(g
             )
     
     # Create new user with default values
-    hashed_password = auth.get_password_hash(user_data.password)
+    hashed_password = await run_cpu(auth.get_password_hash, user_data.password)
     new_user = models.User(
         username=user_data.username,
         email=user_data.email,
@@ -75,6 +83,16 @@ async def register_user(user_data: schemas.UserRegister, db: Session = Depends(g
         initial_capital=10000.0
     )
     
+    await run_io(_create_user, db, new_user)
+    
+    # Create and return access token (auto-login)
+    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data={"sub": new_user.username}, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+def _create_user(db: Session, new_user: models.User):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
@@ -86,20 +104,13 @@ async def register_user(user_data: schemas.UserRegister, db: Session = Depends(g
     )
     db.add(default_portfolio)
     db.commit()
-    
-    # Create and return access token (auto-login)
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": new_user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=schemas.UserResponse)
 async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @router.put("/me", response_model=schemas.UserResponse)
-async def update_user_profile(profile_update: schemas.UserProfileUpdate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_user_profile(profile_update: schemas.UserProfileUpdate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if profile_update.full_name is not None:
         current_user.full_name = profile_update.full_name
     if profile_update.age is not None:
@@ -120,7 +131,7 @@ async def update_user_profile(profile_update: schemas.UserProfileUpdate, current
     return current_user
 
 @router.post("/quiz")
-async def submit_quiz(submission: schemas.QuizSubmission, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def submit_quiz(submission: schemas.QuizSubmission, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     current_user.trading_experience = submission.trading_experience
     current_user.risk_score = submission.risk_score
     
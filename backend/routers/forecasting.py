@@ -1,5 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
-from forecasting.inference.service import inference_service
+from typing import List
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from backend.database import get_db
+from backend.services import forecast_cache
 
 router = APIRouter(
     prefix="/forecast",
@@ -7,14 +11,59 @@ router = APIRouter(
 )
 
 @router.get("/predict/{ticker}")
-async def get_forecast(ticker: str):
+async def get_forecast(ticker: str, db: Session = Depends(get_db)):
     """
     Get price forecast for a specific ticker using the optimized LSTM model.
+    Served from the nightly precomputed forecasts; a miss is micro-batched with
+    the other pending requests (see forecast_batcher).
     """
     try:
-        result = inference_service.predict(ticker)
+        result = await forecast_cache.get_forecast_async(db, ticker)
         if "error" in result:
              raise HTTPException(status_code=400, detail=result["error"])
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+class BatchForecastRequest(BaseModel):
+    tickers: List[str]
+
+@router.post("/predict")
+def get_batch_forecast(request: BatchForecastRequest, db: Session = Depends(get_db)):
+    """
+    Get forecasts for several tickers with a single batched model pass.
+    Tickers that can't be forecast are returned with an "error" field.
+    """
+    if not request.tickers:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    results = forecast_cache.get_forecasts(db, request.tickers)
+    return [{"ticker": ticker, **result} for ticker, result in results.items()]
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """
+    Hit/miss counters and memory usage of the per-ticker history cache.
+    """
+    from forecasting.inference.service import get_inference_service
+    return get_inference_service().history_cache.stats()
+
+@router.get("/model")
+def get_model_info():
+    """
+    Registry version being served and its metadata: features, seq_len, training data fingerprint.
+    """
+    from forecasting.inference.service import get_inference_service
+    bundle = get_inference_service().bundle
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Model not trained")
+    return {**bundle.metadata, "version": bundle.version, "backend": bundle.backend}
+
+@router.get("/batcher/stats")
+def get_batcher_stats():
+    """
+    Micro-batching metrics: queue depth, batch size distribution, p50/p99 latency.
+    """
+    from forecasting.inference.service import get_forecast_batcher
+    return get_forecast_batcher().stats()
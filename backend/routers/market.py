@@ -18,7 +18,7 @@ class MarketIndex(BaseModel):
 
 @router.get("/indices", response_model=List[MarketIndex])
 async def get_indices():
-    scraped_data = bvmt_scraper.get_tunindex_data()
+    scraped_data = await bvmt_scraper.get_tunindex_data()
     
     val = scraped_data.get("value", 9850.50)
     chg_pct = scraped_data.get("change", 0.05)
@@ -43,7 +43,7 @@ async def get_recommendations():
 @router.get("/overview")
 async def get_market_overview():
     indices = await get_indices()
-    palmares = bvmt_scraper.get_palmares_data()
+    palmares = await bvmt_scraper.get_palmares_data()
     
     return {
         "indices": indices,
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import get_db
 from ..routers.auth import get_current_user
+from ..services.market_snapshot import market_snapshot
 import random # For mock prices
 
 router = APIRouter(
@@ -12,20 +13,28 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Mock price function - in a real app this would fetch from a market data service
+# Mock prices for common stocks, used when the market snapshot has no quote
+MOCK_PRICES = {
+    "SFBT": 14.50,
+    "BIAT": 88.00,
+    "PGH": 12.30,
+    "SAH": 8.90,
+    "TELNET": 6.50
+}
+
 def get_current_price(symbol: str) -> float:
-    # Mock prices for common stocks
-    prices = {
-        "SFBT": 14.50,
-        "BIAT": 88.00,
-        "PGH": 12.30,
-        "SAH": 8.90,
-        "TELNET": 6.50
-    }
-    return prices.get(symbol, 10.0 + random.random() * 5) # Default random price if unknown
+    quote = market_snapshot.get_quote(symbol)
+    if quote and quote["last"] > 0:
+        return quote["last"]
+    return MOCK_PRICES.get(symbol, 10.0 + random.random() * 5) # Default random price if unknown
+
+def get_current_prices(symbols: List[str]) -> dict:
+    """Last prices of all symbols from one snapshot read (same fallback as get_current_price)."""
+    prices = market_snapshot.get_prices(symbols)
+    return {s: (float(p) if p == p else get_current_price(s)) for s, p in zip(symbols, prices)}
 
 @router.get("/", response_model=schemas.PortfolioSummary)
-async def get_portfolio(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_portfolio(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     # Get user's portfolio (assuming single portfolio for now)
     portfolio = db.query(models.Portfolio).filter(models.Portfolio.user_id == current_user.id).first()
     
@@ -41,9 +50,10 @@ async def get_portfolio(current_user: models.User = Depends(get_current_user), d
     positions = []
     total_holdings_value = 0.0
     total_cost = 0.0
+    prices = get_current_prices([h.symbol for h in holdings])
     
     for holding in holdings:
-        current_price = get_current_price(holding.symbol)
+        current_price = prices[holding.symbol]
         
         # Calculate derived values
         market_value = holding.quantity * current_price
@@ -101,7 +111,7 @@ async def get_portfolio(current_user: models.User = Depends(get_current_user), d
     }
 
 @router.post("/transaction")
-async def execute_transaction(transaction: schemas.TransactionCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def execute_transaction(transaction: schemas.TransactionCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     portfolio = db.query(models.Portfolio).filter(models.Portfolio.user_id == current_user.id).first()
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from typing import List
 from pydantic import BaseModel
-from ..services import bvmt_scraper
+from ..services.market_snapshot import market_snapshot
 
 router = APIRouter(
     prefix="/stocks",
@@ -26,7 +26,8 @@ class Stock(BaseModel):
 
 @router.get("/", response_model=List[Stock])
 async def get_stocks():
-    scraped_data = bvmt_scraper.get_daily_cotations()
+    await market_snapshot.ensure_ready()
+    scraped_data = market_snapshot.all_quotes()
     stocks = []
     
     for item in scraped_data:
@@ -0,0 +1,57 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..services.event_bus import event_broker, encode_frame, TOPICS
+from ..services.market_snapshot import market_snapshot
+
+router = APIRouter(
+    prefix="/stream",
+    tags=["stream"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Full quote table as one pre-encoded frame, rebuilt only when the table changes
+_snapshot_cache = {"table": None, "frame": None}
+
+def _snapshot_frame():
+    table = market_snapshot.table
+    if _snapshot_cache["table"] is not table:
+        quotes = [table.row(i) for i in range(len(table))]
+        _snapshot_cache["frame"] = encode_frame(0, "snapshot", {"fetched_at": table.fetched_at, "quotes": quotes})
+        _snapshot_cache["table"] = table
+    return _snapshot_cache["frame"]
+
+@router.get("/events")
+async def stream_events(topics: Optional[str] = None, last_event_id: Optional[int] = Header(None)):
+    """
+    Server-sent events: `quotes` (changed rows after each refresh), `anomaly`
+    and `sentiment`. ?topics=quotes,anomaly filters; a new connection first gets
+    a `snapshot` event with the whole quote table. EventSource reconnects send
+    Last-Event-ID and resume from the broker's replay buffer.
+    """
+    wanted = TOPICS if not topics else [t.strip() for t in topics.split(",") if t.strip()]
+    unknown = [t for t in wanted if t not in TOPICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics {unknown}, expected {TOPICS}")
+
+    sub = event_broker.subscribe(wanted, last_event_id)
+
+    async def body():
+        try:
+            if last_event_id is None and "quotes" in wanted and not market_snapshot.is_empty:
+                yield _snapshot_frame()
+            async for frame in event_broker.frames(sub):
+                yield frame
+        finally:
+            event_broker.unsubscribe(sub)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no", # nginx: don't buffer the stream
+    })
+
+@router.get("/stats")
+def stream_stats():
+    return event_broker.stats()
@@ -3,12 +3,25 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from backend.database import SessionLocal
 from backend.modules.sentiment.service import SentimentService
+from backend.services import forecast_cache
+from backend.services.market_snapshot import market_snapshot
+from backend.services.bvmt_scraper import LIVE_TTL, session_open
+from backend.config import settings
+from forecasting.data.filelock import FileLock
+from datetime import datetime
+import asyncio
 import logging
+import os
+import sys
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+LEADER_RETRY_SECONDS = 30
+_leader_lock = FileLock(os.path.join(settings.RUNTIME_DIR, "scheduler.lock"))
+_election = None
+
 def update_sentiments_job():
     logger.info("Running scheduled sentiment update...")
     db = SessionLocal()
@@ -21,7 +34,69 @@ def update_sentiments_job():
     finally:
         db.close()
 
-def start_scheduler():
+def precompute_forecasts_job():
+    logger.info("Running scheduled forecast precomputation...")
+    db = SessionLocal()
+    try:
+        count = forecast_cache.precompute_forecasts(db)
+        logger.info(f"Forecast precomputation completed: {count} symbols")
+    except Exception as e:
+        logger.error(f"Forecast precomputation failed: {e}")
+    finally:
+        db.close()
+
+def scan_market_anomalies_job():
+    # The cron covers whole hours (08:00-13:55 UTC); the session closes at 13:10 UTC
+    if not session_open():
+        return
+    db = SessionLocal()
+    try:
+        from backend.modules.anomaly.scanner import scan_market
+        count = scan_market(db)
+        logger.info(f"Market anomaly scan completed: {count} new anomalies")
+    except Exception as e:
+        logger.error(f"Market anomaly scan failed: {e}")
+    finally:
+        db.close()
+
+def stream_anomalies_job():
+    # Intraday only: outside the session the quote table doesn't move
+    if not session_open():
+        return
+    db = SessionLocal()
+    try:
+        from backend.modules.anomaly.scanner import stream_tick
+        count = stream_tick(db)
+        if count:
+            logger.info(f"Streaming anomaly detection: {count} new events")
+    except Exception as e:
+        logger.error(f"Streaming anomaly tick failed: {e}")
+    finally:
+        db.close()
+
+async def refresh_market_snapshot_job():
+    try:
+        count = await market_snapshot.refresh()
+        logger.info(f"Market snapshot refreshed: {count} quotes")
+    except Exception as e:
+        logger.error(f"Market snapshot refresh failed: {e}")
+
+def check_model_update_job():
+    # Every worker has its own model: load a new models/CURRENT here, in the scheduler's
+    # thread, while requests keep being served by the old one (see InferenceService.load_artifacts)
+    # Nothing to swap until something has used the model (and importing it here would load torch)
+    service_module = sys.modules.get("forecasting.inference.service")
+    service = service_module.get_inference_service(create=False) if service_module else None
+    if service is None:
+        return # the first use picks up the current version
+    try:
+        if service.load_artifacts():
+            logger.info(f"Switched to model {service.bundle.version}")
+    except Exception as e:
+        logger.error(f"Model update check failed: {e}")
+
+def add_leader_jobs():
+    """Jobs with shared side effects (DB writes, LLM calls): run by the scheduler leader only."""
     # Schedule to run every day at 8:00 AM UTC (adjust for Tunis time if needed, typically UTC+1)
     # Tunis is UTC+1. So 8:00 AM Tunis is 7:00 AM UTC.
     # Let's set it to 7:00 UTC (8:00 Tunis)
@@ -31,5 +106,52 @@ def start_scheduler():
     # scheduler.add_job(update_sentiments_job, 'date', run_date=datetime.now() + timedelta(seconds=10)) 
     
     scheduler.add_job(update_sentiments_job, trigger, id="daily_sentiment_update", replace_existing=True)
+
+    # BVMT session closes at 14:10 Tunis time; precompute forecasts once the day's data is in.
+    # 15:30 Tunis = 14:30 UTC, trading days only.
+    forecast_trigger = CronTrigger(day_of_week="mon-fri", hour=14, minute=30)
+    scheduler.add_job(precompute_forecasts_job, forecast_trigger, id="daily_forecast_precompute", replace_existing=True)
+
+    # Whole-market anomaly scan every 5 minutes during the session (09:00-14:10 Tunis = 08:00-13:10 UTC);
+    # the job itself skips the runs after the close
+    scan_trigger = CronTrigger(day_of_week="mon-fri", hour="8-13", minute="*/5")
+    scheduler.add_job(scan_market_anomalies_job, scan_trigger, id="market_anomaly_scan", replace_existing=True,
+                      max_instances=1, coalesce=True)
+
+    # Intraday streaming detector, one tick per new quote table
+    scheduler.add_job(stream_anomalies_job, 'interval', seconds=settings.ANOMALY_STREAM_INTERVAL,
+                      id="streaming_anomaly_tick", replace_existing=True, max_instances=1, coalesce=True)
+
+async def run_leader_election():
+    """
+    With several API workers only the one holding the scheduler lock runs the
+    leader jobs. The others retry every LEADER_RETRY_SECONDS; the OS releases
+    the lock when the leader exits, so another worker takes over.
+    """
+    while not _leader_lock.acquire(blocking=False):
+        await asyncio.sleep(LEADER_RETRY_SECONDS)
+    # With a shared event log, per-worker events (quote diffs) are written by the leader only
+    from backend.services.event_bus import event_broker
+    event_broker.leader = True
+    add_leader_jobs()
+    logger.info(f"Worker {os.getpid()} is the scheduler leader.")
+
+def start_scheduler():
+    """Starts this worker's scheduler; must be called from the running event loop (app startup)."""
+    global _election
+    # Quote table for every price lookup, kept by every worker; the scraper's session-aware
+    # cache makes off-hours runs free. First run right away so the table is warm.
+    scheduler.add_job(refresh_market_snapshot_job, 'interval', seconds=LIVE_TTL, next_run_time=datetime.now(),
+                      id="market_snapshot_refresh", replace_existing=True, max_instances=1, coalesce=True)
+    scheduler.add_job(check_model_update_job, 'interval', seconds=settings.MODEL_CHECK_INTERVAL,
+                      id="model_update_check", replace_existing=True, max_instances=1, coalesce=True)
     scheduler.start()
     logger.info("Scheduler started.")
+    _election = asyncio.get_running_loop().create_task(run_leader_election())
+
+def stop_scheduler():
+    if _election is not None:
+        _election.cancel()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    _leader_lock.release()
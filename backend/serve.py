@@ -0,0 +1,35 @@
+"""
+Production launch: several uvicorn workers on one host.
+
+    python -m backend.serve --workers 4 --port 8000
+
+Every worker serves requests and keeps its own quote table; the scheduled
+jobs run once, in whichever worker holds the scheduler lock (see
+scheduler.run_leader_election). Market data and model weights are read
+through mmap, so their pages are shared by the workers. SSE events go through
+the stream_events table (EVENT_FANOUT=db) so clients of any worker receive
+them and can resume on another one.
+"""
+import argparse
+import os
+
+import uvicorn
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    # Split the cores between workers so torch and the hashing pools don't oversubscribe them
+    per_worker = str(max(1, (os.cpu_count() or 1) // args.workers))
+    os.environ.setdefault("INFERENCE_THREADS", per_worker)
+    os.environ.setdefault("CPU_WORKERS", per_worker)
+    if args.workers > 1:
+        # Anomaly / sentiment events are produced by the scheduler leader only
+        os.environ.setdefault("EVENT_FANOUT", "db")
+    uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,258 @@
-
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from backend.config import settings
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+# BVMT continuous session: 09:00 - 14:10 Tunis time (UTC+1, no DST), Monday to Friday
+TUNIS_TZ = timezone(timedelta(hours=1))
+SESSION_OPEN = (9, 0)
+SESSION_CLOSE = (14, 10)
+LIVE_TTL = 60 # seconds, while the market is open
+CLOSED_MAX_TTL = 3600 # outside session prices don't move; re-check at most hourly / at the next open
+FALLBACK_TTL = 30 # after a failed scrape, retry soon
+
+_limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+_timeout = httpx.Timeout(10.0, connect=5.0)
+
+def session_open(now=None):
+    """True while the BVMT continuous session is running."""
+    now = (now or datetime.now(TUNIS_TZ)).astimezone(TUNIS_TZ)
+    open_at = now.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+    close_at = now.replace(hour=SESSION_CLOSE[0], minute=SESSION_CLOSE[1], second=0, microsecond=0)
+    return now.weekday() < 5 and open_at <= now < close_at
+
+def session_ttl(now=None):
+    """Seconds a scraped snapshot stays fresh: LIVE_TTL in session, else until the next open (capped)."""
+    now = (now or datetime.now(TUNIS_TZ)).astimezone(TUNIS_TZ)
+    if session_open(now):
+        return LIVE_TTL
+
+    open_at = now.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+    next_open = open_at if now < open_at else open_at + timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return max(LIVE_TTL, min(CLOSED_MAX_TTL, (next_open - now).total_seconds()))
+
+def _to_float(text):
+    return text.replace(',', '.').replace('\xa0', '').replace(' ', '')
+
+def parse_daily_cotations(content):
+    """
+    Parses the IlBoursa A-Z page (bytes or str).
+    Returns list of dicts: {symbol, name, last, change_percent, volume, open, high, low}
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+    results = []
+    # Only build the tree for the quotes table
+    soup = BeautifulSoup(content, 'html.parser', parse_only=SoupStrainer('table', class_='tablesorter'))
+
+    # Find table with class 'tablesorter'
+    table = soup.find('table', class_='tablesorter')
+    if not table:
+        return results
+
+    rows = table.find_all('tr')
+    # Skip header row (index 0)
+    for row in rows[1:]:
+        cols = row.find_all('td')
+        if len(cols) >= 8:
+            try:
+                # Col 0: Name and Link (Symbol in link)
+                name_tag = cols[0].find('a')
+                if not name_tag: continue
+
+                name = name_tag.get_text(strip=True)
+                href = name_tag['href']
+                # href format: /marches/cotation_SYMBOL
+                symbol = href.split('_')[-1] if '_' in href else name[:5].upper()
+
+                # Col 1: Open
+                # Col 2: High
+                # Col 3: Low
+                # Col 4: Volume (Titres)
+                # Col 5: Volume (DT)
+                # Col 6: Last (Dernier)
+                # Col 7: Variation %
+
+                try:
+                    open_price = float(_to_float(cols[1].get_text(strip=True)) or 0)
+                    high = float(_to_float(cols[2].get_text(strip=True)) or 0)
+                    low = float(_to_float(cols[3].get_text(strip=True)) or 0)
+                    vol_titres = int(cols[4].get_text(strip=True).replace(',', '').replace('\xa0', '').replace(' ', '') or 0)
+                    last_str = _to_float(cols[6].get_text(strip=True))
+                    last = float(last_str) if last_str and '-' not in last_str else 0.0
+
+                    chg_str = _to_float(cols[7].get_text(strip=True)).replace('%', '').replace('+', '')
+                    chg = float(chg_str) if chg_str and '-' not in chg_str else 0.0
+                except ValueError:
+                    continue # Skip if main data is unparseable
+
+                results.append({
+                    "symbol": symbol,
+                    "name": name,
+                    "last": last,
+                    "change_percent": chg,
+                    "volume": vol_titres,
+                    "open": open_price,
+                    "high": high,
+                    "low": low
+                })
+            except Exception:
+                continue
+    return results
+
+def fallback_cotations():
+    # Fallback simulation if scraping fails entirely. Rows are marked so made-up quotes
+    # are never scored as market data (see QuoteTable.is_fallback)
+    return [
+        {"symbol": "SFBT", "name": "Societe Frigorifique", "last": 18.50, "change_percent": 1.2, "volume": 50000, "open": 18.3, "high": 18.6, "low": 18.3, "fallback": True},
+        {"symbol": "BIAT", "name": "Banque Internationale Arabe", "last": 90.00, "change_percent": -0.5, "volume": 1200, "open": 90.5, "high": 90.5, "low": 89.8, "fallback": True},
+        {"symbol": "SAH", "name": "Lilas", "last": 8.40, "change_percent": 0.0, "volume": 15000, "open": 8.4, "high": 8.45, "low": 8.35, "fallback": True}
+    ]
+
+class MarketDataClient:
+    """
+    IlBoursa client shared by the whole process.
+
+    - One pooled httpx.AsyncClient (keep-alive) for the async routers and one
+      httpx.Client for sync callers (services, scheduler jobs).
+    - The parsed A-Z snapshot is cached for session_ttl(): ~1 minute while BVMT
+      is open, until the next open (capped) otherwise.
+    - Single flight: concurrent callers on a stale cache await the same fetch
+      instead of each hitting IlBoursa.
+    """
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url or settings.BVMT_BASE_URL
+        self._async_client = None
+        self._client_loop = None
+        self._sync_client = None
+        self._client_lock = threading.Lock()
+
+        self._snapshot = None # parsed cotations
+        self._expires_at = 0.0
+        self._inflight = None # asyncio.Task of the running refresh
+        self._sync_lock = threading.Lock()
 
-def get_tunindex_data():
+        self.fetches = 0
+        self.cache_hits = 0
+
+    # --- clients ---------------------------------------------------------
+
+    def _get_async_client(self):
+        # The pool's connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client.is_closed or self._client_loop is not loop:
+            self._client_loop = loop
+            self._async_client = httpx.AsyncClient(base_url=self.base_url, headers=HEADERS, timeout=_timeout,
+                                                   limits=_limits, follow_redirects=True)
+        return self._async_client
+
+    def _get_sync_client(self):
+        with self._client_lock:
+            if self._sync_client is None or self._sync_client.is_closed:
+                self._sync_client = httpx.Client(base_url=self.base_url, headers=HEADERS, timeout=_timeout,
+                                                 limits=_limits, follow_redirects=True)
+            return self._sync_client
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._client_loop = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    # --- A-Z snapshot ----------------------------------------------------
+
+    def _fresh(self):
+        return self._snapshot is not None and time.monotonic() < self._expires_at
+
+    def _store(self, results):
+        if results:
+            self._snapshot = results
+            self._expires_at = time.monotonic() + session_ttl()
+        else:
+            self._snapshot = fallback_cotations()
+            self._expires_at = time.monotonic() + FALLBACK_TTL
+        return self._snapshot
+
+    async def _refresh(self):
+        self.fetches += 1
+        results = []
+        try:
+            response = await self._get_async_client().get("/marches/aaz.aspx")
+            if response.status_code == 200:
+                # Parsing is CPU bound; keep it off the event loop
+                results = await asyncio.to_thread(parse_daily_cotations, response.content)
+        except Exception as e:
+            print(f"Error scraping daily cotations: {e}")
+        return self._store(results)
+
+    async def get_daily_cotations(self):
+        if self._fresh():
+            self.cache_hits += 1
+            return self._snapshot
+
+        if self._inflight is None or self._inflight.done() or self._inflight.get_loop() is not asyncio.get_running_loop():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        # shield: a cancelled request must not cancel the fetch other callers are waiting on
+        return await asyncio.shield(self._inflight)
+
+    def get_daily_cotations_sync(self):
+        """Blocking variant for sync code (services, scheduler jobs); shares the cache."""
+        if self._fresh():
+            self.cache_hits += 1
+            return self._snapshot
+
+        with self._sync_lock:
+            if self._fresh(): # another thread refreshed while we waited
+                self.cache_hits += 1
+                return self._snapshot
+            self.fetches += 1
+            results = []
+            try:
+                response = self._get_sync_client().get("/marches/aaz.aspx")
+                if response.status_code == 200:
+                    results = parse_daily_cotations(response.content)
+            except Exception as e:
+                print(f"Error scraping daily cotations: {e}")
+            return self._store(results)
+
+    def invalidate(self):
+        self._expires_at = 0.0
+
+    def stats(self):
+        return {
+            "fetches": self.fetches,
+            "cache_hits": self.cache_hits,
+            "cached_rows": len(self._snapshot) if self._snapshot else 0,
+            "expires_in": max(0.0, round(self._expires_at - time.monotonic(), 1)),
+        }
+
+market_client = MarketDataClient()
+
+async def get_tunindex_data():
     """Scrapes TUNINDEX from IlBoursa"""
-    url = "https://www.ilboursa.com/marches/cotation_PX1"
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=5)
-        
+        response = await market_client._get_async_client().get("/marches/cotation_PX1", timeout=5)
+
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
             # Look for Variation in a th, then find the value in the row
             # Strategy: Find any cell that looks like the index value (approx 8000-10000 range)
             # This is fragile, fallback is essential.
-            
+
             # Alternative: Search for specific text structure if consistent
             # Checking "Dernier" and "Var" as found in debug
-             
+
             # Fallback for now until robust selector found, but let's try to parse if we see a clear structure
             pass
 
@@ -35,97 +269,31 @@ def get_tunindex_data():
 
 def get_daily_cotations():
     """
-    Scrapes the full A-Z market table from IlBoursa.
-    Returns list of dicts: {symbol, name, last, change_percent, volume}
+    Full A-Z market table from IlBoursa (cached, see MarketDataClient).
+    Returns list of dicts: {symbol, name, last, change_percent, volume, open, high, low}
+    Blocking: async code should await fetch_daily_cotations() instead.
     """
-    url = "https://www.ilboursa.com/marches/aaz.aspx"
-    results = []
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find table with class 'tablesorter'
-            table = soup.find('table', class_='tablesorter')
-            
-            if table:
-                rows = table.find_all('tr')
-                # Skip header row (index 0)
-                for row in rows[1:]:
-                    cols = row.find_all('td')
-                    if len(cols) >= 8:
-                        try:
-                            # Col 0: Name and Link (Symbol in link)
-                            name_tag = cols[0].find('a')
-                            if not name_tag: continue
-                            
-                            name = name_tag.get_text(strip=True)
-                            href = name_tag['href']
-                            # href format: /marches/cotation_SYMBOL
-                            symbol = href.split('_')[-1] if '_' in href else name[:5].upper()
-                            
-                            # Col 1: Open
-                            # Col 2: High
-                            # Col 3: Low
-                            # Col 4: Volume (Titres)
-                            # Col 5: Volume (DT)
-                            # Col 6: Last (Dernier)
-                            # Col 7: Variation %
-                            
-                            try:
-                                open_price = float(cols[1].get_text(strip=True).replace(',', '.').replace('\xa0', '').replace(' ', '') or 0)
-                                high = float(cols[2].get_text(strip=True).replace(',', '.').replace('\xa0', '').replace(' ', '') or 0)
-                                low = float(cols[3].get_text(strip=True).replace(',', '.').replace('\xa0', '').replace(' ', '') or 0)
-                                vol_titres = int(cols[4].get_text(strip=True).replace(',', '').replace('\xa0', '').replace(' ', '') or 0)
-                                last_str = cols[6].get_text(strip=True).replace(',', '.').replace('\xa0', '').replace(' ', '')
-                                last = float(last_str) if last_str and '-' not in last_str else 0.0
-                                
-                                chg_str = cols[7].get_text(strip=True).replace(',', '.').replace('%', '').replace('+', '').replace('\xa0', '').replace(' ', '')
-                                chg = float(chg_str) if chg_str and '-' not in chg_str else 0.0
-                            except ValueError:
-                                continue # Skip if main data is unparseable
-
-                            results.append({
-                                "symbol": symbol,
-                                "name": name,
-                                "last": last,
-                                "change_percent": chg,
-                                "volume": vol_titres,
-                                "open": open_price,
-                                "high": high,
-                                "low": low
-                            })
-                        except Exception:
-                            continue
-    except Exception as e:
-        print(f"Error scraping daily cotations: {e}")
-        
-    if not results:
-        # Fallback simulation if scraping fails entirely
-        return [
-            {"symbol": "SFBT", "name": "Societe Frigorifique", "last": 18.50, "change_percent": 1.2, "volume": 50000, "open": 18.3, "high": 18.6, "low": 18.3},
-            {"symbol": "BIAT", "name": "Banque Internationale Arabe", "last": 90.00, "change_percent": -0.5, "volume": 1200, "open": 90.5, "high": 90.5, "low": 89.8},
-            {"symbol": "SAH", "name": "Lilas", "last": 8.40, "change_percent": 0.0, "volume": 15000, "open": 8.4, "high": 8.45, "low": 8.35}
-        ]
-        
-    return results
+    return market_client.get_daily_cotations_sync()
+
+async def fetch_daily_cotations():
+    """Async get_daily_cotations for route handlers."""
+    return await market_client.get_daily_cotations()
 
-def get_palmares_data():
-    """Derived from get_daily_cotations to ensure consistency"""
-    all_stocks = get_daily_cotations()
-    
+def palmares_from_cotations(all_stocks):
     # Sort by change percent
     sorted_stocks = sorted(all_stocks, key=lambda x: x['change_percent'], reverse=True)
-    
+
     gainers = sorted_stocks[:5]
     losers = sorted_stocks[-5:]
     # Losers should be sorted ascending (worst first) which they are at the end of the desc sort
     # But for 'Top Losers' list we usually want the biggest drops first
-    losers = sorted(losers, key=lambda x: x['change_percent']) 
-    
+    losers = sorted(losers, key=lambda x: x['change_percent'])
+
     return {
         "gainers": [{"symbol": s["symbol"], "name": s["name"], "change": s["change_percent"], "price": s["last"]} for s in gainers],
         "losers": [{"symbol": s["symbol"], "name": s["name"], "change": s["change_percent"], "price": s["last"]} for s in losers]
     }
+
+async def get_palmares_data():
+    """Derived from the cached A-Z snapshot to ensure consistency (no extra page fetch)"""
+    return palmares_from_cotations(await fetch_daily_cotations())
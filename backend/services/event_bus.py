@@ -0,0 +1,237 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+TOPICS = ["quotes", "anomaly", "sentiment"]
+WORKER_TOPICS = {"quotes"} # produced by every worker on its own; with a shared log only the leader's copy is written
+QUEUE_SIZE = 256 # frames buffered per subscriber before it counts as too slow
+REPLAY_SIZE = 512 # recent frames kept for Last-Event-ID resume
+HEARTBEAT_SECONDS = 15
+EVENT_POLL_SECONDS = 0.5 # how often each worker reads new events from the shared log
+EVENT_LOG_KEEP = 5000 # rows kept in stream_events; older ones are pruned by the publisher
+
+def encode_payload(data):
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+def encode_frame(seq, topic, data=None, payload=None):
+    """One SSE frame, encoded once and shared by every subscriber."""
+    payload = payload if payload is not None else encode_payload(data)
+    return f"id: {seq}\nevent: {topic}\ndata: {payload}\n\n".encode()
+
+HEARTBEAT_FRAME = b": ping\n\n"
+
+class Subscriber:
+    def __init__(self, topics, queue_size=QUEUE_SIZE):
+        self.topics = set(topics)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+        self.connected_at = time.time()
+
+class EventLog:
+    """
+    stream_events table as the event bus between API workers (EVENT_FANOUT=db).
+    The row id is the event id, so it is the same in every worker and a
+    Last-Event-ID reconnect can land on any of them.
+    """
+
+    def __init__(self, session_factory, keep=EVENT_LOG_KEEP):
+        self.session_factory = session_factory
+        self.keep = keep
+
+    def append(self, topic, payload):
+        from sqlalchemy import delete, insert
+        from backend.models import StreamEvent
+        db = self.session_factory()
+        try:
+            seq = db.execute(insert(StreamEvent).values(topic=topic, payload=payload)).inserted_primary_key[0]
+            if seq % 100 == 0:
+                db.execute(delete(StreamEvent).where(StreamEvent.id <= seq - self.keep))
+            db.commit()
+            return seq
+        finally:
+            db.close()
+
+    def read_after(self, last_id, limit=REPLAY_SIZE):
+        """[(id, topic, payload)] of the events after last_id, oldest first."""
+        from backend.models import StreamEvent
+        db = self.session_factory()
+        try:
+            return db.query(StreamEvent.id, StreamEvent.topic, StreamEvent.payload) \
+                     .filter(StreamEvent.id > last_id).order_by(StreamEvent.id).limit(limit).all()
+        finally:
+            db.close()
+
+    def last_id(self):
+        from sqlalchemy import func
+        from backend.models import StreamEvent
+        db = self.session_factory()
+        try:
+            return db.query(func.max(StreamEvent.id)).scalar() or 0
+        finally:
+            db.close()
+
+class EventBroker:
+    """
+    One producer, many SSE subscribers.
+
+    publish() builds the frame bytes once; each subscriber queue gets a
+    reference to the same bytes object (no per-client copy or re-encoding).
+    Queues are bounded: a subscriber whose queue is full is dropped instead of
+    buffering without limit, and its stream ends. The browser's EventSource
+    reconnects with Last-Event-ID and catches up from the replay buffer.
+
+    Subscribers live on the event loop; publish() may be called from any
+    thread (scheduler jobs run in a thread pool) and hops onto the loop.
+
+    With several workers (use_log), publish() only appends to the shared
+    EventLog and every worker's follow() task fans the log out to its own
+    subscribers, so an event reaches SSE clients whichever worker produced it
+    or serves them. WORKER_TOPICS are written by the scheduler leader only.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, replay_size=REPLAY_SIZE):
+        self.queue_size = queue_size
+        self._by_topic = {t: set() for t in TOPICS}
+        self._replay = deque(maxlen=replay_size) # (seq, topic, frame)
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._loop = None
+        self._log = None
+        self.leader = True # single process: it is the only producer
+        self.published = 0
+        self.dropped = 0
+
+    def bind(self, loop=None):
+        self._loop = loop or asyncio.get_running_loop()
+
+    def use_log(self, log):
+        """Multi-worker mode: events go through `log`; run follow() on the loop."""
+        self._log = log
+        self.leader = False # until this worker wins the scheduler lock (see scheduler.run_leader_election)
+
+    # --- subscribers (event loop) ----------------------------------------
+
+    def subscribe(self, topics=None, last_event_id=None):
+        if self._loop is None:
+            self.bind()
+        sub = Subscriber(topics or TOPICS, self.queue_size)
+        if last_event_id is not None:
+            for seq, topic, frame in self._replay:
+                if seq > last_event_id and topic in sub.topics and not sub.queue.full():
+                    sub.queue.put_nowait(frame)
+        for t in sub.topics:
+            self._by_topic.setdefault(t, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        for t in sub.topics:
+            self._by_topic.get(t, set()).discard(sub)
+
+    async def frames(self, sub, heartbeat=HEARTBEAT_SECONDS):
+        """Frames for one subscriber, with a comment heartbeat to keep proxies from closing idle streams."""
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_FRAME
+                    continue
+                if frame is None: # dropped for being too slow
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(sub)
+
+    # --- producers (any thread) ------------------------------------------
+
+    def publish(self, topic, data):
+        if self._log is not None:
+            return self._publish_to_log(topic, data)
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        frame = encode_frame(seq, topic, data)
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return seq
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(seq, topic, frame)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, seq, topic, frame)
+        return seq
+
+    def _publish_to_log(self, topic, data):
+        if topic in WORKER_TOPICS and not self.leader:
+            return None
+        payload = encode_payload(data)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._append(topic, payload) # scheduler thread: blocking is fine here
+        # On the event loop: the insert runs on the I/O pool, follow() delivers it
+        from backend.executors import get_io_pool
+        get_io_pool().submit(self._append, topic, payload)
+        return None
+
+    def _append(self, topic, payload):
+        # Like a local publish, a failed one must not fail the job that produced the event
+        try:
+            return self._log.append(topic, payload)
+        except Exception as e:
+            print(f"Event log write failed ({topic}): {e}")
+            return None
+
+    async def follow(self, interval=EVENT_POLL_SECONDS):
+        """Multi-worker mode: delivers the shared log's new events to this worker's subscribers."""
+        from backend.executors import run_io
+        last = await run_io(self._log.last_id)
+        # Recent history, so a Last-Event-ID reconnect to this worker can resume
+        for seq, topic, payload in await run_io(self._log.read_after, max(0, last - REPLAY_SIZE)):
+            self._replay.append((seq, topic, encode_frame(seq, topic, payload=payload)))
+        self._seq = last
+        while True:
+            try:
+                rows = await run_io(self._log.read_after, last)
+            except Exception as e:
+                print(f"Event log read failed: {e}")
+                rows = []
+            for seq, topic, payload in rows:
+                self._fan_out(seq, topic, encode_frame(seq, topic, payload=payload))
+                last = self._seq = seq
+            await asyncio.sleep(interval)
+
+    def _fan_out(self, seq, topic, frame):
+        self._replay.append((seq, topic, frame))
+        self.published += 1
+        for sub in list(self._by_topic.get(topic, ())):
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub):
+        self.unsubscribe(sub)
+        sub.dropped = True
+        self.dropped += 1
+        # Make room for the end-of-stream marker
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def stats(self):
+        return {
+            "subscribers": {t: len(subs) for t, subs in self._by_topic.items()},
+            "published": self.published,
+            "dropped_slow_subscribers": self.dropped,
+            "last_event_id": self._seq,
+            "fanout": "db" if self._log is not None else "local",
+        }
+
+event_broker = EventBroker()
@@ -0,0 +1,158 @@
+from datetime import date, datetime
+from sqlalchemy.orm import Session
+
+from backend.models import ForecastResult
+from forecasting.symbol_mapping import SYMBOL_TO_ISIN
+
+def _inference():
+    # Imported on first use, so torch and the model load stay out of API startup
+    from forecasting.inference.service import get_inference_service
+    return get_inference_service()
+
+def _batcher():
+    from forecasting.inference.service import get_forecast_batcher
+    return get_forecast_batcher()
+
+def _current_key():
+    """(session_date, model_version) that precomputed rows must match to be served."""
+    inference_service = _inference()
+    inference_service.refresh_data()
+    session = inference_service.store.latest_session
+    if inference_service.model is None:
+        inference_service.load_artifacts()
+    if session is None or inference_service.model_version is None:
+        return None, None
+    return date.fromisoformat(session), inference_service.model_version
+
+def _row_to_result(row: ForecastResult):
+    return {
+        "ticker": row.stock_symbol,
+        "current_price": row.current_price,
+        "prediction_t1": row.prediction_t1,
+        "log_return_t1": row.log_return_t1,
+        "log_return_t5": row.log_return_t5,
+        "as_of": row.as_of.isoformat() if row.as_of else None,
+        "model_version": row.model_version
+    }
+
+LOOKUP_COLUMNS = ["stock_symbol", "session_date", "model_version"] # ix_forecast_results_lookup
+VALUE_COLUMNS = ["as_of", "current_price", "prediction_t1", "log_return_t1", "log_return_t5", "created_at"]
+
+def _store_results(db: Session, session_date, model_version, results: dict):
+    """
+    Upserts the rows of (symbol, session_date, model_version) with fresh results.
+    Concurrent misses on the same ticker (get_forecast_async) may store the same
+    key at once: the insert resolves the conflict on the lookup index instead of
+    failing with a unique violation.
+    """
+    rows = []
+    now = datetime.utcnow()
+    for symbol, res in results.items():
+        # A hot-swap between the key lookup and the forward pass: not this key's model
+        if "error" in res or res.get("model_version", model_version) != model_version:
+            continue
+        rows.append({
+            "stock_symbol": symbol,
+            "session_date": session_date,
+            "as_of": date.fromisoformat(res["as_of"]) if res.get("as_of") else None,
+            "model_version": model_version,
+            "current_price": res["current_price"],
+            "prediction_t1": res["prediction_t1"],
+            "log_return_t1": res["log_return_t1"],
+            "log_return_t5": res["log_return_t5"],
+            "created_at": now
+        })
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(ForecastResult)
+        stmt = stmt.on_conflict_do_update(index_elements=LOOKUP_COLUMNS,
+                                          set_={c: stmt.excluded[c] for c in VALUE_COLUMNS})
+        db.execute(stmt, rows)
+        db.commit()
+        return len(rows)
+
+    from sqlalchemy import insert
+    from sqlalchemy.exc import IntegrityError
+    db.query(ForecastResult).filter(
+        ForecastResult.session_date == session_date,
+        ForecastResult.model_version == model_version,
+        ForecastResult.stock_symbol.in_([r["stock_symbol"] for r in rows])
+    ).delete(synchronize_session=False)
+    try:
+        db.execute(insert(ForecastResult), rows)
+        db.commit()
+    except IntegrityError:
+        # Another request stored the same key first; its rows are as fresh as ours
+        db.rollback()
+        return 0
+    return len(rows)
+
+def precompute_forecasts(db: Session):
+    """
+    Runs the model once for every symbol in SYMBOL_TO_ISIN and materializes the results.
+    Returns the number of stored forecasts.
+    """
+    session_date, model_version = _current_key()
+    if session_date is None:
+        return 0
+    results = _inference().predict_many(list(SYMBOL_TO_ISIN))
+    return _store_results(db, session_date, model_version, results)
+
+def _lookup(db: Session, symbols):
+    """(stored results by upper-case key, missing keys, session_date, model_version)."""
+    session_date, model_version = _current_key()
+    keys = list(dict.fromkeys(s.upper() for s in symbols))
+    if session_date is None:
+        return {}, keys, None, None
+    rows = db.query(ForecastResult).filter(
+        ForecastResult.stock_symbol.in_(keys),
+        ForecastResult.session_date == session_date,
+        ForecastResult.model_version == model_version
+    ).all()
+    results = {row.stock_symbol: _row_to_result(row) for row in rows}
+    return results, [key for key in keys if key not in results], session_date, model_version
+
+def get_forecasts(db: Session, symbols):
+    """
+    Returns {symbol: forecast} for the latest session, served from forecast_results.
+    Misses fall back to one batched live inference whose results are stored for next time.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    results, missing, session_date, model_version = _lookup(db, symbols)
+    if session_date is None:
+        return _inference().predict_many(symbols)
+
+    if missing:
+        live = _inference().predict_many(missing)
+        _store_results(db, session_date, model_version, live)
+        results.update(live)
+
+    return {s: results[s.upper()] for s in symbols}
+
+def get_forecast(db: Session, symbol: str):
+    return get_forecasts(db, [symbol])[symbol]
+
+async def get_forecast_async(db: Session, symbol: str):
+    """
+    get_forecast for the event loop: a miss is queued on forecast_batcher, so
+    concurrent requests share one forward pass and torch never runs on the loop.
+    The DB lookup / write and the first-use imports and model load (which can
+    also rebuild the store) run on the I/O threads.
+    """
+    from backend.executors import run_io
+    results, missing, session_date, model_version = await run_io(_lookup, db, [symbol])
+    if not missing:
+        return results[symbol.upper()]
+
+    batcher = await run_io(_batcher)
+    result = await batcher.predict(missing[0])
+    if session_date is not None and "error" not in result:
+        await run_io(_store_results, db, session_date, model_version, {missing[0]: result})
+    return result
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import numpy as np
+
+from backend.services import bvmt_scraper
+from backend.services.event_bus import event_broker
+
+# Numeric quote fields, in column order of QuoteTable.values
+QUOTE_FIELDS = ["last", "change_percent", "volume", "open", "high", "low"]
+
+class QuoteTable:
+    """
+    Immutable quote table: one float64 (n, len(QUOTE_FIELDS)) matrix plus a
+    symbol -> row index dict. Built once per refresh, then only read.
+    is_fallback: built from bvmt_scraper.fallback_cotations() after a failed
+    scrape; fine to display, never to score.
+    """
+
+    def __init__(self, cotations, fetched_at):
+        self.symbols = [q["symbol"].upper() for q in cotations]
+        self.names = [q["name"] for q in cotations]
+        self.values = np.array([[q.get(f, 0) or 0 for f in QUOTE_FIELDS] for q in cotations],
+                               dtype=np.float64).reshape(-1, len(QUOTE_FIELDS))
+        # Last occurrence wins if the page lists a symbol twice
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.fetched_at = fetched_at
+        self.is_fallback = bool(cotations) and all(q.get("fallback") for q in cotations)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def row(self, i):
+        v = self.values[i]
+        quote = {"symbol": self.symbols[i], "name": self.names[i]}
+        for f, x in zip(QUOTE_FIELDS, v.tolist()):
+            quote[f] = x
+        quote["volume"] = int(quote["volume"])
+        return quote
+
+def quote_diff(prev: QuoteTable, table: QuoteTable):
+    """Rows of table that are new or changed since prev, as quote dicts."""
+    if len(table) == 0:
+        return []
+    rows = np.array([prev.index.get(s, -1) for s in table.symbols], dtype=np.int64)
+    known = rows >= 0
+    changed = ~known
+    if len(prev):
+        changed[known] = (prev.values[rows[known]] != table.values[known]).any(axis=1)
+    return [table.row(i) for i in np.flatnonzero(changed)]
+
+class MarketSnapshot:
+    """
+    Latest BVMT quote table shared by every price lookup (stock list,
+    portfolio valuation, anomaly checks).
+
+    refresh() is run by the scheduler; readers never scrape, they only look
+    symbols up in the current table (O(1) dict + row access). A refresh builds
+    a new QuoteTable and swaps the reference, so readers never see a half
+    updated table.
+    """
+
+    def __init__(self):
+        self._table = QuoteTable([], None)
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+
+    @property
+    def table(self):
+        return self._table
+
+    @property
+    def is_empty(self):
+        return len(self._table) == 0
+
+    def _swap(self, cotations):
+        table = QuoteTable(cotations, time.time())
+        prev, self._table = self._table, table
+        self.refreshes += 1
+
+        # Push only what moved to the SSE subscribers
+        changed = quote_diff(prev, table)
+        if changed:
+            event_broker.publish("quotes", {"fetched_at": table.fetched_at, "quotes": changed})
+        return len(table)
+
+    async def refresh(self):
+        """Pulls the (cached, single-flight) A-Z snapshot and swaps in a new table."""
+        cotations = await bvmt_scraper.fetch_daily_cotations()
+        return self._swap(cotations)
+
+    def refresh_sync(self):
+        with self._refresh_lock:
+            return self._swap(bvmt_scraper.get_daily_cotations())
+
+    async def ensure_ready(self):
+        """First-request warm up if the scheduled refresh hasn't run yet."""
+        if self.is_empty:
+            await self.refresh()
+
+    def get_quote(self, symbol):
+        """Quote dict {symbol, name, last, change_percent, volume, open, high, low} or None."""
+        table = self._table
+        i = table.index.get(symbol.upper())
+        return None if i is None else table.row(i)
+
+    def get_quotes(self, symbols):
+        """{symbol: quote} for the known symbols, keyed as passed in."""
+        table = self._table
+        out = {}
+        for s in symbols:
+            i = table.index.get(s.upper())
+            if i is not None:
+                out[s] = table.row(i)
+        return out
+
+    def get_prices(self, symbols):
+        """Last prices as a float64 array aligned with symbols (NaN if unknown or not traded)."""
+        table = self._table
+        idx = np.array([table.index.get(s.upper(), -1) for s in symbols], dtype=np.int64)
+        prices = np.full(len(symbols), np.nan)
+        known = idx >= 0
+        prices[known] = table.values[idx[known], QUOTE_FIELDS.index("last")]
+        prices[prices <= 0] = np.nan
+        return prices
+
+    def all_quotes(self):
+        table = self._table
+        return [table.row(i) for i in range(len(table))]
+
+    def stats(self):
+        table = self._table
+        return {
+            "symbols": len(table),
+            "refreshes": self.refreshes,
+            "is_fallback": table.is_fallback,
+            "age_seconds": round(time.time() - table.fetched_at, 1) if table.fetched_at else None,
+        }
+
+market_snapshot = MarketSnapshot()
@@ -0,0 +1,111 @@
+"""
+200 parallel clients against the ASGI app (httpx.ASGITransport, one event loop):
+a few of them log in (argon2 verification) while the others call a cheap
+endpoint. Compares the previous inline login handler with the current one
+(hash in the process pool, DB on the I/O threads). Reports throughput and the
+latency of the cheap requests, which is what a blocked event loop hurts.
+With more concurrent logins than DB pool connections (5 + 10 overflow) the
+inline handler can stall the loop on a pool checkout; those show up as errors.
+
+    python -m benchmarks.bench_api_concurrency [clients] [logins]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+
+from backend import auth, executors, models
+from backend.database import Base, SessionLocal, engine, get_db
+from backend.routers import auth as auth_router
+
+PASSWORD = "bench-password"
+
+def legacy_app():
+    """The login handler as it was: DB query and argon2 verify inline on the event loop."""
+    app = FastAPI()
+
+    @app.post("/auth/token")
+    async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+        user = db.query(models.User).filter(models.User.username == form_data.username).first()
+        if not user or not auth.verify_password(form_data.password, user.hashed_password):
+            raise HTTPException(status_code=401)
+        return {"access_token": auth.create_access_token(data={"sub": user.username}), "token_type": "bearer"}
+
+    add_cheap(app)
+    return app
+
+def current_app():
+    app = FastAPI()
+    app.include_router(auth_router.router)
+    add_cheap(app)
+    return app
+
+def add_cheap(app):
+    @app.get("/health")
+    def health_check():
+        return {"status": "ok"}
+
+def seed_users(n):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if db.query(models.User).count() < n:
+        hashed = auth.get_password_hash(PASSWORD)
+        db.add_all(models.User(username=f"user{i}", hashed_password=hashed) for i in range(n))
+        db.commit()
+    db.close()
+
+async def run(app, n_clients, n_logins, cheap_per_client=5):
+    cheap_latencies = []
+    login_errors = [0]
+
+    async def login_client(i):
+        r = await http.post("/auth/token", data={"username": f"user{i}", "password": PASSWORD})
+        login_errors[0] += r.status_code != 200
+
+    async def cheap_client():
+        for _ in range(cheap_per_client):
+            t = time.perf_counter()
+            await http.get("/health")
+            cheap_latencies.append(time.perf_counter() - t)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://bench") as http:
+        start = time.perf_counter()
+        await asyncio.gather(*[login_client(i) for i in range(n_logins)],
+                             *[cheap_client() for _ in range(n_clients - n_logins)])
+        elapsed = time.perf_counter() - start
+
+    cheap_latencies.sort()
+    requests = n_logins + (n_clients - n_logins) * cheap_per_client
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "req_per_s": round(requests / elapsed),
+        "cheap_p50_ms": round(cheap_latencies[len(cheap_latencies) // 2] * 1000, 1),
+        "cheap_p99_ms": round(cheap_latencies[int(len(cheap_latencies) * 0.99)] * 1000, 1),
+        "login_errors": login_errors[0],
+    }
+
+if __name__ == "__main__":
+    n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_logins = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    seed_users(n_logins)
+
+    async def configured(app):
+        executors.configure()
+        return await run(app, n_clients, n_logins)
+
+    executors.warm_up()
+    print(f"{n_clients} clients, {n_logins} logins, {executors.cpu_workers()} CPU worker(s), {os.cpu_count()} core(s)")
+    print("inline (before):   ", asyncio.run(configured(legacy_app())))
+    print("executors (after): ", asyncio.run(configured(current_app())))
+    executors.shutdown()
@@ -0,0 +1,49 @@
+"""
+Serial vs process-pool feature engineering on a synthetic market.
+
+    python -m benchmarks.bench_feature_engineering [n_tickers] [n_years] [workers]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecasting.sequences.creation import compute_ticker_features
+
+def synthetic_market(n_tickers=80, n_years=5, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=252 * n_years)
+    frames = []
+    for k in range(n_tickers):
+        closes = 10 * np.exp(np.cumsum(rng.normal(0, 0.015, len(dates))))
+        frames.append(pd.DataFrame({
+            "CODE": f"TN{k:010d}",
+            "SEANCE": dates,
+            "CLOTURE": closes,
+            "QUANTITE_NEGOCIEE": rng.integers(0, 20000, len(dates)).astype(float),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 80
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+
+    df = synthetic_market(n_tickers, n_years)
+    print(f"{n_tickers} tickers x {n_years} years = {len(df)} rows")
+
+    serial, t_serial = timed(compute_ticker_features, df, n_workers=1)
+    parallel, t_parallel = timed(compute_ticker_features, df, n_workers=workers)
+
+    assert len(serial) == len(parallel)
+    assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(serial, parallel))
+
+    print(f"serial:              {t_serial:.2f}s")
+    print(f"process pool ({workers:>2}):   {t_parallel:.2f}s  (x{t_serial / t_parallel:.2f})")
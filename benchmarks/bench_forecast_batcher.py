@@ -0,0 +1,89 @@
+"""
+Concurrent single-ticker forecasts through MicroBatcher: one forward pass per
+request (max_batch_size=1) vs dynamic micro-batches, using the exported model
+on random windows so only the batching differs. Before timing, checks that a
+caller cancelled while queued (client disconnect) and a batch whose resolution
+fails neither stall the other callers nor kill the worker thread.
+
+    python -m benchmarks.bench_forecast_batcher [n_requests] [max_wait_ms]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import torch
+
+from forecasting import export
+from forecasting.registry import ModelRegistry
+from forecasting.inference.batcher import MicroBatcher
+
+warnings.filterwarnings("ignore", category=FutureWarning) # torch.jit deprecation notices
+
+def model_predict_many():
+    registry = ModelRegistry(os.path.join(os.path.dirname(export.__file__), "artifacts"))
+    model_path = os.path.join(registry.path(registry.resolve()), export.MODEL_FILE)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = export.load_torchscript(export.export_torchscript(model_path, os.path.join(tmp, "model.ts")))
+    windows = torch.randn(512, export.SEQ_LEN, export.INPUT_DIM)
+
+    def predict_many(tickers):
+        idx = [int(t[1:]) % len(windows) for t in tickers]
+        with torch.no_grad():
+            preds = model(windows[idx]).numpy()
+        return {t: {"ticker": t, "log_return_t1": float(p[0]), "log_return_t5": float(p[1])} for t, p in zip(tickers, preds)}
+    return predict_many
+
+async def check_resilience():
+    def slow_predict_many(tickers):
+        time.sleep(0.05)
+        return {t: {"ticker": t} for t in tickers}
+
+    # A is cancelled while its batch waits: B still gets its result, the worker lives on
+    batcher = MicroBatcher(slow_predict_many, max_wait_ms=20)
+    a = asyncio.ensure_future(batcher.predict("A"))
+    b = asyncio.ensure_future(batcher.predict("B"))
+    await asyncio.sleep(0.005)
+    a.cancel()
+    assert (await asyncio.wait_for(b, 5))["ticker"] == "B"
+    assert a.cancelled()
+    assert (await asyncio.wait_for(batcher.predict("C"), 5))["ticker"] == "C"
+    assert batcher._worker.is_alive()
+
+    # results without .get(): the error reaches the callers, the next batch still runs
+    broken = MicroBatcher(lambda tickers: None, max_wait_ms=0)
+    try:
+        await asyncio.wait_for(broken.predict("D"), 5)
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("expected the batch error")
+    assert broken._worker.is_alive()
+    print("cancelled callers and failing batches: OK")
+
+async def run(batcher, n_requests):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(batcher.predict(f"T{i}") for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    assert all(r["ticker"] == f"T{i}" for i, r in enumerate(results))
+    return elapsed
+
+if __name__ == "__main__":
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    max_wait_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(check_resilience())
+    predict_many = model_predict_many()
+
+    for label, batcher in [
+        ("one pass per request", MicroBatcher(predict_many, max_batch_size=1, max_wait_ms=0)),
+        (f"micro-batched (<=64, {max_wait_ms:g} ms)", MicroBatcher(predict_many, max_wait_ms=max_wait_ms)),
+    ]:
+        asyncio.run(run(batcher, 16)) # warm-up
+        batcher.latencies.clear()
+        elapsed = asyncio.run(run(batcher, n_requests))
+        stats = batcher.stats()
+        print(f"{label}: {n_requests} requests in {elapsed:.2f}s ({n_requests / elapsed:.0f} req/s), "
+              f"p50 {stats['latency_ms']['p50']} ms, p99 {stats['latency_ms']['p99']} ms, "
+              f"mean batch {stats['mean_batch_size']}")
@@ -0,0 +1,80 @@
+"""
+Incremental indicator engine against the batch add_technical_indicators.
+
+Parity: on a clean series and on series with zero closes, missing closes and
+missing volumes, the engine (first half at once, then one bar at a time) must
+produce the same rows as the batch path, dropna included.
+Timing: one new bar per call, incremental vs recomputing the full history.
+
+    python -m benchmarks.bench_incremental_indicators [n_bars]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecasting.features.engineering import add_technical_indicators
+from forecasting.features.incremental import INDICATOR_COLUMNS, IncrementalIndicatorEngine
+
+def synthetic_series(n, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 20 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    volumes = rng.integers(0, 20000, n).astype(float)
+    volumes[rng.random(n) < 0.1] = 0 # no-trade days
+    return pd.DataFrame({
+        "CODE": "TEST",
+        "SEANCE": pd.bdate_range("2022-01-03", periods=n),
+        "CLOTURE": closes,
+        "QUANTITE_NEGOCIEE": volumes,
+    })
+
+def incremental_rows(df, split):
+    engine = IncrementalIndicatorEngine(history=len(df))
+    features, _, _ = engine.update("TEST", df.iloc[:split])
+    for i in range(split + 1, len(df) + 1):
+        features, _, _ = engine.update("TEST", df.iloc[:i])
+    return features
+
+def check_parity(label, df):
+    with np.errstate(divide="ignore", invalid="ignore"): # log of a zero close
+        batch = add_technical_indicators(df)[INDICATOR_COLUMNS].values
+    incremental = incremental_rows(df, len(df) // 2)
+    assert incremental.shape == batch.shape, (label, incremental.shape, batch.shape)
+    assert np.array_equal(np.isinf(incremental), np.isinf(batch)), label
+    finite = np.isfinite(batch)
+    max_err = np.max(np.abs(incremental[finite] - batch[finite]) / (np.abs(batch[finite]) + 1.0))
+    assert max_err < 1e-8, (label, max_err)
+    print(f"{label:>16}: {len(batch)} rows, max relative error {max_err:.2e}")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    df = synthetic_series(n)
+
+    check_parity("clean", df)
+
+    zero_close = df.copy()
+    zero_close.loc[[60, 61, n - 40], "CLOTURE"] = 0.0 # log return -inf, then +inf/NaN
+    check_parity("zero closes", zero_close)
+
+    missing = df.copy()
+    missing.loc[[80, n // 2 + 10], "CLOTURE"] = np.nan
+    missing.loc[[120, n // 2 + 30], "QUANTITE_NEGOCIEE"] = np.nan
+    check_parity("missing values", missing)
+
+    # One new bar per call over the last 100 bars
+    tail = range(n - 100, n + 1)
+    start = time.perf_counter()
+    for i in tail:
+        add_technical_indicators(df.iloc[:i])
+    t_batch = (time.perf_counter() - start) / len(tail)
+
+    engine = IncrementalIndicatorEngine(history=60)
+    engine.update("TEST", df.iloc[:n - 101])
+    start = time.perf_counter()
+    for i in tail:
+        engine.update("TEST", df.iloc[:i])
+    t_incremental = (time.perf_counter() - start) / len(tail)
+
+    print(f"full recompute: {t_batch * 1000:.2f} ms/bar")
+    print(f"incremental:    {t_incremental * 1000:.2f} ms/bar  (x{t_batch / t_incremental:.1f})")
@@ -0,0 +1,148 @@
+"""
+Pooled, single-flight MarketDataClient against a local stub of the IlBoursa
+A-Z page (fixed latency per request), no network needed.
+
+Checks: concurrent callers on a cold cache share one upstream request, later
+calls are served from the cache, the sync variant shares that cache, refreshes
+reuse one keep-alive connection, a cancelled caller doesn't cancel the fetch
+the others wait on, and an upstream error falls back for FALLBACK_TTL only.
+Timing: n concurrent callers vs one uncached request each (the old per-call
+requests.get behaviour).
+
+    python -m benchmarks.bench_market_client [n_callers] [latency_ms]
+"""
+import asyncio
+import http.server
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+import httpx
+
+from backend.services import bvmt_scraper
+from backend.services.bvmt_scraper import FALLBACK_TTL, MarketDataClient, fallback_cotations
+
+N_ROWS = 80
+ROWS = "".join(
+    f'<tr><td><a href="/marches/cotation_SYM{i}">Name {i}</a></td><td>1{i},5</td><td>1{i},9</td><td>1{i},1</td>'
+    f'<td>1 2{i}</td><td>100</td><td>1{i},7</td><td>{"+" if i % 2 else ""}{i % 3},5%</td></tr>'
+    for i in range(N_ROWS))
+PAGE = f"<html><body><div>junk</div><table class='tablesorter'><tr><th>h</th></tr>{ROWS}</table></body></html>".encode()
+
+class StubUpstream(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, so connection reuse is visible
+    latency = 0.2
+    status = 200
+    requests = 0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubUpstream.connections += 1
+
+    def do_GET(self):
+        StubUpstream.requests += 1
+        time.sleep(self.latency)
+        body = PAGE if self.status == 200 else b"error"
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def reset_counters():
+    StubUpstream.requests = 0
+    StubUpstream.connections = 0
+
+async def check_async(base_url, n_callers):
+    client = MarketDataClient(base_url)
+    reset_counters()
+
+    # Cold cache: every caller awaits the same fetch
+    start = time.perf_counter()
+    results = await asyncio.gather(*[client.get_daily_cotations() for _ in range(n_callers)])
+    t_pooled = time.perf_counter() - start
+    assert StubUpstream.requests == 1, StubUpstream.requests
+    assert all(r is results[0] for r in results)
+    assert len(results[0]) == N_ROWS
+    assert results[0][1] == {"symbol": "SYM1", "name": "Name 1", "last": 11.7, "change_percent": 1.5,
+                             "volume": 121, "open": 11.5, "high": 11.9, "low": 11.1}, results[0][1]
+
+    # Warm cache: no upstream request
+    await asyncio.gather(*[client.get_daily_cotations() for _ in range(n_callers)])
+    assert StubUpstream.requests == 1
+    assert client.cache_hits == n_callers
+
+    # Refreshes go over the same keep-alive connection
+    for _ in range(3):
+        client.invalidate()
+        await client.get_daily_cotations()
+    assert StubUpstream.requests == 4
+    assert StubUpstream.connections == 1, StubUpstream.connections
+
+    # A cancelled caller must not cancel the fetch shared with the others
+    client.invalidate()
+    first = asyncio.ensure_future(client.get_daily_cotations())
+    others = asyncio.gather(*[client.get_daily_cotations() for _ in range(3)])
+    await asyncio.sleep(StubUpstream.latency / 4)
+    first.cancel()
+    assert len(await others) == 3
+    assert StubUpstream.requests == 5
+
+    # Upstream error: fallback rows, retried after FALLBACK_TTL rather than the session TTL
+    StubUpstream.status = 500
+    client.invalidate()
+    assert await client.get_daily_cotations() == fallback_cotations()
+    assert client.stats()["expires_in"] <= FALLBACK_TTL
+    StubUpstream.status = 200
+
+    # Sync callers share the async cache
+    client.invalidate()
+    await client.get_daily_cotations()
+    requests_before = StubUpstream.requests
+    assert len(await asyncio.to_thread(client.get_daily_cotations_sync)) == N_ROWS
+    assert StubUpstream.requests == requests_before
+
+    await client.aclose()
+    return t_pooled
+
+async def unpooled(base_url, n_callers):
+    """One fresh connection and request per caller, from worker threads, as the old per-call requests.get did."""
+    def fetch():
+        response = httpx.get(f"{base_url}/marches/aaz.aspx", headers=bvmt_scraper.HEADERS, timeout=30)
+        return bvmt_scraper.parse_daily_cotations(response.content)
+
+    reset_counters()
+    start = time.perf_counter()
+    results = await asyncio.gather(*[asyncio.to_thread(fetch) for _ in range(n_callers)])
+    elapsed = time.perf_counter() - start
+    assert StubUpstream.requests == n_callers
+    assert all(len(r) == N_ROWS for r in results)
+    return elapsed
+
+if __name__ == "__main__":
+    n_callers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    StubUpstream.latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 200) / 1000
+    server, base_url = serve()
+
+    t_pooled = asyncio.run(check_async(base_url, n_callers))
+    print("single flight, cache, keep-alive, cancellation, fallback and sync sharing: OK")
+    t_unpooled = asyncio.run(unpooled(base_url, n_callers))
+
+    print(f"{n_callers} concurrent callers, {StubUpstream.latency * 1000:.0f} ms upstream latency")
+    print(f"  one request per caller: {t_unpooled:.2f}s ({n_callers} upstream requests)")
+    print(f"  MarketDataClient:       {t_pooled:.2f}s (1 upstream request)")
+    server.shutdown()
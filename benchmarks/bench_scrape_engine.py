@@ -0,0 +1,107 @@
+"""
+ScrapeEngine with the per-domain DomainRateLimiter against local stub news
+sites (one port = one domain, each with its own response latency), no network
+needed.
+
+Checks: the engine returns the same articles as the serial loop; on every
+domain a request starts only after the previous response completed plus
+min_delay, even when responses are slower than the gap; the total wall time
+stays within the busiest domain's budget instead of the sum of all requests.
+
+    python -m benchmarks.bench_scrape_engine [n_symbols]
+"""
+import http.server
+import sys
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from backend.modules.sentiment.scraper import BaseScraper, DomainRateLimiter, ScrapeEngine
+
+LATENCIES = [0.3, 0.05, 0.1, 0.15] # the first domain responds slower than the gap
+MIN_DELAY, MAX_DELAY = 0.1, 0.2
+SLACK = 0.02
+
+class StubSite(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.1
+    log = None # [(path, start, end)], one list per server class
+
+    def do_GET(self):
+        start = time.monotonic()
+        time.sleep(self.latency)
+        symbol = self.path.rsplit("/", 1)[-1]
+        body = (f"<html><body><a href='/news/{symbol}-1'>{symbol} publie ses resultats annuels en hausse</a>"
+                f"<a href='/news/{symbol}-2'>{symbol} annonce la distribution d'un dividende</a></body></html>").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+        self.log.append((self.path, start, time.monotonic()))
+
+    def log_message(self, *args):
+        pass
+
+def serve(latency):
+    handler = type("Site", (StubSite,), {"latency": latency, "log": []})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler
+
+class StubScraper(BaseScraper):
+    def __init__(self, base_url: str, limiter: DomainRateLimiter):
+        super().__init__(limiter)
+        self.base_url = base_url
+
+    def scrape(self, stock_symbol: str) -> List[Dict]:
+        soup = self._get_soup(f"{self.base_url}/cotation/{stock_symbol}")
+        if not soup:
+            return []
+        return [{"title": a.get_text(strip=True), "url": self.base_url + a["href"], "source": urlparse(self.base_url).netloc}
+                for a in soup.find_all("a", href=True)]
+
+def check_spacing(handlers, n_symbols):
+    for handler in handlers:
+        log = sorted(handler.log, key=lambda r: r[1])
+        assert len(log) == n_symbols, (handler.latency, len(log))
+        for (_, _, prev_end), (path, start, _) in zip(log, log[1:]):
+            # Starts only after the previous response is done, plus the polite gap
+            assert start >= prev_end + MIN_DELAY - SLACK, (handler.latency, path, start - prev_end)
+        handler.log.clear()
+
+if __name__ == "__main__":
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    servers = [serve(latency) for latency in LATENCIES]
+    handlers = [handler for _, handler in servers]
+    urls = [f"http://127.0.0.1:{server.server_address[1]}" for server, _ in servers]
+
+    limiter = DomainRateLimiter(MIN_DELAY, MAX_DELAY)
+    scrapers = [StubScraper(url, limiter) for url in urls]
+
+    start = time.perf_counter()
+    serial = {sym: [a for sc in scrapers for a in sc.scrape(sym)] for sym in symbols}
+    t_serial = time.perf_counter() - start
+    check_spacing(handlers, n_symbols)
+
+    start = time.perf_counter()
+    concurrent = ScrapeEngine(scrapers).scrape_many(symbols)
+    t_engine = time.perf_counter() - start
+    check_spacing(handlers, n_symbols)
+
+    assert concurrent == serial
+    assert all(len(articles) == 2 * len(urls) for articles in concurrent.values())
+    # The busiest domain, done back to back, bounds the wall time
+    budget = n_symbols * (max(LATENCIES) + MAX_DELAY) + 0.5
+    assert t_engine < budget, (t_engine, budget)
+    assert t_engine < t_serial, (t_engine, t_serial)
+
+    print(f"{len(urls)} domains, {n_symbols} symbols, latencies {LATENCIES}s, gap {MIN_DELAY}-{MAX_DELAY}s")
+    print("same articles, one request at a time per domain, gap counted from the response: OK")
+    print(f"  serial:       {t_serial:.2f}s")
+    print(f"  ScrapeEngine: {t_engine:.2f}s (budget {budget:.2f}s)")
+    for server, _ in servers:
+        server.shutdown()
@@ -0,0 +1,165 @@
+"""
+Local lexicon tier vs the previous keyword counter: throughput (articles/s) and
+agreement on a small labelled fixture set of BVMT headlines. score_batch must
+match the per-text score() on the fixtures and on negation / Arabic clitic /
+empty-text edge cases, all scored in one mixed-language batch. With GOOGLE_API_KEY set,
+the fixtures are also scored by Gemini and lexicon/LLM agreement is reported.
+
+    python -m benchmarks.bench_sentiment_lexicon [n_articles]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+from backend.modules.sentiment import lexicon
+from backend.modules.sentiment.nlp import SentimentAnalyzer, LOCAL_CONFIDENCE_THRESHOLD
+
+# (text, label) with label in {1, 0, -1}
+FIXTURES = [
+    ("SFBT: le titre termine la séance en forte hausse", 1),
+    ("La BIAT annonce un bénéfice net en progression de 12%", 1),
+    ("Poulina Group Holding: croissance soutenue du chiffre d'affaires", 1),
+    ("Le TUNINDEX rebondit après trois séances de repli", 1),
+    ("Délice Holding: hausse du dividende proposé à l'AGO", 1),
+    ("Carthage Cement redresse sa situation financière", 1),
+    ("Telnet enregistre des résultats record au premier semestre", 1),
+    ("Amélioration des indicateurs d'activité de la SAH", 1),
+    ("UIB: le produit net bancaire grimpe de 9%", 1),
+    ("Le titre Sotuver s'envole de 6% en séance", 1),
+    ("SFBT: chute du titre après la publication des états financiers", -1),
+    ("La société affiche une perte nette de 3 millions de dinars", -1),
+    ("Repli du TUNINDEX dans un marché peu animé", -1),
+    ("Baisse des revenus de la STB au troisième trimestre", -1),
+    ("Le titre Carthage Cement plonge de 4,5%", -1),
+    ("Dégradation de la note souveraine, inquiétude sur le marché", -1),
+    ("Recul du chiffre d'affaires de Tunisair", -1),
+    ("Le déficit commercial se creuse à fin septembre", -1),
+    ("La BNA ne parvient pas à maintenir sa croissance", -1),
+    ("Aucun bénéfice pour la société cette année", -1),
+    ("Pas de hausse pour le titre SAH malgré le volume", -1),
+    ("La société n'a enregistré aucune perte sur l'exercice", 1),
+    ("Assemblée générale ordinaire de la BIAT le 15 mai", 0),
+    ("Tunisie Leasing: communiqué relatif à la tenue de l'AGO", 0),
+    ("Publication des indicateurs d'activité trimestriels", 0),
+    ("ارتفاع أرباح الشركة التونسية للبنك", 1),
+    ("نمو رقم معاملات مجموعة بولينا", 1),
+    ("انتعاش مؤشر توننداكس في نهاية الحصة", 1),
+    ("صعود سهم الشركة بنسبة 5 بالمائة", 1),
+    ("تحسن المؤشرات المالية للبنك الوطني الفلاحي", 1),
+    ("تراجع مؤشر البورصة وسط تداولات ضعيفة", -1),
+    ("خسائر كبيرة للشركة خلال السنة المالية", -1),
+    ("انخفاض رقم المعاملات في الثلاثي الثالث", -1),
+    ("هبوط حاد لسهم الخطوط التونسية", -1),
+    ("لم يحقق البنك أي نمو هذا العام", -1),
+    ("انعقاد الجلسة العامة العادية للشركة", 0),
+]
+
+# (text, lang, expected sign): negations, Arabic clitics, texts that must not leak into each other
+EDGE_CASES = [
+    ("", "fr", 0),
+    ("", "ar", 0),
+    (None, "fr", 0),
+    ("Communiqué de la société", "fr", 0),
+    ("Le titre ne connaît pas de hausse", "fr", -1),
+    ("Aucune perte enregistrée", "fr", 1),
+    ("La société n'a pas", "fr", 0), # ends on a negation...
+    ("hausse du titre", "fr", 1), # ...that must not flip the next text
+    ("Pas de baisse, mais le titre reste en hausse", "fr", 1),
+    ("وارتفاع الأرباح", "ar", 1), # wa- + al-
+    ("بالخسائر", "ar", -1), # bi- + al-
+    ("فالتراجع مستمر", "ar", -1), # fa- + al-
+    ("لم يسجل السهم ارتفاعا", "ar", -1),
+    ("لا", "ar", 0),
+    ("انتعاش السوق", "ar", 1),
+    ("Le titre grimpe\nmais la perte se creuse", "fr", 0), # newline inside a text
+]
+
+def check_batch_parity(analyzer):
+    """score_batch on one mixed batch == score() text by text, and the edge cases score as expected."""
+    texts = [t for t, _ in FIXTURES] + [t for t, _, _ in EDGE_CASES]
+    langs = [analyzer.detect_language(t) for t, _ in FIXTURES] + [l for _, l, _ in EDGE_CASES]
+    scores, conf = lexicon.score_batch(texts, langs)
+    for text, lang, s, c in zip(texts, langs, scores, conf):
+        single = lexicon.score(text, lang)
+        assert (s, c) == single, (text, lang, (s, c), single)
+    for (text, lang, expected), s in zip(EDGE_CASES, scores[len(FIXTURES):]):
+        assert sign(s) == expected, (text, lang, s, expected)
+    empty_scores, empty_conf = lexicon.score_batch([])
+    assert len(empty_scores) == len(empty_conf) == 0
+    print(f"score_batch matches score() on {len(texts)} texts ({len(EDGE_CASES)} edge cases)")
+
+def legacy_score(text, lang):
+    """SentimentAnalyzer._analyze_local before the lexicon module."""
+    positive_fr = ['hausse', 'croissance', 'bénéfice', 'positif', 'bond', 'gain', 'performant']
+    negative_fr = ['baisse', 'chute', 'perte', 'négatif', 'déficit', 'repli', 'faillite']
+    positive_ar = ['ارتفاع', 'نمو', 'ربح', 'إيجابي', 'صعود', 'مكسب', 'أداء']
+    negative_ar = ['انخفاض', 'هبوط', 'خسارة', 'سلبي', 'تراجع', 'عجز', 'إفلاس']
+    text = text.lower()
+    pos_keywords, neg_keywords = (positive_fr, negative_fr) if lang == 'fr' else (positive_ar, negative_ar)
+    pos_count = sum(text.count(w) for w in pos_keywords)
+    neg_count = sum(text.count(w) for w in neg_keywords)
+    total = pos_count + neg_count
+    return 0.0 if total == 0 else (pos_count - neg_count) / total
+
+def sign(x, eps=0.05):
+    return 1 if x > eps else -1 if x < -eps else 0
+
+def agreement(a, b):
+    return float(np.mean([sign(x) == sign(y) for x, y in zip(a, b)]))
+
+if __name__ == "__main__":
+    n_articles = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    analyzer = SentimentAnalyzer(client=None)
+    texts = [t for t, _ in FIXTURES]
+    labels = [l for _, l in FIXTURES]
+    langs = [analyzer.detect_language(t) for t in texts]
+
+    check_batch_parity(analyzer)
+
+    legacy = [legacy_score(t, l) for t, l in zip(texts, langs)]
+    scores, conf = lexicon.score_batch(texts, langs)
+    confident = conf >= LOCAL_CONFIDENCE_THRESHOLD
+
+    print(f"fixtures: {len(texts)} headlines (fr/ar)")
+    print(f"  legacy keyword counter agreement with labels: {agreement(legacy, labels):.0%}")
+    print(f"  lexicon agreement with labels:                {agreement(scores, labels):.0%}")
+    print(f"  confident (>= {LOCAL_CONFIDENCE_THRESHOLD}) and skip the LLM: {confident.mean():.0%}, "
+          f"agreement on those: {agreement(scores[confident], np.array(labels)[confident]):.0%}")
+
+    rng = random.Random(0)
+    corpus = [rng.choice(texts) + f" ({i})" for i in range(n_articles)]
+    corpus_langs = [analyzer.detect_language(t) for t in corpus]
+
+    start = time.perf_counter()
+    for t, l in zip(corpus, corpus_langs):
+        legacy_score(t, l)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lexicon.score_batch(corpus, corpus_langs)
+    t_lexicon = time.perf_counter() - start
+    print(f"throughput on {n_articles} articles:")
+    print(f"  legacy keyword counter: {n_articles / t_legacy:,.0f} articles/s")
+    print(f"  lexicon score_batch:    {n_articles / t_lexicon:,.0f} articles/s")
+
+    if os.getenv("GOOGLE_API_KEY"):
+        llm = SentimentAnalyzer(local_threshold=None)
+        try:
+            # Direct call: a failed request must not fall back to lexicon scores here
+            llm_scores = [0.0 if s is None else s for s in llm._analyze_with_gemini(texts)]
+        except Exception as e:
+            print(f"LLM scoring failed, agreement not measured: {e}")
+        else:
+            print(f"LLM ({llm.model}, 1 call):")
+            print(f"  lexicon vs LLM agreement: {agreement(scores, llm_scores):.0%} (all), "
+                  f"{agreement(scores[confident], np.array(llm_scores)[confident]):.0%} (confident only)")
+            print(f"  LLM agreement with labels: {agreement(llm_scores, labels):.0%}")
+    else:
+        print("GOOGLE_API_KEY not set: lexicon/LLM agreement not measured")
@@ -0,0 +1,121 @@
+"""
+SSE fan-out load test: one uvicorn worker serving /stream/events, N clients
+connected at once, bursts of events published inside the server. Reports
+delivery, publish-to-receive latency and server RSS. One extra client never
+reads its stream, so the bounded queue has to drop it instead of buffering.
+
+    python -m benchmarks.bench_sse_fanout [n_clients] [n_events]
+"""
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+import httpx
+
+PORT = 8766
+BASE = f"http://127.0.0.1:{PORT}"
+
+def build_app():
+    from fastapi import FastAPI
+    from backend.routers import stream
+    from backend.services.event_bus import event_broker
+
+    app = FastAPI()
+    app.include_router(stream.router)
+
+    @app.post("/bench/publish")
+    async def publish(n: int = 10, size: int = 50, topic: str = "quotes"):
+        # size quotes per event, roughly one quote refresh diff
+        quotes = [{"symbol": f"S{i}", "last": 10.0 + i, "volume": i * 100} for i in range(size)]
+        for _ in range(n):
+            event_broker.publish(topic, {"sent_at": time.time(), "quotes": quotes})
+            await asyncio.sleep(0)
+        return {"published": n}
+
+    @app.get("/bench/rss")
+    def rss():
+        return {"rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    return app
+
+async def client(http, received, latencies, ready):
+    async with http.stream("GET", f"{BASE}/stream/events?topics=quotes") as r:
+        ready.set()
+        event = None
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: ") and event == "quotes":
+                latencies.append(time.time() - json.loads(line[6:])["sent_at"])
+                received[0] += 1
+
+async def run(n_clients, n_events):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as http:
+        received, latencies = [0], []
+        readies = [asyncio.Event() for _ in range(n_clients)]
+        t = time.perf_counter()
+        tasks = [asyncio.create_task(client(http, received, latencies, e)) for e in readies]
+        await asyncio.gather(*(e.wait() for e in readies))
+        print(f"{n_clients} clients connected in {time.perf_counter() - t:.2f}s")
+
+        # A consumer that connects and never reads (on its own topic, so the flood below skips the others)
+        slow = httpx.AsyncClient(timeout=None)
+        slow_response = await slow.send(slow.build_request("GET", f"{BASE}/stream/events?topics=sentiment"), stream=True)
+
+        t = time.perf_counter()
+        await http.post(f"{BASE}/bench/publish", params={"n": n_events})
+        expected = n_clients * n_events
+        while received[0] < expected and time.perf_counter() - t < 60:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - t
+        latencies.sort()
+        print(f"{received[0]}/{expected} frames delivered in {elapsed:.2f}s "
+              f"({received[0] / elapsed:.0f} frames/s)")
+        if latencies:
+            print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+                  f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f} ms")
+
+        # Flood the unread stream until its queue overflows
+        for _ in range(40):
+            await http.post(f"{BASE}/bench/publish", params={"n": 200, "size": 200, "topic": "sentiment"})
+            stats = (await http.get(f"{BASE}/stream/stats")).json()
+            if stats["dropped_slow_subscribers"]:
+                break
+        print(f"broker: {stats}")
+        print(f"server RSS {(await http.get(f'{BASE}/bench/rss')).json()['rss_mb']:.0f} MB")
+
+        await slow_response.aclose()
+        await slow.aclose()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        import uvicorn
+        uvicorn.run(build_app(), host="127.0.0.1", port=PORT, log_level="warning", workers=1)
+        sys.exit()
+
+    n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_events = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_sse_fanout", "--serve"])
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{BASE}/stream/stats")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        asyncio.run(run(n_clients, n_events))
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,98 @@
+"""
+SSE under `backend.serve --workers N` (EVENT_FANOUT=db): events written to the
+shared stream_events log, as the scheduler leader does, must reach clients on
+every worker with the same event id, and a Last-Event-ID reconnect must resume
+from the log whichever worker it lands on. Reports the log -> client delay.
+
+    python -m benchmarks.bench_sse_workers [workers] [n_clients]
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for(url, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(url)
+
+def listen(url, marker, received, headers=None):
+    """Reads the stream until the marker event; records (event id, arrival time)."""
+    last_id = None
+    with httpx.stream("GET", url, headers=headers or {}, timeout=30) as response:
+        for line in response.iter_lines():
+            if line.startswith("id:"):
+                last_id = int(line.split(":", 1)[1])
+            elif line.startswith("data:") and marker in line:
+                received.append((last_id, time.perf_counter()))
+                return
+
+def clients(url, n, marker, headers=None):
+    received = []
+    threads = [threading.Thread(target=listen, args=(url, marker, received, headers), daemon=True) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, received
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    n_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/bench.db", SECRET_KEY="bench", GOOGLE_API_KEY="",
+                   RUNTIME_DIR=os.path.join(tmp, "runtime"), BVMT_BASE_URL="http://127.0.0.1:9")
+        os.environ.update(env)
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        proc = subprocess.Popen([sys.executable, "-m", "backend.serve", "--workers", str(workers), "--port", str(port)],
+                                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(base + "/health")
+            time.sleep(2) # every worker up and following the log
+
+            from backend.database import SessionLocal
+            from backend.services.event_bus import EventLog
+            log = EventLog(SessionLocal)
+            url = base + "/stream/events?topics=anomaly"
+
+            assert {httpx.get(base + "/stream/stats").json()["fanout"] for _ in range(2 * workers)} == {"db"}
+
+            threads, received = clients(url, n_clients, "live")
+            time.sleep(1)
+            before = log.append("anomaly", json.dumps({"warm": 1}))
+            sent = time.perf_counter()
+            seq = log.append("anomaly", json.dumps({"live": 1}))
+            for t in threads:
+                t.join(15)
+            assert len(received) == n_clients, f"{len(received)}/{n_clients} clients got the event"
+            assert {s for s, _ in received} == {seq}, received
+            delays = sorted(t - sent for _, t in received)
+
+            # Reconnects from the event before: replayed from the log, on any worker
+            threads, resumed = clients(url, n_clients, "live", headers={"Last-Event-ID": str(before)})
+            for t in threads:
+                t.join(15)
+            assert len(resumed) == n_clients and {s for s, _ in resumed} == {seq}, resumed
+
+            print(f"{workers} workers, {n_clients} clients: every client got event {seq}; resume from {before}: OK")
+            print(f"log -> client delay: median {delays[len(delays) // 2] * 1000:.0f} ms, max {delays[-1] * 1000:.0f} ms")
+        finally:
+            proc.terminate()
+            proc.wait()
@@ -0,0 +1,114 @@
+"""
+Cold start of the API, each run in a fresh interpreter:
+
+import:       `import backend.main`, plus which heavy libraries it pulled in.
+first health: launching uvicorn until the first 200 from /health.
+first model:  after that, the first /forecast/cache/stats (builds the inference
+              service: torch, store, artifacts), i.e. where the lazy load is paid.
+
+With a git ref, the same is measured on that revision (extracted with git
+archive into a temp dir) as the "before" column.
+
+    python -m benchmarks.bench_startup [runs] [git_ref]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["torch", "pandas", "sklearn", "bs4", "google.genai"]
+
+IMPORT_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+import backend.main
+print(time.perf_counter() - t)
+print(",".join(m for m in %r if m in sys.modules) or "none")
+""" % (HEAVY,)
+
+def bench_env(tmp):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+        "SECRET_KEY": "bench",
+        "GOOGLE_API_KEY": "",
+        "RUNTIME_DIR": os.path.join(tmp, "runtime"),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import(tree, env):
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=tree, env=env,
+                         capture_output=True, text=True, check=True).stdout.strip().splitlines()
+    return float(out[-2]), out[-1]
+
+# One client for all polls: a new httpx.get builds an SSL context each time, and
+# that CPU would be taken from the server starting up on the same cores
+_client = httpx.Client(timeout=30)
+
+def wait_for(url, proc, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            if _client.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(url)
+
+def measure_server(tree, env):
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(f"http://127.0.0.1:{port}/health", proc)
+        health = time.perf_counter() - start
+        t = time.perf_counter()
+        wait_for(f"http://127.0.0.1:{port}/forecast/cache/stats", proc)
+        model = time.perf_counter() - t
+    finally:
+        proc.terminate()
+        proc.wait()
+    return health, model
+
+def run(label, tree, runs):
+    imports, healths, models, loaded = [], [], [], None
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = bench_env(tmp)
+            seconds, loaded = measure_import(tree, env)
+            imports.append(seconds)
+            health, model = measure_server(tree, env)
+            healths.append(health)
+            models.append(model)
+    print(f"{label:>7}: import {statistics.median(imports):.2f}s | first /health {statistics.median(healths):.2f}s | "
+          f"first model request {statistics.median(models):.2f}s | heavy at import: {loaded}")
+
+def export_tree(ref, dest):
+    archive = subprocess.run(["git", "archive", ref], cwd=ROOT, capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    ref = sys.argv[2] if len(sys.argv) > 2 else None
+    print(f"median of {runs} cold starts")
+    if ref:
+        with tempfile.TemporaryDirectory() as before:
+            export_tree(ref, before)
+            run("before", before, runs)
+    run("after", ROOT, runs)
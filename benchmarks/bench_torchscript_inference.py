@@ -0,0 +1,65 @@
+"""
+Eager OptimizedLSTM vs the exported TorchScript model (BatchNorm folded, frozen)
+on CPU: output parity (asserted with torch.testing.assert_close on every benchmarked
+batch, for a fresh export and for the artifact the service loads), then per-batch
+latency and throughput for batch sizes 1-256.
+
+    python -m benchmarks.bench_torchscript_inference [threads]
+"""
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import torch
+
+from forecasting import export
+from forecasting.registry import TORCHSCRIPT_FILE, ModelRegistry
+
+warnings.filterwarnings("ignore", category=FutureWarning) # torch.jit deprecation notices
+
+BATCH_SIZES = [1, 8, 32, 64, 128, 256]
+
+def assert_parity(eager, module, x):
+    with torch.no_grad():
+        torch.testing.assert_close(module(x), eager(x), rtol=0, atol=export.PARITY_TOLERANCE)
+
+def median_latency(fn, x, min_time=1.0, min_runs=5):
+    with torch.no_grad():
+        fn(x) # warm-up (TorchScript optimizes on the first calls)
+        fn(x)
+        times = []
+        start = time.perf_counter()
+        while len(times) < min_runs or time.perf_counter() - start < min_time:
+            t = time.perf_counter()
+            fn(x)
+            times.append(time.perf_counter() - t)
+    times.sort()
+    return times[len(times) // 2]
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    torch.set_num_threads(threads)
+
+    registry = ModelRegistry(os.path.join(os.path.dirname(export.__file__), "artifacts"))
+    version_dir = registry.path(registry.resolve())
+    model_path = os.path.join(version_dir, export.MODEL_FILE)
+    eager = export.load_eager(model_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        scripted = export.load_torchscript(export.export_torchscript(model_path, os.path.join(tmp, "model.ts")))
+    # The published artifact must be loadable for these weights and match them too
+    published = export.load_torchscript(os.path.join(version_dir, TORCHSCRIPT_FILE), export.weights_version(model_path))
+    assert published is not None, f"no TorchScript export for {version_dir}"
+
+    print(f"torch {torch.__version__}, {threads} thread(s)")
+    print(f"parity: max abs diff {export.check_parity(eager, scripted):.2e} (tolerance {export.PARITY_TOLERANCE:.0e})")
+    print(f"{'batch':>5} | {'eager ms':>9} | {'ts ms':>9} | {'eager seq/s':>11} | {'ts seq/s':>9} | speedup")
+    gen = torch.Generator().manual_seed(0)
+    for b in BATCH_SIZES:
+        x = torch.randn(b, export.SEQ_LEN, export.INPUT_DIM, generator=gen)
+        assert_parity(eager, scripted, x)
+        assert_parity(eager, published, x)
+        te = median_latency(eager, x)
+        ts = median_latency(scripted, x)
+        print(f"{b:>5} | {te * 1000:>9.2f} | {ts * 1000:>9.2f} | {b / te:>11.0f} | {b / ts:>9.0f} | {te / ts:.2f}x")
@@ -0,0 +1,94 @@
+"""
+Memory per API worker, N workers side by side (Linux: reads /proc/self/smaps_rollup).
+
+before: every worker loads the weights into its own tensors and parses the
+        cotation files into its own DataFrame (what each uvicorn worker did).
+after:  weights loaded with mmap + assign, histories read from the shared
+        mmapped OHLCV store into the bounded per-worker history cache.
+
+RSS counts shared pages in full for every process; PSS splits them between
+the processes mapping them, so sum(PSS) is the real footprint of the group.
+
+    python -m benchmarks.bench_worker_memory [n_workers] [n_years] [n_tickers]
+"""
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import warnings
+
+from benchmarks.bench_cotation_parser import write_synthetic_file
+from forecasting.registry import ModelRegistry, MODEL_FILE
+
+_registry = ModelRegistry(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "forecasting", "artifacts"))
+MODEL_PATH = os.path.join(_registry.path(_registry.resolve()), MODEL_FILE)
+
+def smaps_rollup():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+def worker(mode, data_dir, store_dir, barrier, results):
+    warnings.filterwarnings("ignore")
+    import torch
+    from forecasting.models.lstm import OptimizedLSTM
+    torch.set_num_threads(1)
+
+    model = OptimizedLSTM(input_dim=6).eval()
+    if mode == "before":
+        from forecasting.data.loader import load_and_merge_data
+        model.load_state_dict(torch.load(MODEL_PATH, map_location="cpu"))
+        held = load_and_merge_data(data_dir)
+    else:
+        from forecasting.data.store import OHLCVStore
+        from forecasting.inference.service import TickerHistoryCache
+        model.load_state_dict(torch.load(MODEL_PATH, map_location="cpu", mmap=True, weights_only=True), assign=True)
+        store = OHLCVStore(store_dir, data_dir)
+        held = TickerHistoryCache()
+        for code in store.codes():
+            held.put(code, store.get_ticker(code).set_index("SEANCE"))
+
+    with torch.no_grad():
+        model(torch.zeros(1, 60, 6))
+    barrier.wait() # every worker alive and loaded before measuring, so shared pages are split
+    results.put((mode, smaps_rollup()))
+    barrier.wait()
+
+def run(mode, n_workers, data_dir, store_dir):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, data_dir, store_dir, barrier, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    stats = [results.get()[1] for _ in procs]
+    for p in procs:
+        p.join()
+    mean = {k: sum(s[k] for s in stats) / len(stats) for k in stats[0]}
+    total_pss = sum(s["pss"] for s in stats)
+    print(f"{mode:>6}: per worker RSS {mean['rss']:.0f} MB, PSS {mean['pss']:.0f} MB, "
+          f"private {mean['uss']:.0f} MB | {n_workers} workers total PSS {total_pss:.0f} MB")
+
+if __name__ == "__main__":
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    n_tickers = int(sys.argv[3]) if len(sys.argv) > 3 else 80
+
+    from forecasting.data.store import OHLCVStore
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        store_dir = os.path.join(tmp, "store")
+        os.makedirs(data_dir)
+        rows = write_synthetic_file(os.path.join(data_dir, "histo_cotation_2022.txt"), n_years, n_tickers)
+        OHLCVStore(store_dir, data_dir).build()
+        print(f"{rows} rows, {n_tickers} tickers, {n_workers} workers")
+        for mode in ("before", "after"):
+            run(mode, n_workers, data_dir, store_dir)
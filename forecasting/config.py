@@ -0,0 +1,18 @@
+from pydantic_settings import BaseSettings
+
+class ForecastingSettings(BaseSettings):
+    """
+    Paths and model selection for the forecasting pipeline (environment / .env).
+    No credentials here, so training, export and the registry CLI run without the
+    API's secrets; backend.config.Settings extends this class with them.
+    """
+    DATA_DIR: str = "Datasets" # histo_cotation_*.txt source files
+    ARTIFACTS_DIR: str = "forecasting/artifacts" # OHLCV store + model registry (models/<version>/, models/CURRENT)
+    MODEL_VERSION: str = "" # serve this registry version; empty = whatever models/CURRENT names
+
+    class Config:
+        env_file = [".env", "backend/.env"]
+        env_file_encoding = "utf-8"
+        extra = "ignore"
+
+forecasting_settings = ForecastingSettings()
@@ -0,0 +1,74 @@
+import os
+import time
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+class FileLock:
+    """
+    Advisory inter-process lock on a file (flock on POSIX, msvcrt.locking on Windows).
+    The OS drops it when the holding process exits, so a crashed holder never
+    leaves a stale lock behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    @property
+    def held(self):
+        return self._fh is not None
+
+    def _try_lock(self, fh):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, blocking=True, poll=0.1):
+        """Returns True once the lock is held; with blocking=False, False if another process has it."""
+        if self._fh is not None:
+            return True
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fh = open(self.path, "a+")
+        while not self._try_lock(fh):
+            if not blocking:
+                fh.close()
+                return False
+            time.sleep(poll)
+        if fcntl is not None: # holder's pid, for whoever looks at the file (Windows won't truncate a locked file)
+            fh.seek(0)
+            fh.truncate()
+            fh.write(str(os.getpid()))
+            fh.flush()
+        self._fh = fh
+        return True
+
+    def release(self):
+        if self._fh is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
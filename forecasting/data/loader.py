@@ -1,14 +1,10 @@
 import pandas as pd
 import os
 
-def load_and_merge_data(data_dir):
-    dfs = []
-    print(f"Loading data from {data_dir}...", flush=True)
-    
-    if not os.path.exists(data_dir):
-        print(f"ERROR: Directory {data_dir} does not exist!", flush=True)
-        return pd.DataFrame()
+from forecasting.data.parser import parse_cotation_file, COL_MAPPING, REQUIRED_COLUMNS, NUMERIC_COLUMNS
 
+def list_source_files(data_dir):
+    """Returns the sorted histo_cotation_YYYY file names (2022+) found in data_dir."""
     all_files = os.listdir(data_dir)
     # Filter for relevant files (histo_cotation_YYYY) and exclude 2016-2021
     files = []
@@ -24,79 +20,71 @@ def load_and_merge_data(data_dir):
             except ValueError:
                 continue
 
-    files = sorted(files)
-    print(f"Selected files (2022+): {files}", flush=True)
-    
-    col_mapping = {
-        "D_SEANCE": "SEANCE", "F_SEANCE": "SEANCE", "DATE": "SEANCE",
-        "C_MEMO": "CODE", "MEMO": "CODE", "TICKER": "CODE",
-        "C_OUV": "OUVERTURE", "OPEN": "OUVERTURE",
-        "C_CLOT": "CLOTURE", "CLOSE": "CLOTURE",
-        "C_HAUT": "PLUS_HAUT", "HIGH": "PLUS_HAUT",
-        "C_BAS": "PLUS_BAS", "LOW": "PLUS_BAS",
-        "Q_ECH": "QUANTITE_NEGOCIEE", "VOLUME": "QUANTITE_NEGOCIEE",
-        "V_ECH": "CAPITAUX", "VALUE": "CAPITAUX",
-        "NB_TR": "NB_TRANSACTION", "TRADES": "NB_TRANSACTION"
-    }
+    return sorted(files)
 
-    for file in files:
-        path = os.path.join(data_dir, file)
-        try:
-            if file.endswith(".txt") or file.endswith(".csv"):
-                # Try multiple encodings and separators
-                encodings = ['utf-8', 'latin-1', 'cp1252']
-                df = None
-                for enc in encodings:
-                    try:
-                        # CSV files typically use semicolon separator
-                        if file.endswith(".csv"):
-                            df = pd.read_csv(path, sep=';', encoding=enc, skipinitialspace=True)
-                        else:
-                            # TXT files use whitespace (multiple spaces)
-                            df = pd.read_csv(path, sep=r'\s+', engine='python', encoding=enc)
-                        break
-                    except Exception as read_err:
-                        continue
-                
-                if df is None:
-                     print(f"Failed to read {file} with standard encodings.")
-                     continue
-            else:
-                continue # Skip non-text files
-            
-            # Strip whitespace from column names first!
-            df.columns = df.columns.str.strip()
-            
-            # Standardize columns
-            df.rename(columns=lambda x: col_mapping.get(x.upper(), x.upper()), inplace=True)
-            
-            required = ["CODE", "SEANCE", "OUVERTURE", "CLOTURE", "PLUS_HAUT", "PLUS_BAS", "QUANTITE_NEGOCIEE"]
-            missing = [c for c in required if c not in df.columns]
-            if not missing:
-                dfs.append(df[required])
-            else:
-                print(f"Skipping {file}: Missing columns {missing}")
-                
-        except Exception as e:
-            print(f"Error loading {file}: {e}")
-            
-    if not dfs:
-        # Fallback to empty DF if nothing loaded to prevent crash
-        print("No valid data files found.")
-        return pd.DataFrame()
-        
+def read_source_file(path):
+    """
+    Reads one histo_cotation file and returns its standardized required columns,
+    or None if the file can't be read or is missing columns.
+    """
+    file = os.path.basename(path)
+    if not (file.endswith(".txt") or file.endswith(".csv")):
+        return None # Skip non-text files
+    try:
+        return parse_cotation_file(path)
+    except Exception as e:
+        print(f"Error loading {file}: {e}")
+    return None
+
+def parse_seance(seance):
+    """
+    BVMT dates are dd/mm/YYYY: parse that format explicitly (vectorized, and no month/day
+    swap on ambiguous dates), then fall back to generic parsing for anything else (ISO, ...).
+    """
+    if pd.api.types.is_datetime64_any_dtype(seance):
+        return seance
+    dates = pd.to_datetime(seance, format="%d/%m/%Y", errors='coerce')
+    rest = dates.isna() & seance.notna()
+    if rest.any():
+        dates[rest] = pd.to_datetime(seance[rest], format="mixed", errors='coerce')
+    return dates
+
+def clean_merged(dfs):
+    """Concatenates per-file frames, parses dates/numerics and sorts by CODE, SEANCE."""
     final_df = pd.concat(dfs, ignore_index=True)
-    
+
     # Clean Format
-    final_df["SEANCE"] = pd.to_datetime(final_df["SEANCE"], errors='coerce')
+    final_df["SEANCE"] = parse_seance(final_df["SEANCE"])
     final_df = final_df.dropna(subset=["SEANCE"])
     final_df = final_df.sort_values(["CODE", "SEANCE"]).reset_index(drop=True)
-    
+
     # Parsing numeric errors
-    cols = ["OUVERTURE", "CLOTURE", "PLUS_HAUT", "PLUS_BAS", "QUANTITE_NEGOCIEE"]
-    for c in cols:
+    for c in NUMERIC_COLUMNS:
         final_df[c] = pd.to_numeric(final_df[c], errors='coerce')
-        
-    final_df = final_df.dropna().reset_index(drop=True)
+
+    return final_df.dropna().reset_index(drop=True)
+
+def load_and_merge_data(data_dir):
+    dfs = []
+    print(f"Loading data from {data_dir}...", flush=True)
+
+    if not os.path.exists(data_dir):
+        print(f"ERROR: Directory {data_dir} does not exist!", flush=True)
+        return pd.DataFrame()
+
+    files = list_source_files(data_dir)
+    print(f"Selected files (2022+): {files}", flush=True)
+
+    for file in files:
+        df = read_source_file(os.path.join(data_dir, file))
+        if df is not None:
+            dfs.append(df)
+
+    if not dfs:
+        # Fallback to empty DF if nothing loaded to prevent crash
+        print("No valid data files found.")
+        return pd.DataFrame()
+
+    final_df = clean_merged(dfs)
     print(f"Total rows loaded: {len(final_df)}")
     return final_df
@@ -0,0 +1,161 @@
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+COL_MAPPING = {
+    "D_SEANCE": "SEANCE", "F_SEANCE": "SEANCE", "DATE": "SEANCE",
+    "C_MEMO": "CODE", "MEMO": "CODE", "TICKER": "CODE",
+    "C_OUV": "OUVERTURE", "OPEN": "OUVERTURE",
+    "C_CLOT": "CLOTURE", "CLOSE": "CLOTURE",
+    "C_HAUT": "PLUS_HAUT", "HIGH": "PLUS_HAUT",
+    "C_BAS": "PLUS_BAS", "LOW": "PLUS_BAS",
+    "Q_ECH": "QUANTITE_NEGOCIEE", "VOLUME": "QUANTITE_NEGOCIEE",
+    "V_ECH": "CAPITAUX", "VALUE": "CAPITAUX",
+    "NB_TR": "NB_TRANSACTION", "TRADES": "NB_TRANSACTION"
+}
+
+REQUIRED_COLUMNS = ["CODE", "SEANCE", "OUVERTURE", "CLOTURE", "PLUS_HAUT", "PLUS_BAS", "QUANTITE_NEGOCIEE"]
+NUMERIC_COLUMNS = ["OUVERTURE", "CLOTURE", "PLUS_HAUT", "PLUS_BAS", "QUANTITE_NEGOCIEE"]
+
+SNIFF_BYTES = 64 * 1024
+
+def standard_name(column):
+    column = str(column).strip().upper()
+    return COL_MAPPING.get(column, column)
+
+def sniff_encoding(head: bytes) -> str:
+    """Guesses the encoding from the first bytes of a file (BOM, then strict UTF-8, then cp1252/latin-1)."""
+    if head.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    try:
+        head.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        if e.start >= len(head) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+    try:
+        head.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def _text_columns(header_names):
+    """dtype mapping keeping CODE and SEANCE as text, keyed by the file's own column names."""
+    return {name.strip(): str for name in header_names if standard_name(name) in ("CODE", "SEANCE")}
+
+def dash_rule_specs(rule_line: str):
+    """
+    Column specs [(start, end), ...] from a '------ ---- ------' separator line,
+    or None if the line isn't one.
+    """
+    stripped = rule_line.strip()
+    if not stripped or set(stripped) - {"-", " ", "\t"}:
+        return None
+    return [(m.start(), m.end()) for m in re.finditer(r"-+", rule_line)]
+
+# The rule line gives character offsets; they are byte offsets too only when every character is one byte
+SINGLE_BYTE_ENCODINGS = ("cp1252", "latin-1")
+
+def _read_fixed_width(raw: bytes, encoding: str, header: str, specs):
+    """
+    Fixed-width body -> DataFrame of the required columns.
+
+    Single-byte text (cp1252/latin-1, or UTF-8 that is plain ASCII) is laid out as a
+    (rows, width) byte matrix, the needed column ranges are cut out with ';' between
+    them, and the result goes through the C CSV parser once, so there is no per-field
+    Python work. Other text (accented UTF-8 names, UTF-16) is decoded first and cut by
+    characters with read_fwf, since a multi-byte character would shift every later field.
+    """
+    tokens = header.split()
+    if len(tokens) == len(specs):
+        names = tokens
+    else:
+        names = [header[start:end].strip() for start, end in specs]
+
+    wanted = [i for i, name in enumerate(names) if standard_name(name) in REQUIRED_COLUMNS]
+    if not wanted:
+        return pd.DataFrame(columns=names)
+    wanted_names = [names[i] for i in wanted]
+
+    body = raw[3:] if encoding == "utf-8-sig" else raw # BOM
+    if encoding not in SINGLE_BYTE_ENCODINGS and not body.isascii():
+        text = raw.decode(encoding).lstrip("\ufeff").replace("\r\n", "\n")
+        # last column may run past its rule
+        colspecs = [specs[i] if i < len(specs) - 1 else (specs[i][0], None) for i in wanted]
+        return pd.read_fwf(io.StringIO(text), colspecs=colspecs, header=None, skiprows=2,
+                           names=wanted_names, dtype=_text_columns(wanted_names))
+
+    lines = raw.split(b"\n")[2:]
+    lines = [l for l in lines if l.strip()]
+    if not lines:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+    width = max(len(l) for l in lines)
+    if all(len(l) == width for l in lines):
+        matrix = np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(len(lines), width)
+    else:
+        matrix = np.frombuffer(b"".join(l.ljust(width) for l in lines), dtype=np.uint8).reshape(len(lines), width)
+
+    separator = np.full((len(lines), 1), ord(";"), dtype=np.uint8)
+    parts = []
+    for k, i in enumerate(wanted):
+        start, end = specs[i]
+        end = width if i == len(specs) - 1 else min(end, width) # last column may run past its rule
+        parts.append(matrix[:, start:end])
+        parts.append(separator if k < len(wanted) - 1 else np.full((len(lines), 1), ord("\n"), dtype=np.uint8))
+
+    body = np.hstack(parts).tobytes()
+    return pd.read_csv(io.BytesIO(body), sep=";", header=None, names=wanted_names,
+                       encoding=encoding, skipinitialspace=True, dtype=_text_columns(wanted_names))
+
+def parse_cotation_file(path):
+    """
+    Fast parser for one BVMT histo_cotation file (.txt or .csv).
+
+    - Encoding is sniffed once from the first bytes instead of retried on failure.
+    - .txt files with a dashed separator line are read as fixed width (names may contain spaces),
+      other .txt files as whitespace separated, .csv as ';' separated; always with the C engine.
+    - Columns are renamed with COL_MAPPING and numeric columns coerced in the same pass.
+
+    Returns a DataFrame with REQUIRED_COLUMNS (SEANCE left as text, see loader.clean_merged),
+    or None if required columns are missing.
+    """
+    file = os.path.basename(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    if b"\r\n" in raw[:SNIFF_BYTES]:
+        raw = raw.replace(b"\r\n", b"\n")
+    encoding = sniff_encoding(raw[:SNIFF_BYTES])
+
+    usecols = lambda c: standard_name(c) in REQUIRED_COLUMNS
+    head = raw[:SNIFF_BYTES].decode(encoding, errors="replace").lstrip("\ufeff").split("\n")
+    if file.endswith(".csv"):
+        # CSV files typically use semicolon separator
+        text_cols = _text_columns(head[0].split(";"))
+        df = pd.read_csv(io.BytesIO(raw), sep=";", encoding=encoding, skipinitialspace=True,
+                         usecols=usecols, dtype=text_cols)
+    else:
+        specs = dash_rule_specs(head[1]) if len(head) > 1 else None
+        if specs:
+            df = _read_fixed_width(raw, encoding, head[0], specs)
+        else:
+            # TXT files use whitespace (multiple spaces); '\s+' is handled by the C engine
+            text_cols = _text_columns(head[0].split())
+            df = pd.read_csv(io.BytesIO(raw), sep=r"\s+", encoding=encoding, usecols=usecols, dtype=text_cols)
+
+    df.columns = [standard_name(c) for c in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        print(f"Skipping {file}: Missing columns {missing}")
+        return None
+
+    out = {"CODE": df["CODE"].str.strip(), "SEANCE": df["SEANCE"]}
+    for c in NUMERIC_COLUMNS:
+        out[c] = pd.to_numeric(df[c], errors="coerce")
+    return pd.DataFrame(out)
@@ -48,8 +48,8 @@ class DataPipeline:
 
 if __name__ == "__main__":
     # Test
-    DATA_DIR = r"c:\Users\user\Downloads\sama3tou max\datasets"
-    pipeline = DataPipeline(DATA_DIR)
+    from forecasting.config import forecasting_settings as settings
+    pipeline = DataPipeline(settings.DATA_DIR)
     
     try:
         # SFBT is a major stock, good for testing
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecasting.data.filelock import FileLock
+from forecasting.data.loader import (
+    list_source_files, read_source_file, clean_merged, REQUIRED_COLUMNS, NUMERIC_COLUMNS
+)
+
+MANIFEST_NAME = "manifest.json"
+
+def _file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class OHLCVStore:
+    """
+    On-disk columnar copy of the histo_cotation files, partitioned by CODE.
+
+    Each ticker gets its own directory with two .npy files:
+    - seance.npy: int64 nanosecond timestamps (sorted)
+    - ohlcv.npy:  float64 matrix (rows, 5) in NUMERIC_COLUMNS order
+    Both are opened with mmap_mode='r', so reading one ticker only touches its own pages.
+
+    manifest.json records the mtime/size/sha1 of every source file; the store is
+    rebuilt only when the set of files or their content changes. Several
+    processes (API workers) can share one store: rebuilds are serialized by a
+    file lock and the partitions are only ever read through mmap, so the page
+    cache holds one copy for all of them.
+    """
+
+    def __init__(self, store_dir: str, data_dir: str, check_interval: float = 60.0):
+        self.store_dir = store_dir
+        self.data_dir = data_dir
+        self.check_interval = check_interval
+        self._manifest = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    # --- Manifest / staleness ---
+
+    def _read_manifest(self):
+        path = os.path.join(self.store_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, directory, manifest):
+        tmp_path = os.path.join(directory, MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+
+    def _scan_sources(self):
+        """Returns {filename: {"mtime", "size"}} for the current source files."""
+        if not os.path.exists(self.data_dir):
+            return {}
+        sources = {}
+        for name in list_source_files(self.data_dir):
+            st = os.stat(os.path.join(self.data_dir, name))
+            sources[name] = {"mtime": st.st_mtime, "size": st.st_size}
+        return sources
+
+    def is_stale(self) -> bool:
+        """
+        True if the store must be rebuilt.
+        A file whose mtime changed but whose sha1 is unchanged (e.g. touched or re-copied)
+        does not trigger a rebuild; its new mtime is recorded instead.
+        """
+        manifest = self._manifest or self._read_manifest()
+        if manifest is None:
+            return True
+
+        current = self._scan_sources()
+        recorded = manifest.get("sources", {})
+        if set(current) != set(recorded):
+            return True
+
+        touched = False
+        for name, stat in current.items():
+            old = recorded[name]
+            if stat["size"] != old["size"]:
+                return True
+            if stat["mtime"] != old["mtime"]:
+                if _file_sha1(os.path.join(self.data_dir, name)) != old["sha1"]:
+                    return True
+                old["mtime"] = stat["mtime"]
+                touched = True
+
+        if touched:
+            self._write_manifest(self.store_dir, manifest)
+        self._manifest = manifest
+        return False
+
+    def ensure_built(self, force: bool = False) -> bool:
+        """
+        Rebuilds the store if any source file changed. Returns True if a rebuild happened.
+        Source files are only re-checked every `check_interval` seconds unless `force` is set.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._manifest is not None and now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+            if not self.is_stale():
+                return False
+            # Another worker may be rebuilding (or just did): wait for it, then look again
+            with FileLock(self.store_dir + ".lock"):
+                self._manifest = self._read_manifest()
+                if not self.is_stale():
+                    return True # rebuilt by another process, cached frames are stale
+                return self.build()
+
+    # --- Ingest ---
+
+    def build(self) -> bool:
+        """Parses every source file once and writes the per-CODE partitions."""
+        if not os.path.exists(self.data_dir):
+            print(f"ERROR: Directory {self.data_dir} does not exist!", flush=True)
+            return False
+
+        start = time.perf_counter()
+        sources = self._scan_sources()
+        dfs = []
+        for name in sources:
+            path = os.path.join(self.data_dir, name)
+            sources[name]["sha1"] = _file_sha1(path)
+            df = read_source_file(path)
+            if df is not None:
+                dfs.append(df)
+
+        if not dfs:
+            print("No valid data files found.")
+            return False
+
+        final_df = clean_merged(dfs)
+
+        # Build next to the live store, then swap directories
+        tmp_dir = self.store_dir + ".tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        partitions = {}
+        codes = final_df["CODE"].astype(str).values
+        seances = final_df["SEANCE"].values.astype("datetime64[ns]").astype(np.int64)
+        values = final_df[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+
+        # final_df is sorted by CODE, so each ticker is one contiguous slice
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(codes)]))
+        for start_idx, end_idx in zip(starts, ends):
+            code = codes[start_idx]
+            dirname = re.sub(r"[^A-Za-z0-9_.-]", "_", code)
+            if dirname in partitions.values():
+                dirname = f"{dirname}_{len(partitions)}"
+            part_dir = os.path.join(tmp_dir, dirname)
+            os.makedirs(part_dir)
+            np.save(os.path.join(part_dir, "seance.npy"), seances[start_idx:end_idx])
+            np.save(os.path.join(part_dir, "ohlcv.npy"), np.ascontiguousarray(values[start_idx:end_idx]))
+            partitions[code] = dirname
+
+        manifest = {
+            "sources": sources,
+            "partitions": partitions,
+            "rows": int(len(final_df)),
+            "latest_session": str(final_df["SEANCE"].max().date()),
+            "built_at": time.time(),
+        }
+        self._write_manifest(tmp_dir, manifest)
+
+        old_dir = self.store_dir + ".old"
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        if os.path.exists(self.store_dir):
+            os.rename(self.store_dir, old_dir)
+        os.rename(tmp_dir, self.store_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        self._manifest = manifest
+        print(f"OHLCV store rebuilt: {len(partitions)} tickers, {len(final_df)} rows "
+              f"in {time.perf_counter() - start:.2f}s", flush=True)
+        return True
+
+    # --- Reads ---
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = self._read_manifest()
+        return self._manifest or {}
+
+    def codes(self):
+        return sorted(self.manifest.get("partitions", {}))
+
+    @property
+    def latest_session(self):
+        return self.manifest.get("latest_session")
+
+    def get_ticker(self, code: str) -> pd.DataFrame:
+        """
+        Returns the history of one CODE with the same columns as load_and_merge_data,
+        or an empty DataFrame if the ticker isn't in the store.
+        """
+        dirname = self.manifest.get("partitions", {}).get(code)
+        if dirname is None:
+            return pd.DataFrame()
+
+        part_dir = os.path.join(self.store_dir, dirname)
+        seance = np.load(os.path.join(part_dir, "seance.npy"), mmap_mode="r")
+        ohlcv = np.load(os.path.join(part_dir, "ohlcv.npy"), mmap_mode="r")
+
+        df = pd.DataFrame(ohlcv, columns=NUMERIC_COLUMNS)
+        df.insert(0, "SEANCE", pd.to_datetime(np.asarray(seance), unit="ns"))
+        df.insert(0, "CODE", code)
+        return df[REQUIRED_COLUMNS]
+
+if __name__ == "__main__":
+    # Ingest: python -m forecasting.data.store <data_dir> <store_dir>
+    import sys
+    if len(sys.argv) != 3:
+        print("Usage: python -m forecasting.data.store <data_dir> <store_dir>")
+        sys.exit(1)
+
+    store = OHLCVStore(store_dir=sys.argv[2], data_dir=sys.argv[1])
+    if not store.ensure_built(force=True):
+        print("Store is up to date.")
+    print(f"{len(store.codes())} tickers, latest session {store.latest_session}")
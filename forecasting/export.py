@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sys
+
+import torch
+import torch.nn as nn
+
+from forecasting.models.lstm import OptimizedLSTM
+from forecasting.registry import MODEL_FILE, TORCHSCRIPT_FILE
+
+SEQ_LEN = 60
+INPUT_DIM = 6 # len(FEATURES) in forecasting.inference.service
+PARITY_TOLERANCE = 1e-4 # max abs difference to the eager model, in log-return units
+
+def weights_version(model_path):
+    """sha1 prefix of the weights file, the same tag InferenceService uses as model_version."""
+    with open(model_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+def fold_batchnorm(linear: nn.Linear, bn: nn.BatchNorm1d) -> nn.Linear:
+    """
+    Linear followed by eval-mode BatchNorm as a single Linear:
+    bn(Wx + b) = s * (Wx + b - mean) + beta with s = gamma / sqrt(var + eps).
+    """
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    folded = nn.Linear(linear.in_features, linear.out_features)
+    with torch.no_grad():
+        folded.weight.copy_(linear.weight * scale[:, None])
+        folded.bias.copy_((linear.bias - bn.running_mean) * scale + bn.bias)
+    return folded
+
+class FoldedLSTM(nn.Module):
+    """OptimizedLSTM for inference only: BatchNorm folded into the first head Linear, no Dropout."""
+
+    def __init__(self, model: OptimizedLSTM):
+        super().__init__()
+        linear1, bn, _, _, linear2 = model.fc_head
+        self.lstm = model.lstm
+        self.fc_head = nn.Sequential(fold_batchnorm(linear1, bn), nn.ReLU(), linear2)
+
+    def forward(self, x):
+        out, _ = self.lstm(x)
+        return self.fc_head(out[:, -1, :])
+
+def load_eager(model_path, input_dim=INPUT_DIM):
+    model = OptimizedLSTM(input_dim=input_dim)
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    return model.eval()
+
+def check_parity(eager, module, input_dim=INPUT_DIM, batch_sizes=(1, 7, 64, 256), seed=0):
+    """Max abs difference between eager and exported outputs over random batches."""
+    gen = torch.Generator().manual_seed(seed)
+    worst = 0.0
+    with torch.no_grad():
+        for b in batch_sizes:
+            x = torch.randn(b, SEQ_LEN, input_dim, generator=gen)
+            worst = max(worst, (eager(x) - module(x)).abs().max().item())
+    return worst
+
+def export_torchscript(model_path, out_path=None, input_dim=INPUT_DIM):
+    """
+    Traces the folded model on CPU and writes a frozen TorchScript artifact next
+    to the weights. The weights version is stored in the archive so a stale
+    export (weights retrained since) is never served.
+    Returns the output path.
+    """
+    out_path = out_path or os.path.join(os.path.dirname(model_path), TORCHSCRIPT_FILE)
+    eager = load_eager(model_path, input_dim)
+    model = FoldedLSTM(eager).eval()
+
+    example = torch.zeros(8, SEQ_LEN, input_dim)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        traced = torch.jit.freeze(traced)
+
+    # The trace must hold for other batch sizes too, not only the example's
+    diff = check_parity(eager, traced, input_dim)
+    if diff > PARITY_TOLERANCE:
+        raise RuntimeError(f"Exported model differs from eager by {diff:.2e} (tolerance {PARITY_TOLERANCE:.0e})")
+
+    tmp = out_path + ".tmp"
+    torch.jit.save(traced, tmp, _extra_files={"weights_version": weights_version(model_path)})
+    os.replace(tmp, out_path)
+    return out_path
+
+def load_torchscript(path, expected_version=None):
+    """The exported module, or None if missing or built from other weights."""
+    if not os.path.exists(path):
+        return None
+    extra = {"weights_version": ""}
+    module = torch.jit.load(path, map_location="cpu", _extra_files=extra)
+    version = extra["weights_version"]
+    if isinstance(version, bytes):
+        version = version.decode()
+    if expected_version and version != expected_version:
+        print(f"Ignoring {path}: exported from weights {version}, current weights are {expected_version}.")
+        return None
+    return module.eval()
+
+if __name__ == "__main__":
+    # python -m forecasting.export [model_dir]   (default: the registry's current version)
+    if len(sys.argv) > 1:
+        model_dir = sys.argv[1]
+    else:
+        from forecasting.config import forecasting_settings as settings
+        from forecasting.registry import ModelRegistry
+        registry = ModelRegistry(settings.ARTIFACTS_DIR)
+        model_dir = registry.path(registry.resolve(settings.MODEL_VERSION or None))
+    path = export_torchscript(os.path.join(model_dir, MODEL_FILE))
+    print(f"TorchScript model written to {path}")
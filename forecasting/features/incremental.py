@@ -0,0 +1,220 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Same order as the columns produced by engineering.add_technical_indicators
+INDICATOR_COLUMNS = ["log_return", "volatility_20", "rsi", "macd_hist", "bb_pos", "volume_change"]
+
+class RollingWindow:
+    """
+    Fixed-size window with O(1) push. Keeps a running mean and sum of squared
+    deviations (Welford add/remove, like pandas' own rolling var) so mean and
+    sample std never need a pass over the window.
+
+    Non-finite values (NaN, +-inf) are counted but kept out of the running sums:
+    like pandas rolling(size), mean() and std() are NaN while one is in the
+    window and recover once it has been pushed out.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.n_finite = 0
+        self._mean = 0.0
+        self.m2 = 0.0
+
+    def _add(self, x):
+        self.n_finite += 1
+        delta = x - self._mean
+        self._mean += delta / self.n_finite
+        self.m2 += delta * (x - self._mean)
+
+    def _remove(self, x):
+        self.n_finite -= 1
+        if self.n_finite == 0:
+            self._mean = self.m2 = 0.0
+            return
+        delta = x - self._mean
+        self._mean -= delta / self.n_finite
+        self.m2 -= delta * (x - self._mean)
+
+    def push(self, x):
+        self.values.append(x)
+        if math.isfinite(x):
+            self._add(x)
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            if math.isfinite(old):
+                self._remove(old)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        if self.n_finite < len(self.values):
+            return math.nan
+        return self._mean
+
+    def std(self):
+        # Sample std (ddof=1), as pandas rolling().std()
+        if self.n_finite < len(self.values):
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (len(self.values) - 1))
+
+class Ewm:
+    """
+    pandas ewm(span=span, adjust=False).mean(): first value seeds the average.
+    A NaN input repeats the previous average and, as in pandas (ignore_na=False),
+    still decays the old weight, so the next observation counts for more.
+    """
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = math.nan
+        self.old_wt = 1.0
+
+    def push(self, x):
+        is_observation = not math.isnan(x)
+        if not math.isnan(self.value):
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.value != x:
+                    self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_observation:
+            self.value = x
+        return self.value
+
+class TickerIndicatorState:
+    """
+    Indicator state of one ticker. update() consumes one bar in O(1) and returns
+    the feature row (INDICATOR_COLUMNS order) once every window is warm, else None.
+    Matches add_technical_indicators row for row, including its dropna.
+    """
+
+    def __init__(self, history=60):
+        self.prev_close = None
+        self.prev_volume = None
+        self.returns = RollingWindow(20) # volatility_20
+        self.closes = RollingWindow(20) # bollinger
+        self.gains = RollingWindow(14) # rsi
+        self.losses = RollingWindow(14)
+        self.ema_fast = Ewm(12)
+        self.ema_slow = Ewm(26)
+        self.macd_signal = Ewm(9)
+
+        self.n_bars = 0
+        self.last_seance = None
+        self.last_close = None
+        self.rows = deque(maxlen=history) # last emitted feature rows
+        self.row_seances = deque(maxlen=history)
+
+    def update(self, close, volume, seance=None):
+        # numpy scalars: a zero close divides to +-inf like the batch path instead of raising
+        close = np.float64(close)
+        volume = np.float64(volume)
+
+        if self.prev_close is None:
+            log_return = None
+            volume_change = None
+            # diff() is NaN on the first bar; .where(delta > 0, 0) turns that into 0
+            gain = loss = 0.0
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                log_return = np.log(close / self.prev_close)
+                volume_change = np.log((volume + 1) / (self.prev_volume + 1))
+            delta = close - self.prev_close # NaN next to a missing close: neither gain nor loss, as .where()
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+
+        if log_return is not None:
+            self.returns.push(log_return)
+        self.closes.push(close)
+        self.gains.push(gain)
+        self.losses.push(loss)
+
+        macd = self.ema_fast.push(close) - self.ema_slow.push(close)
+        macd_hist = macd - self.macd_signal.push(macd)
+
+        self.prev_close = close
+        self.prev_volume = volume
+        self.n_bars += 1
+        self.last_seance = seance
+        self.last_close = float(close)
+
+        if log_return is None or not (self.returns.full and self.closes.full and self.gains.full):
+            return None
+
+        volatility = self.returns.std()
+
+        rs = self.gains.mean() / (self.losses.mean() + 1e-6)
+        rsi = 100 - (100 / (1 + rs))
+
+        ma = self.closes.mean()
+        std = self.closes.std()
+        lower = ma - (2 * std)
+        upper = ma + (2 * std)
+        bb_pos = (close - lower) / ((upper - lower) + 1e-6)
+
+        row = tuple(float(v) for v in (log_return, volatility, rsi, macd_hist, bb_pos, volume_change))
+        if any(math.isnan(v) for v in row):
+            return None # dropped by dropna() in the batch path
+        self.rows.append(row)
+        self.row_seances.append(seance)
+        return row
+
+    def feature_matrix(self):
+        """Last `history` feature rows as an (n, 6) array."""
+        return np.array(self.rows, dtype=np.float64).reshape(-1, len(INDICATOR_COLUMNS))
+
+class IncrementalIndicatorEngine:
+    """
+    Per-ticker indicator states. update() only feeds the bars appended since the
+    previous call, so a new session costs O(1) instead of a full-history recompute.
+    """
+
+    def __init__(self, history=60):
+        self.history = history
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _is_continuation(self, state, df):
+        """True if df starts with exactly the bars already consumed by state."""
+        n = state.n_bars
+        if n == 0 or len(df) < n:
+            return False
+        last = df.iloc[n - 1]
+        close = float(last["CLOTURE"])
+        same_close = close == state.last_close or (math.isnan(close) and math.isnan(state.last_close))
+        return last["SEANCE"] == state.last_seance and same_close
+
+    def update(self, code, df):
+        """
+        Brings the state of `code` up to date with df (history sorted by SEANCE with
+        SEANCE, CLOTURE and QUANTITE_NEGOCIEE columns) and returns a snapshot
+        (feature_matrix, last_close, last_seance) taken under the lock, since the
+        scheduler's precompute thread may update the same ticker concurrently.
+        """
+        with self._lock:
+            state = self._states.get(code)
+            if state is None or not self._is_continuation(state, df):
+                state = TickerIndicatorState(self.history)
+                self._states[code] = state
+
+            new_bars = df.iloc[state.n_bars:]
+            for seance, close, volume in zip(new_bars["SEANCE"].values,
+                                             new_bars["CLOTURE"].values,
+                                             new_bars["QUANTITE_NEGOCIEE"].values):
+                state.update(close, volume, pd.Timestamp(seance))
+            return state.feature_matrix(), state.last_close, state.last_seance
+
+    def reset(self, code=None):
+        with self._lock:
+            if code is None:
+                self._states.clear()
+            else:
+                self._states.pop(code, None)
@@ -1,3 +1,8 @@
-﻿from .service import inference_service
+# Lazy: importing forecasting.inference.* must not pull in torch and load the model
+def __getattr__(name):
+    if name == "inference_service":
+        from .service import get_inference_service
+        return get_inference_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ["inference_service"]
\ No newline at end of file
+__all__ = ["inference_service"]
@@ -0,0 +1,122 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+BATCH_MAX_SIZE = 64 # tickers per forward pass
+BATCH_MAX_WAIT_MS = 5 # how long the first request of a batch waits for company
+LATENCY_SAMPLES = 2048 # recent request latencies kept for the percentiles
+
+class MicroBatcher:
+    """
+    Gathers single-ticker predict calls into micro-batches.
+
+    submit() queues a ticker and returns a Future. One worker thread takes the
+    first waiting request, keeps collecting until BATCH_MAX_SIZE tickers or
+    BATCH_MAX_WAIT_MS after that first request, runs predict_many once for the
+    batch and resolves every caller's future with its own result. Callers on
+    the event loop await predict() and never run torch themselves.
+    """
+
+    def __init__(self, predict_many, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.predict_many = predict_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.failures = 0
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="forecast-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, ticker) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((ticker, future, time.perf_counter()))
+        return future
+
+    async def predict(self, ticker):
+        return await asyncio.wrap_future(self.submit(ticker))
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the batch is full or the wait is over."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as e:
+                # One bad batch must not end the thread: its callers get the error, the next batch runs
+                print(f"Forecast batcher error: {e}", flush=True)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process(self, batch):
+        # Drop callers that went away while queued (asyncio.wrap_future cancels the Future with the
+        # awaiting task); the others can no longer be cancelled, so resolving them can't raise
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        tickers = list(dict.fromkeys(ticker for ticker, _, _ in batch))
+        try:
+            results = self.predict_many(tickers)
+            error = None
+        except Exception as e:
+            results, error = None, e
+
+        done = time.perf_counter()
+        for ticker, future, submitted in batch:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results.get(ticker, {"error": "No result"}))
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.failures += error is not None
+            self.batch_sizes[len(tickers)] += 1
+            self.latencies.extend(done - submitted for _, _, submitted in batch)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = np.array(self.latencies) * 1000
+            sizes = dict(sorted(self.batch_sizes.items()))
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self.requests,
+                "batches": self.batches,
+                "failures": self.failures,
+                "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "batch_sizes": sizes, # unique tickers per forward pass -> count
+                "latency_ms": {
+                    "p50": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+                    "p99": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+                    "samples": len(latencies),
+                },
+            }
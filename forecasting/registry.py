@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from forecasting.data.filelock import FileLock
+from forecasting.data.loader import list_source_files
+from forecasting.data.store import _file_sha1
+
+MODELS_DIR = "models" # under ARTIFACTS_DIR
+CURRENT_FILE = "CURRENT" # name of the version being served
+METADATA_FILE = "metadata.json"
+MODEL_FILE = "best_lstm_model.pth"
+SCALER_FILE = "scaler.pkl"
+TORCHSCRIPT_FILE = "best_lstm_model.ts"
+
+def data_fingerprint(data_dir):
+    """sha1 over the names and contents of the source files a model is trained on, or None if there are none."""
+    files = list_source_files(data_dir) if os.path.isdir(data_dir) else []
+    if not files:
+        return None
+    h = hashlib.sha1()
+    for name in files:
+        h.update(f"{name}:{_file_sha1(os.path.join(data_dir, name))}\n".encode())
+    return h.hexdigest()
+
+class ModelRegistry:
+    """
+    Versioned model artifacts under <artifacts_dir>/models:
+
+        models/<version>/best_lstm_model.pth, scaler.pkl, best_lstm_model.ts, metadata.json
+        models/CURRENT    the version to serve
+
+    A version directory is complete before it gets its final name (written to a
+    staging directory, then renamed), and CURRENT is replaced atomically, so a
+    reader never sees a half-written model. metadata.json holds the FEATURES
+    list, SEQ_LEN, input_dim, the weights version and the training data
+    fingerprint.
+    """
+
+    def __init__(self, artifacts_dir):
+        self.root = os.path.join(artifacts_dir, MODELS_DIR)
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Published versions, oldest first (names start with their timestamp)."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if not d.startswith(".") and os.path.exists(os.path.join(self.root, d, METADATA_FILE)))
+
+    def current(self):
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version or None
+
+    def resolve(self, version=None):
+        """The pinned version if given, else CURRENT, else the newest one; None for an empty registry."""
+        if version:
+            if not os.path.exists(os.path.join(self.path(version), METADATA_FILE)):
+                raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+            return version
+        versions = self.versions()
+        current = self.current()
+        if current in versions:
+            return current
+        return versions[-1] if versions else None
+
+    def metadata(self, version):
+        with open(os.path.join(self.path(version), METADATA_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def staging_dir(self):
+        """Empty directory for a training run to write its artifacts into (see publish)."""
+        path = os.path.join(self.root, f".staging-{os.getpid()}-{int(time.time())}")
+        os.makedirs(path)
+        return path
+
+    def publish(self, staging, metadata, make_current=True):
+        """
+        Turns a staging directory holding MODEL_FILE and SCALER_FILE (and optionally
+        TORCHSCRIPT_FILE) into a version named <timestamp>-<weights version>.
+        Returns the version.
+        """
+        from forecasting.export import weights_version
+        weights = weights_version(os.path.join(staging, MODEL_FILE))
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{weights}"
+        metadata = dict(metadata, version=version, weights_version=weights,
+                        created_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        with open(os.path.join(staging, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=1)
+
+        with FileLock(os.path.join(self.root, ".lock")):
+            os.replace(staging, self.path(version))
+            if make_current:
+                self.set_current(version)
+        return version
+
+    def set_current(self, version):
+        """Points CURRENT at version; API workers pick it up on their next check (MODEL_CHECK_INTERVAL)."""
+        self.resolve(version)
+        tmp = os.path.join(self.root, CURRENT_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.root, CURRENT_FILE))
+
+    def adopt(self, directory, metadata):
+        """Copies flat, unversioned artifacts (the pre-registry layout) into a new version."""
+        staging = self.staging_dir()
+        for name in (MODEL_FILE, SCALER_FILE, TORCHSCRIPT_FILE):
+            if os.path.exists(os.path.join(directory, name)):
+                shutil.copy2(os.path.join(directory, name), os.path.join(staging, name))
+        return self.publish(staging, metadata)
+
+if __name__ == "__main__":
+    # python -m forecasting.registry list | promote <version> | adopt <dir>
+    from forecasting.config import forecasting_settings as settings
+    registry = ModelRegistry(settings.ARTIFACTS_DIR)
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "list":
+        current = registry.resolve(settings.MODEL_VERSION or None)
+        for v in registry.versions():
+            meta = registry.metadata(v)
+            print(f"{'*' if v == current else ' '} {v}  seq_len={meta['seq_len']}  data={str(meta.get('data_fingerprint'))[:12]}")
+    elif command == "promote":
+        registry.set_current(sys.argv[2])
+        print(f"CURRENT -> {sys.argv[2]}")
+    elif command == "adopt":
+        from forecasting.inference.service import FEATURES, SEQ_LEN
+        version = registry.adopt(sys.argv[2], {"features": FEATURES, "seq_len": SEQ_LEN, "input_dim": len(FEATURES),
+                                               "data_fingerprint": None})
+        print(f"Adopted {sys.argv[2]} as {version}")
+    else:
+        sys.exit(f"Unknown command {command}")
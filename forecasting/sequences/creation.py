@@ -1,53 +1,131 @@
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import RobustScaler
 from forecasting.features.engineering import add_technical_indicators
 
-def create_dataset(final_df, seq_len=60, horizons=[1, 5]):
-    print("Preprocessing data...", flush=True)
+FEATURES = ["log_return", "volatility_20", "rsi", "macd_hist", "bb_pos", "volume_change"]
+TARGET = "log_return" # Predicting next log return
+
+def _ticker_features(payload):
+    """
+    Worker: runs add_technical_indicators on one ticker's contiguous arrays.
+    Module-level so it can be pickled into a process pool.
+    """
+    df = pd.DataFrame(payload)
+    return add_technical_indicators(df)[FEATURES].to_numpy(dtype=np.float64)
+
+def compute_ticker_features(final_df, n_workers=None):
+    """
+    Feature matrix (n, F) per ticker with enough history, in sorted CODE order.
+    With n_workers > 1 tickers are processed in a process pool; only the
+    CLOTURE / QUANTITE_NEGOCIEE arrays are shipped to the workers.
+    """
+    payloads = []
     # Process per stock to avoid data leakage across tickers
-    grouped = final_df.groupby("CODE")
-    processed_dfs = []
-    
-    for code, group in grouped:
+    for code, group in final_df.groupby("CODE"):
         if len(group) > 200: # Minimum history requirement
-            processed_dfs.append(add_technical_indicators(group.copy()))
-            
-    if not processed_dfs:
+            payloads.append({
+                "CLOTURE": np.ascontiguousarray(group["CLOTURE"].to_numpy(dtype=np.float64)),
+                "QUANTITE_NEGOCIEE": np.ascontiguousarray(group["QUANTITE_NEGOCIEE"].to_numpy(dtype=np.float64)),
+            })
+
+    if n_workers and n_workers > 1 and len(payloads) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            # map() keeps input order, so results are deterministic
+            chunksize = max(1, len(payloads) // (n_workers * 4))
+            return list(pool.map(_ticker_features, payloads, chunksize=chunksize))
+
+    return [_ticker_features(p) for p in payloads]
+
+def _scaled_ticker_arrays(final_df, n_workers=None):
+    """
+    Feature engineering + scaling shared by create_dataset and create_sequence_dataset.
+    Returns ([(features float32 (n, F), target float32 (n,)) per ticker], scaler).
+    """
+    print("Preprocessing data...", flush=True)
+    features = [f for f in compute_ticker_features(final_df, n_workers) if len(f)]
+
+    if not features:
         print("No valid data after preprocessing.", flush=True)
-        return None, None, None # Return scaler as well
-        
-    df_all = pd.concat(processed_dfs)
-    
-    FEATURES = ["log_return", "volatility_20", "rsi", "macd_hist", "bb_pos", "volume_change"]
-    TARGET = "log_return" # Predicting next log return
-    
+        return None, None
+
     print(f"Features: {FEATURES}", flush=True)
-    
+
     # Scaling - RobustScaler is crucial for financial data (outliers)
+    # Fit on all tickers at once, then scale each ticker's block
     scaler = RobustScaler()
-    df_all[FEATURES] = scaler.fit_transform(df_all[FEATURES].values)
-    
+    scaler.fit(np.concatenate(features))
+
+    # One contiguous float32 block per ticker; the target is the (scaled) TARGET column
+    target_idx = FEATURES.index(TARGET)
+    arrays = []
+    for f in features:
+        scaled = scaler.transform(f).astype(np.float32)
+        arrays.append((scaled, np.ascontiguousarray(scaled[:, target_idx])))
+    return arrays, scaler
+
+def window_targets(target, seq_len, horizons, n_samples):
+    """y[i] = [target[i + seq_len + h - 1] for h in horizons] for the first n_samples windows."""
+    idx = np.arange(n_samples)[:, None] + seq_len + np.asarray(horizons) - 1
+    return target[idx]
+
+def num_windows(n_rows, seq_len, horizons):
+    return max(n_rows - seq_len - max(horizons), 0)
+
+def create_dataset(final_df, seq_len=60, horizons=[1, 5], n_workers=None):
+    """
+    Materializes every training window as (X, y, scaler) arrays.
+    Prefer create_sequence_dataset for training on the whole market: it slices windows lazily.
+    """
+    arrays, scaler = _scaled_ticker_arrays(final_df, n_workers)
+    if arrays is None:
+        return None, None, None # Return scaler as well
+
     X_all = []
     y_all = []
-    
+
     # Sequence generation
     print("Generating sequences...", flush=True)
-    for code, group in df_all.groupby("CODE"):
-        data = group[FEATURES].values
-        target = group[TARGET].values
-        
-        if len(data) < seq_len + max(horizons):
+    for data, target in arrays:
+        n = num_windows(len(data), seq_len, horizons)
+        if n == 0:
             continue
-            
-        # Vectorized sequence creation preferred, but loop is clearer for variable horizons
-        for i in range(len(data) - seq_len - max(horizons)):
-            X_all.append(data[i:i+seq_len])
-            # Target: Return at t+1 and t+5
-            y_all.append([target[i+seq_len], target[i+seq_len+4]]) 
-            
-    X_all = np.array(X_all)
-    y_all = np.array(y_all)
-    
+
+        # (n_windows, features, seq_len) view -> (n_windows, seq_len, features); no copy until concatenate
+        windows = sliding_window_view(data, seq_len, axis=0)[:n].transpose(0, 2, 1)
+        X_all.append(windows)
+        # Target: Return at t+1 and t+5
+        y_all.append(window_targets(target, seq_len, horizons, n))
+
+    if not X_all:
+        print("No ticker has enough history for a single sequence.", flush=True)
+        return None, None, None
+
+    X_all = np.concatenate(X_all)
+    y_all = np.concatenate(y_all)
+
     print(f"Dataset Shape: X={X_all.shape}, y={y_all.shape}", flush=True)
     return X_all, y_all, scaler
+
+def create_sequence_dataset(final_df, seq_len=60, horizons=[1, 5], n_workers=None):
+    """
+    Same windows and ordering as create_dataset, but returned as a SequenceDataset
+    that slices them lazily from one float32 array per ticker.
+    Returns (dataset, scaler) or (None, None).
+    """
+    from forecasting.sequences.dataset import SequenceDataset
+
+    arrays, scaler = _scaled_ticker_arrays(final_df, n_workers)
+    if arrays is None:
+        return None, None
+
+    dataset = SequenceDataset(arrays, seq_len=seq_len, horizons=horizons)
+    if len(dataset) == 0:
+        print("No ticker has enough history for a single sequence.", flush=True)
+        return None, None
+
+    print(f"Dataset: {len(dataset)} sequences of ({seq_len}, {dataset.n_features}), "
+          f"{dataset.nbytes / 1e6:.1f} MB of feature data", flush=True)
+    return dataset, scaler
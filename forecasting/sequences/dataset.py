@@ -0,0 +1,50 @@
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from forecasting.sequences.creation import num_windows
+
+class SequenceDataset(Dataset):
+    """
+    Training windows sliced on demand from per-ticker float32 arrays.
+
+    Sample k is (data[i:i+seq_len], [target[i+seq_len+h-1] for h in horizons]) of the
+    ticker that owns k; the window is a view of the ticker array, so memory stays at
+    one copy of the feature matrix no matter how many windows there are.
+    """
+
+    def __init__(self, arrays, seq_len=60, horizons=(1, 5)):
+        self.seq_len = seq_len
+        self.horizon_offsets = seq_len + np.asarray(horizons) - 1
+
+        self.data = []
+        self.targets = []
+        counts = []
+        for data, target in arrays:
+            n = num_windows(len(data), seq_len, horizons)
+            if n == 0:
+                continue
+            self.data.append(np.ascontiguousarray(data, dtype=np.float32))
+            self.targets.append(np.ascontiguousarray(target, dtype=np.float32))
+            counts.append(n)
+
+        # offsets[k] = index of the first sample of ticker k
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.n_features = self.data[0].shape[1] if self.data else 0
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def nbytes(self):
+        return sum(d.nbytes + t.nbytes for d, t in zip(self.data, self.targets))
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        ticker = int(np.searchsorted(self.offsets, idx, side="right")) - 1
+        i = idx - self.offsets[ticker]
+
+        x = torch.from_numpy(self.data[ticker][i:i + self.seq_len])
+        y = torch.from_numpy(self.targets[ticker][i + self.horizon_offsets])
+        return x, y
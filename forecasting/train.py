@@ -1,25 +1,34 @@
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
+from torch.utils.data import DataLoader, Subset
 import numpy as np
 import os
+import shutil
 import joblib
 
-from forecasting.data.loader import load_and_merge_data
-from forecasting.sequences.creation import create_dataset
+from forecasting.config import forecasting_settings as settings
+from forecasting.data.loader import load_and_merge_data, list_source_files
+from forecasting.registry import ModelRegistry, data_fingerprint, MODEL_FILE, SCALER_FILE
+from forecasting.sequences.creation import create_sequence_dataset, FEATURES
 from forecasting.models.lstm import OptimizedLSTM
 
-# Configuration
-DATA_DIR = r"C:\Users\user\Downloads\sama3tou max\Datasets"
-ARTIFACTS_DIR = r"C:\Users\user\Downloads\sama3tou max\forecasting\artifacts"
+# Configuration (forecasting.config, i.e. environment / .env)
+DATA_DIR = settings.DATA_DIR
+ARTIFACTS_DIR = settings.ARTIFACTS_DIR
 SEQ_LEN = 60
 BATCH_SIZE = 128
 EPOCHS = 20
+FEATURE_WORKERS = os.cpu_count() or 1 # processes for per-ticker feature engineering (1 = serial)
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 def train():
-    if not os.path.exists(ARTIFACTS_DIR):
-        os.makedirs(ARTIFACTS_DIR)
+    """
+    Trains on DATA_DIR and publishes the result as a new model registry version
+    (made CURRENT; running API workers switch to it on their next check).
+    Returns the version, or None if training was aborted.
+    """
+    # Fingerprint first: files replaced while we train must not be attributed to this model
+    fingerprint = data_fingerprint(DATA_DIR)
 
     # 1. Load Data
     final_df = load_and_merge_data(DATA_DIR)
@@ -27,28 +36,29 @@ def train():
         print("Training aborted: No data.")
         return
 
-    # 2. Create Dataset
-    X, y, scaler = create_dataset(final_df, seq_len=SEQ_LEN)
-    if X is None:
+    # 2. Create Dataset (windows are sliced lazily from one float32 array per ticker)
+    dataset, scaler = create_sequence_dataset(final_df, seq_len=SEQ_LEN, n_workers=FEATURE_WORKERS)
+    if dataset is None:
         print("Training aborted: Failed to create sequences.")
         return
         
+    # Artifacts go to a staging directory, published as a version once complete
+    registry = ModelRegistry(ARTIFACTS_DIR)
+    staging = registry.staging_dir()
+
     # Save Scaler for Inference
-    joblib.dump(scaler, os.path.join(ARTIFACTS_DIR, "scaler.pkl"))
+    joblib.dump(scaler, os.path.join(staging, SCALER_FILE))
 
     # 3. Split Data
-    split_idx = int(0.8 * len(X))
-    X_train, y_train = X[:split_idx], y[:split_idx]
-    X_val, y_val = X[split_idx:], y[split_idx:]
-    
-    train_dataset = TensorDataset(torch.tensor(X_train, dtype=torch.float32), torch.tensor(y_train, dtype=torch.float32))
-    val_dataset = TensorDataset(torch.tensor(X_val, dtype=torch.float32), torch.tensor(y_val, dtype=torch.float32))
+    split_idx = int(0.8 * len(dataset))
+    train_dataset = Subset(dataset, range(split_idx))
+    val_dataset = Subset(dataset, range(split_idx, len(dataset)))
     
     train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
     val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
     
     # 4. Initialize Model
-    model = OptimizedLSTM(input_dim=X.shape[2]).to(device)
+    model = OptimizedLSTM(input_dim=dataset.n_features).to(device)
     criterion = nn.HuberLoss()
     optimizer = torch.optim.AdamW(model.parameters(), lr=1e-3, weight_decay=1e-4)
     scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(optimizer, 'min', patience=3, factor=0.5)
@@ -94,7 +104,7 @@ def train():
         if avg_val_loss < best_loss:
             best_loss = avg_val_loss
             early_stop_count = 0
-            torch.save(model.state_dict(), os.path.join(ARTIFACTS_DIR, "best_lstm_model.pth"))
+            torch.save(model.state_dict(), os.path.join(staging, MODEL_FILE))
             print("Saved best model.")
         else:
             early_stop_count += 1
@@ -103,6 +113,26 @@ def train():
                 break
                 
     print("Training finished.")
+    if best_loss == float('inf'):
+        print("Training aborted: no model was saved.")
+        shutil.rmtree(staging, ignore_errors=True)
+        return None
+
+    # CPU serving artifact (see forecasting/export.py)
+    from forecasting.export import export_torchscript
+    print(f"TorchScript model written to {export_torchscript(os.path.join(staging, MODEL_FILE))}")
+
+    version = registry.publish(staging, {
+        "features": FEATURES,
+        "seq_len": SEQ_LEN,
+        "input_dim": dataset.n_features,
+        "data_fingerprint": fingerprint,
+        "data_files": list_source_files(DATA_DIR),
+        "val_loss": best_loss,
+        "epochs": epoch + 1,
+    })
+    print(f"Published model version {version} to {registry.root}")
+    return version
 
 if __name__ == "__main__":
     train()